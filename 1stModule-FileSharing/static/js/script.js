@@ -1,5 +1,5 @@
 // Socket.IO
-const socket = io();
+const socket = io(BASE_URL || "/");
 
 // Dark/Light mode persistence
 const toggle = document.getElementById("theme-toggle");
@@ -29,8 +29,8 @@ socket.on("new_file", (data) => {
     <td>${data.meta.ip}</td>
     <td>${data.meta.size}</td>
     <td>${data.meta.upload_time}</td>
-    <td><a href="/preview/${data.filename}" target="_blank">👁️</a></td>
-    <td><a href="/download/${data.filename}">⬇️</a></td>
+    <td><a href="${BASE_URL}/preview/${data.filename}" target="_blank">👁️</a></td>
+    <td><a href="${BASE_URL}/download/${data.filename}">⬇️</a></td>
     <td>${data.meta.ip === '{{ request.remote_addr }}' ? `<button class="delete-btn" data-filename="${data.filename}">🗑️Delete</button>` : ''}</td>
   `;
   tbody.prepend(row);
@@ -48,7 +48,7 @@ function attachDeleteEvents() {
   document.querySelectorAll(".delete-btn").forEach(btn => {
     btn.onclick = async () => {
       const filename = btn.dataset.filename;
-      const res = await fetch(`/delete/${filename}`, { method: "POST" });
+      const res = await fetch(`${BASE_URL}/delete/${filename}`, { method: "POST" });
       const result = await res.json();
       if (result.success) btn.closest("tr").remove();
       else alert(result.error);
@@ -142,6 +142,6 @@ uploadForm.addEventListener("submit", (e) => {
     }
   };
 
-  xhr.open("POST", "/", true);
+  xhr.open("POST", BASE_URL + "/", true);
   xhr.send(formData);
 });
@@ -0,0 +1,322 @@
+"""
+HostCast - Offline Pipeline Benchmark
+The capture loop's encode path driven by synthetic screens instead of mss - runs headless on Linux
+
+    python bench.py                                  # 1080p, every source, auto encoder
+    python bench.py --resolutions 720p 4k --encoders pillow simplejpeg --qualities 50 70
+    python bench.py --modes jpeg tiles h264 --json results.json
+    python bench.py --baseline results.json          # Fails on a >10% FPS drop
+    python bench.py --sources recorded --record ./frames
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# The engine helpers live in the shared hostcast package at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from hostcast.buffers import enable_image_arena
+from hostcast.encoders import ENCODERS
+from hostcast.idle import IdleDetector
+from hostcast.streaming import output_size
+from hostcast.tiles import TileDiffer
+
+RESOLUTIONS = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "4k": (3840, 2160)
+}
+MODES = ("jpeg", "tiles", "h264", "vp8")
+
+
+class StaticSource:
+    """A desktop that never changes - measures idle suppression"""
+    name = "static"
+
+    def __init__(self, width, height):
+        self.image = desktop(width, height)
+
+    def frame(self, index):
+        return self.image
+
+
+class ScrollingTextSource:
+    """A text page scrolling a few lines per frame - typical reading/coding workload"""
+    name = "scroll"
+
+    def __init__(self, width, height, step=24):
+        self.height = height
+        self.step = step
+        self.page = text_page(width, height * 3)
+
+    def frame(self, index):
+        top = index * self.step % (self.page.shape[0] - self.height)
+        return self.page[top:top + self.height]  # Contiguous view, like an mss buffer
+
+
+class NoiseSource:
+    """Full-motion random pixels - worst case for every encoder"""
+    name = "noise"
+
+    def __init__(self, width, height, variants=8):
+        rng = np.random.default_rng(0)
+        self.frames = [rng.integers(0, 256, (height, width, 4), dtype=np.uint8) for _ in range(variants)]
+
+    def frame(self, index):
+        return self.frames[index % len(self.frames)]
+
+
+class RecordedSource:
+    """Frames from a directory of screenshots (PNG/JPEG/BMP or .npy BGRA dumps), played in a loop"""
+    name = "recorded"
+
+    def __init__(self, width, height, directory):
+        paths = sorted(path for path in glob.glob(os.path.join(directory, "*"))
+                       if path.lower().endswith((".png", ".jpg", ".jpeg", ".bmp", ".npy")))
+        if not paths:
+            raise ValueError(f"No frames found in {directory}")
+        self.frames = [load_frame(path, width, height) for path in paths]
+
+    def frame(self, index):
+        return self.frames[index % len(self.frames)]
+
+
+def to_bgra(img):
+    """Pillow image -> (height, width, 4) BGRA array, the layout mss delivers"""
+    rgba = np.asarray(img.convert("RGBA"))
+    return np.ascontiguousarray(rgba[:, :, [2, 1, 0, 3]])
+
+
+def load_frame(path, width, height):
+    if path.lower().endswith(".npy"):
+        bgra = np.load(path)
+        img = Image.frombuffer("RGBA", (bgra.shape[1], bgra.shape[0]), np.ascontiguousarray(bgra), "raw", "BGRA", 0, 1)
+    else:
+        img = Image.open(path)
+    if img.size != (width, height):
+        img = img.resize((width, height), Image.LANCZOS)
+    return to_bgra(img)
+
+
+def desktop(width, height):
+    """Flat background, a taskbar and a few windows"""
+    img = Image.new("RGB", (width, height), (32, 72, 120))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([0, height - height // 24, width, height], fill=(20, 20, 28))
+    for i in range(4):
+        x, y = width * (i + 1) // 10, height * (i + 1) // 9
+        draw.rectangle([x, y, x + width // 3, y + height // 3], fill=(240, 240, 240), outline=(90, 90, 90), width=2)
+        draw.rectangle([x, y, x + width // 3, y + height // 30], fill=(60, 100, 170))
+    return to_bgra(img)
+
+
+def text_page(width, height):
+    """Dark editor-style page of pseudo-code lines"""
+    img = Image.new("RGB", (width, height), (30, 30, 30))
+    draw = ImageDraw.Draw(img)
+    try:
+        font = ImageFont.truetype("DejaVuSansMono.ttf", 16)
+    except OSError:
+        font = ImageFont.load_default()
+    words = ("def", "return", "self", "frame", "encode", "quality", "width", "if", "for", "in", "None", "socketio")
+    colors = ((220, 220, 170), (86, 156, 214), (206, 145, 120), (212, 212, 212))
+    for line, y in enumerate(range(4, height, 24)):
+        text = " " * (line % 6 * 4) + " ".join(words[(line * 7 + i) % len(words)] for i in range(4 + line % 9))
+        draw.text((12, y), f"{line + 1:>5}  {text}", fill=colors[line % len(colors)], font=font)
+    return to_bgra(img)
+
+
+def create_source(name, width, height, record=None):
+    if name == "static":
+        return StaticSource(width, height)
+    if name == "scroll":
+        return ScrollingTextSource(width, height)
+    if name == "noise":
+        return NoiseSource(width, height)
+    if name == "recorded":
+        return RecordedSource(width, height, record)
+    raise ValueError(f"Unknown source '{name}'")
+
+
+class Run:
+    """One configuration's encode path, mirroring ScreenStreamer.run() per captured frame"""
+
+    def __init__(self, mode, encoder_name, quality, width, idle=True):
+        self.mode = mode
+        self.quality = quality
+        self.width = width
+        self.idle = IdleDetector() if idle else None
+        self.tiles = TileDiffer() if mode == "tiles" else None
+        self.video = None
+        self.encoder = None
+        if mode in ("h264", "vp8"):
+            from hostcast.video import VideoEncoder
+            self.video = VideoEncoder(mode)
+        else:
+            self.encoder = ENCODERS[encoder_name]()
+
+    def step(self, bgra, index):
+        """Process one captured frame; returns (bytes produced, whether anything was encoded)"""
+        size = output_size(bgra.shape[1], bgra.shape[0], self.width)
+        if self.idle and not self.idle.changed(bgra) and index > 0:
+            return 0, False
+        if self.video:
+            fragment = self.video.encode(bgra, size, self.quality, index == 0)
+            return (len(fragment['data']) if fragment else 0), True
+        if self.tiles:
+            regions = self.tiles.diff(bgra, *size)
+            if regions is not None:
+                source = self.encoder.source(bgra)
+                total = 0
+                for src_box, out_box in regions:
+                    x0, y0, x1, y1 = out_box
+                    total += len(self.encoder.encode(source, (x1 - x0, y1 - y0), self.quality, src_box))
+                return total, bool(regions)
+        return len(self.encoder.encode(self.encoder.source(bgra), size, self.quality)), True
+
+    def close(self):
+        if self.video:
+            self.video.close()
+
+
+def benchmark(source, mode, encoder_name, quality, width, frames, warmup=3, alloc_frames=5):
+    """FPS, CPU ms, bytes and traced allocations per frame for one configuration"""
+    run = Run(mode, encoder_name, quality, width)
+    try:
+        for i in range(warmup):
+            run.step(source.frame(i), i)
+
+        total_bytes = encoded = 0
+        wall, cpu = time.perf_counter(), time.process_time()
+        for i in range(warmup, warmup + frames):
+            size, sent = run.step(source.frame(i), i)
+            total_bytes += size
+            encoded += sent
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+        # Transient allocations beyond the encoded payload (tracemalloc slows everything, so separately)
+        allocated = 0
+        if alloc_frames:
+            tracemalloc.start()
+            for i in range(warmup + frames, warmup + frames + alloc_frames):
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                size, _ = run.step(source.frame(i), i)
+                allocated += max(0, tracemalloc.get_traced_memory()[1] - before - size)
+            tracemalloc.stop()
+    finally:
+        run.close()
+
+    return {
+        'fps': round(frames / wall, 1),
+        'cpu_ms': round(cpu / frames * 1000, 2),
+        'kb_per_frame': round(total_bytes / frames / 1024, 1),
+        'encoded_ratio': round(encoded / frames, 2),
+        'alloc_kb': round(allocated / alloc_frames / 1024, 1) if alloc_frames else None
+    }
+
+
+def available_encoders(names):
+    usable = []
+    for name in names:
+        try:
+            ENCODERS[name]()
+            usable.append(name)
+        except KeyError:
+            print(f"⚠️ Unknown encoder '{name}'")
+        except (ImportError, OSError, RuntimeError):
+            print(f"⚠️ Encoder '{name}' unavailable - skipped")
+    return usable
+
+
+def configurations(args):
+    encoders = available_encoders(list(ENCODERS) if args.encoders == ["all"] else args.encoders)
+    for mode in args.modes:
+        if mode in ("h264", "vp8"):
+            yield mode, mode  # The video codec is the encoder
+        else:
+            for encoder in encoders:
+                yield mode, encoder
+
+
+def compare(results, baseline_path, tolerance):
+    """Print FPS change against a saved run; returns the number of regressions"""
+    with open(baseline_path) as f:
+        baseline = {result['key']: result for result in json.load(f)['results']}
+    regressions = 0
+    print(f"\n📈 Against {baseline_path} (tolerance {tolerance:.0%})")
+    for result in results:
+        before = baseline.get(result['key'])
+        if not before or not before['fps']:
+            continue
+        change = result['fps'] / before['fps'] - 1
+        flag = "✅"
+        if change < -tolerance:
+            flag = "❌"
+            regressions += 1
+        print(f"   {flag} {result['key']:<48} {before['fps']:>7.1f} -> {result['fps']:>7.1f} FPS ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HostCast encode-path benchmark with synthetic screens")
+    parser.add_argument("--sources", nargs="+", default=["static", "scroll", "noise"],
+                        choices=["static", "scroll", "noise", "recorded"])
+    parser.add_argument("--record", help="Directory of frames for the 'recorded' source")
+    parser.add_argument("--resolutions", nargs="+", default=["1080p"], choices=list(RESOLUTIONS))
+    parser.add_argument("--modes", nargs="+", default=["jpeg"], choices=MODES)
+    parser.add_argument("--encoders", nargs="+", default=["all"], help="JPEG backends (default: all installed)")
+    parser.add_argument("--qualities", nargs="+", type=int, default=[70])
+    parser.add_argument("--widths", nargs="+", type=int, default=[1280], help="Output widths (0 = native)")
+    parser.add_argument("--frames", type=int, default=60, help="Timed frames per configuration")
+    parser.add_argument("--no-alloc", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Earlier --json output to compare FPS against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed FPS drop vs. the baseline")
+    args = parser.parse_args()
+    if "recorded" in args.sources and not args.record:
+        parser.error("--sources recorded needs --record DIR")
+
+    enable_image_arena(16)
+    configs = list(configurations(args))
+    results = []
+    print(f"{'source':<9}{'res':<7}{'mode':<7}{'encoder':<12}{'q':>4}{'width':>7}"
+          f"{'FPS':>9}{'CPU ms':>9}{'KB/frame':>10}{'encoded':>9}{'alloc KB':>10}")
+    for resolution in args.resolutions:
+        width, height = RESOLUTIONS[resolution]
+        for source_name in args.sources:
+            source = create_source(source_name, width, height, args.record)
+            for mode, encoder in configs:
+                for quality in args.qualities:
+                    for target in args.widths:
+                        try:
+                            result = benchmark(source, mode, encoder, quality, target, args.frames,
+                                               alloc_frames=0 if args.no_alloc else 5)
+                        except ImportError as e:
+                            print(f"⚠️ {mode} unavailable ({e}) - skipped")
+                            break
+                        key = f"{source_name}/{resolution}/{mode}/{encoder}/q{quality}/w{target}"
+                        results.append(dict(result, key=key))
+                        alloc = f"{result['alloc_kb']:>10.1f}" if result['alloc_kb'] is not None else f"{'-':>10}"
+                        print(f"{source_name:<9}{resolution:<7}{mode:<7}{encoder:<12}{quality:>4}{target:>7}"
+                              f"{result['fps']:>9.1f}{result['cpu_ms']:>9.2f}{result['kb_per_frame']:>10.1f}"
+                              f"{result['encoded_ratio']:>9.0%}{alloc}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({'created': time.strftime("%Y-%m-%d %H:%M:%S"), 'results': results}, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+    if args.baseline and compare(results, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,619 @@
+"""
+HostCast - Multi-Viewer Load Test
+Starts a server on a synthetic screen and drives it with N python-socketio viewers (and controllers)
+
+    python loadtest.py                                   # Module 2, 1/2/4/8/16 viewers, 20 s each
+    python loadtest.py --viewers 1 5 10 20 40 --duration 30 --json scaling.json
+    python loadtest.py --app ../3rdModule-RemoteControl/n.py --controllers 1
+    python loadtest.py --set TARGET_FPS=30 --set ADAPTIVE_STREAM=False
+    python loadtest.py --set CAPTURE_PROCESS=True
+    python loadtest.py --set ASYNC_MODE=eventlet
+
+Server and viewers run on the same machine, so the server's monotonic capture
+stamps (`t`) compare directly with the viewers' clock.
+"""
+import argparse
+import ast
+import atexit
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_APP = os.path.join(HERE, "screenshare_audio.py")
+MEDIA_EVENTS = ("frame", "tiles", "video")
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# --- Synthetic host (server process and its capture children) -----------------------
+
+SYNTHETIC_ENV = "HOSTCAST_SYNTHETIC_HOST"  # source/resolution/record for spawned children, as JSON
+SYNTHETIC_MODULES = ("mss", "pyaudiowpatch", "pyautogui", "pynput", "win32api", "win32con")
+
+class _Shot:
+    """What mss.grab() returns: BGRA bytes plus geometry"""
+
+    def __init__(self, raw, width, height):
+        self.raw = raw
+        self.width = width
+        self.height = height
+        self.size = (width, height)
+
+
+class SyntheticScreen:
+    """mss.mss() stand-in serving bench.py sources as a single monitor"""
+
+    def __init__(self, source, width, height):
+        self.source = source
+        self.frames = 0
+        self.monitors = [
+            {'left': 0, 'top': 0, 'width': width, 'height': height},
+            {'left': 0, 'top': 0, 'width': width, 'height': height}
+        ]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def close(self):
+        pass
+
+    def grab(self, monitor):
+        if isinstance(monitor, tuple):
+            left, top, right, bottom = monitor
+        else:
+            left, top = monitor['left'], monitor['top']
+            right, bottom = left + monitor['width'], top + monitor['height']
+        image = self.source.frame(self.frames)[top:bottom, left:right]
+        self.frames += 1
+        return _Shot(image.tobytes(), right - left, bottom - top)  # mss allocates a fresh buffer per grab too
+
+
+class SilentLoopback:
+    """pyaudiowpatch stand-in: a 48 kHz stereo loopback device producing silence in real time"""
+    paInt16 = 8
+    paWASAPI = 13
+    paContinue = 0
+
+    class Stream:
+        def __init__(self, channels, rate, frames_per_buffer, stream_callback=None, **kwargs):
+            self.channels = channels
+            self.rate = rate
+            self.chunk = frames_per_buffer
+            self.callback = stream_callback
+            self.active = True
+            self.next_read = time.monotonic()
+            if stream_callback:
+                threading.Thread(target=self._run, daemon=True).start()
+
+        def _run(self):
+            while self.active:
+                self._pace()
+                self.callback(bytes(self.chunk * self.channels * 2), self.chunk, {}, 0)
+
+        def _pace(self):
+            self.next_read = max(self.next_read + self.chunk / self.rate, time.monotonic() - 1)
+            time.sleep(max(0.0, self.next_read - time.monotonic()))
+
+        def read(self, frames, exception_on_overflow=True):
+            self._pace()
+            return bytes(frames * self.channels * 2)
+
+        def start_stream(self):
+            pass
+
+        def stop_stream(self):
+            self.active = False
+
+        def close(self):
+            self.active = False
+
+        def is_active(self):
+            return self.active
+
+    class PyAudio:
+        DEVICE = {"name": "Synthetic Loopback", "index": 0, "isLoopbackDevice": True,
+                  "defaultSampleRate": 48000.0, "maxInputChannels": 2}
+
+        def get_host_api_info_by_type(self, api):
+            return {"defaultOutputDevice": 0}
+
+        def get_device_info_by_index(self, index):
+            return dict(self.DEVICE)
+
+        def get_loopback_device_info_generator(self):
+            return iter([dict(self.DEVICE)])
+
+        def open(self, **kwargs):
+            return SilentLoopback.Stream(**kwargs)
+
+        def terminate(self):
+            pass
+
+        @staticmethod
+        def get_sample_size(fmt):
+            return 2
+
+
+class InputSink:
+    """Counts injected input instead of moving the real pointer or typing"""
+
+    def __init__(self):
+        self.events = 0
+        self.position = (0, 0)
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return self._record
+
+    def __setattr__(self, name, value):
+        if name == "position":
+            self.__dict__['events'] = self.__dict__.get('events', 0) + 1
+        self.__dict__[name] = value
+
+    def _record(self, *args, **kwargs):
+        self.__dict__['events'] += 1
+        return 0
+
+
+class _Names:
+    """Enum stand-in: any attribute is its own name (Key.enter, Button.left, ...)"""
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return name
+
+
+def install_synthetic_host(source, width, height):
+    """Register synthetic mss/audio/input modules before the app imports the real ones"""
+    screen = lambda **kwargs: SyntheticScreen(source, width, height)
+    sink = InputSink()
+
+    modules = {
+        "mss": {"mss": screen},
+        "pyaudiowpatch": {"PyAudio": SilentLoopback.PyAudio, "paInt16": 8, "paWASAPI": 13, "paContinue": 0},
+        "pyautogui": {"FAILSAFE": False, "PAUSE": 0, "MINIMUM_DURATION": 0, "__getattr__": lambda name: sink._record},
+        "pynput": {},
+        "pynput.mouse": {"Controller": lambda: sink, "Button": _Names()},
+        "pynput.keyboard": {"Controller": lambda: sink, "Key": _Names()},
+        "win32api": {"GetCursorPos": lambda: sink.position, "__getattr__": lambda name: sink._record},
+        "win32con": {"__getattr__": lambda name: 0}
+    }
+    for name, attributes in modules.items():
+        module = types.ModuleType(name)
+        module.__dict__.update(attributes)
+        sys.modules[name] = module
+    sys.modules["pynput"].mouse = sys.modules["pynput.mouse"]
+    sys.modules["pynput"].keyboard = sys.modules["pynput.keyboard"]
+    return sink
+
+
+def install_from_environment():
+    """Spawned child (CAPTURE_PROCESS): rebuild the server's synthetic host from SYNTHETIC_ENV"""
+    from bench import RESOLUTIONS, create_source
+
+    config = json.loads(os.environ[SYNTHETIC_ENV])
+    width, height = RESOLUTIONS[config['resolution']]
+    install_synthetic_host(create_source(config['source'], width, height, config['record']), width, height)
+
+
+def write_stub_modules(directory):
+    """
+    Importable stand-ins for SYNTHETIC_MODULES. A spawned child starts with
+    a fresh sys.modules but the server's sys.path, so with this directory
+    first its `import mss` lands here and installs the synthetic host too.
+    """
+    for name in SYNTHETIC_MODULES:
+        with open(os.path.join(directory, name + ".py"), "w") as f:
+            f.write("# loadtest.py stub: replaces itself (and the other host modules) with the synthetic host\n"
+                    "import loadtest\n"
+                    "loadtest.install_from_environment()\n")
+
+
+def parse_value(text):
+    """--set values: Python literals where possible (30, False, None, 'h264'), else plain strings"""
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def compile_app(path, assignments):
+    """
+    The app's code with each --set NAME=VALUE written into its top-level
+    `NAME = ...` line, so settings read while the module loads (ASYNC_MODE,
+    JPEG_ENCODER, everything built from the constants) see the new value.
+    A name the app never assigns at top level raises ValueError.
+    """
+    overrides = {}
+    for assignment in assignments:
+        name, _, value = assignment.partition("=")
+        overrides[name.strip()] = parse_value(value)
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    applied = set()
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            name = node.targets[0].id
+            if name in overrides:
+                node.value = ast.copy_location(ast.parse(repr(overrides[name]), mode="eval").body, node.value)
+                applied.add(name)
+    unknown = set(overrides) - applied
+    if unknown:
+        raise ValueError(f"{os.path.basename(path)} has no setting {', '.join(sorted(unknown))}")
+    return compile(ast.fix_missing_locations(tree), path, "exec")
+
+
+def serve(args):
+    """Server process: synthetic host + the app, listening on --port"""
+    from bench import RESOLUTIONS, create_source
+
+    width, height = RESOLUTIONS[args.resolution]
+    install_synthetic_host(create_source(args.source, width, height, args.record), width, height)
+
+    # The same synthetic host for capture processes the app spawns
+    stubs = tempfile.mkdtemp(prefix="hostcast_stubs_")
+    atexit.register(shutil.rmtree, stubs, True)
+    write_stub_modules(stubs)
+    os.environ[SYNTHETIC_ENV] = json.dumps({'source': args.source, 'resolution': args.resolution, 'record': args.record})
+    sys.path.insert(0, HERE)  # loadtest itself, for the stubs
+    sys.path.insert(0, stubs)
+
+    app_dir = os.path.dirname(os.path.abspath(args.app))
+    os.chdir(app_dir)
+    spec = importlib.util.spec_from_file_location("hostcast_app", args.app)
+    app = importlib.util.module_from_spec(spec)
+    exec(compile_app(args.app, args.set), app.__dict__)
+    if getattr(app, "CAPTURE_PROCESS", False):
+        app.install_sigterm_handler()  # server.terminate() then takes the capture children with it
+
+    app.socketio.run(app.app, host="127.0.0.1", port=args.port, use_reloader=False,
+                     log_output=False, allow_unsafe_werkzeug=True)
+
+
+# --- Load generator ------------------------------------------------------------------
+
+def ordered_client():
+    """socketio.Client that handles Engine.IO messages in arrival order, like a browser"""
+    import engineio
+    import socketio
+
+    class OrderedEngineIO(engineio.Client):
+        # The stock client handles each message on a new thread, so under load a binary
+        # event's attachment can be processed before its header
+        def _trigger_event(self, event, *args, **kwargs):
+            if event == "message":
+                if self.state != "connected":
+                    return None  # Frames still buffered after the viewer hung up
+                kwargs['run_async'] = False
+            return super()._trigger_event(event, *args, **kwargs)
+
+    class OrderedClient(socketio.Client):
+        def _engineio_client_class(self):
+            return OrderedEngineIO
+
+    return OrderedClient(reconnection=False)
+
+
+class Viewer:
+    """One simulated viewer: counts media, measures capture-to-receive latency, acks like the browser client"""
+
+    def __init__(self, url, controller=False):
+        self.client = ordered_client()
+        self.url = url
+        self.controller = controller
+        self.frames = 0
+        self.audio = 0
+        self.bytes = 0
+        self.latencies = []
+        self.lock = threading.Lock()
+        self.last_ack = 0.0
+        for event in MEDIA_EVENTS:
+            self.client.on(event, self._media_handler(event))
+        self.client.on("audio", self._on_audio)
+
+    def _media_handler(self, event):
+        def handler(data, stamp=None):
+            now = time.monotonic() * 1000
+            stamp = stamp if event == "frame" else data
+            payload = data if event == "frame" else data.get('data') or data.get('tiles') or b""
+            with self.lock:
+                self.frames += 1
+                self.bytes += len(payload) if isinstance(payload, (bytes, str)) else 0
+                if stamp and 't' in stamp:
+                    self.latencies.append(now - stamp['t'])
+            self.client.emit("frame_ack")
+            if stamp and 't' in stamp and now - self.last_ack >= 250:
+                self.last_ack = now
+                self.client.emit("latency_ack", {'media': event, 'seq': stamp['seq'], 't': stamp['t'],
+                                                 'recv': now, 'shown': now, 'sent': now})
+        return handler
+
+    def _on_audio(self, data):
+        with self.lock:
+            self.audio += 1
+            payload = data.get('data')
+            self.bytes += len(payload) if isinstance(payload, (bytes, str)) else 0
+
+    def connect(self):
+        self.client.connect(self.url, transports=["websocket"], wait_timeout=10)
+        self.client.emit("ping", {'t': time.monotonic() * 1000, 'rtt': 1.0})
+        if self.controller:
+            self.client.emit("enable_control", {'enabled': True})
+
+    def take(self):
+        """Counters since the last call"""
+        with self.lock:
+            counters = (self.frames, self.audio, self.bytes, self.latencies)
+            self.frames = self.audio = self.bytes = 0
+            self.latencies = []
+        return counters
+
+    def drive_input(self, stop, rate=60):
+        """Controller: pointer moves at `rate` Hz and a key press/release every 200 ms"""
+        tick = 0
+        while not stop.is_set():
+            phase = tick / rate
+            self.client.emit("mouse_move", {'x': 0.5 + 0.4 * (phase % 1 - 0.5), 'y': 0.5})
+            if tick % (rate // 5) == 0:
+                self.client.emit("key_event", {'key': 'a', 'action': 'down'})
+                self.client.emit("key_event", {'key': 'a', 'action': 'up'})
+            tick += 1
+            stop.wait(1 / rate)
+
+    def close(self):
+        try:
+            self.client.disconnect()
+        except Exception:
+            pass
+
+
+class ProcessSampler:
+    """
+    Server CPU (% of one core) and resident memory, via psutil or /proc.
+    Counts the server's whole process tree, so CAPTURE_PROCESS children
+    (and the multiprocessing resource tracker) are included; a child that
+    exits mid-run takes its CPU time with it.
+    """
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.process = psutil.Process(pid) if psutil else None
+        self.reset()
+
+    def _pids(self):
+        if self.process:
+            return [self.pid] + [child.pid for child in self.process.children(recursive=True)]
+        parents = {}
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                try:
+                    with open(f"/proc/{entry}/stat") as f:
+                        parents.setdefault(int(f.read().rsplit(")", 1)[1].split()[1]), []).append(int(entry))
+                except OSError:
+                    pass  # Exited while listing
+        pids, pending = [], [self.pid]
+        while pending:
+            pid = pending.pop()
+            pids.append(pid)
+            pending.extend(parents.get(pid, []))
+        return pids
+
+    def _cpu_seconds(self, pid):
+        try:
+            if self.process:
+                times = psutil.Process(pid).cpu_times()
+                return times.user + times.system
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        except (OSError, psutil.Error if psutil else OSError):
+            return 0.0  # Exited since _pids()
+
+    def _rss(self, pid):
+        try:
+            if self.process:
+                return psutil.Process(pid).memory_info().rss
+            with open(f"/proc/{pid}/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, psutil.Error if psutil else OSError):
+            return 0
+
+    def rss_mb(self):
+        return sum(self._rss(pid) for pid in self._pids()) / 2**20
+
+    def reset(self):
+        self.start = (time.monotonic(), {pid: self._cpu_seconds(pid) for pid in self._pids()})
+
+    def cpu_percent(self):
+        wall, start = self.start
+        # A child started since reset() counts from zero
+        cpu = sum(self._cpu_seconds(pid) - start.get(pid, 0.0) for pid in self._pids())
+        return cpu / max(1e-6, time.monotonic() - wall) * 100
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+
+def fetch_stats(url):
+    try:
+        with urllib.request.urlopen(url + "/stats", timeout=5) as response:
+            return json.load(response)
+    except (OSError, ValueError):
+        return {}
+
+
+def dropped_frames(stats):
+    monitors = stats.get('monitors', {})
+    return sum(counters['dropped'] for monitor in monitors.values() for counters in monitor.get('frames', {}).values())
+
+
+def start_server(args, port):
+    command = [sys.executable, os.path.abspath(__file__), "--serve", "--app", args.app, "--port", str(port),
+               "--source", args.source, "--resolution", args.resolution]
+    if args.record:
+        command += ["--record", args.record]
+    for assignment in args.set:
+        command += ["--set", assignment]
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL if not args.verbose else None, stderr=subprocess.STDOUT)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode} (run with --verbose)")
+        try:
+            urllib.request.urlopen(url + "/stats", timeout=1).close()
+            return server, url
+        except OSError:
+            time.sleep(0.3)
+    server.kill()
+    raise RuntimeError("Server did not start within 30 s")
+
+
+def run_step(args, viewers, controllers, port):
+    """One point of the scaling curve: a fresh server with `viewers` clients for --duration seconds"""
+    server, url = start_server(args, port)
+    clients = []
+    stop = threading.Event()
+    try:
+        for i in range(viewers):
+            client = Viewer(url, controller=i < controllers)
+            client.connect()
+            clients.append(client)
+            if client.controller:
+                threading.Thread(target=client.drive_input, args=(stop,), daemon=True).start()
+
+        time.sleep(args.warmup)  # Streams start, adaptive settings settle
+        sampler = ProcessSampler(server.pid)
+        for client in clients:
+            client.take()
+        dropped_before = dropped_frames(fetch_stats(url))
+        peak_rss = 0.0
+        deadline = time.monotonic() + args.duration
+        while time.monotonic() < deadline:
+            peak_rss = max(peak_rss, sampler.rss_mb())
+            time.sleep(0.5)
+        elapsed = args.duration
+        cpu = sampler.cpu_percent()
+        stats = fetch_stats(url)
+
+        per_viewer_fps, latencies, total_bytes, audio = [], [], 0, 0
+        for client in clients:
+            frames, chunks, size, samples = client.take()
+            per_viewer_fps.append(frames / elapsed)
+            latencies += samples
+            total_bytes += size
+            audio += chunks
+    finally:
+        stop.set()
+        for client in clients:
+            client.close()
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    return {
+        'viewers': viewers,
+        'controllers': controllers,
+        'fps_mean': round(sum(per_viewer_fps) / len(per_viewer_fps), 1) if per_viewer_fps else 0.0,
+        'fps_min': round(min(per_viewer_fps), 1) if per_viewer_fps else 0.0,
+        'latency_p50_ms': round(percentile(latencies, 0.50), 1) if latencies else None,
+        'latency_p95_ms': round(percentile(latencies, 0.95), 1) if latencies else None,
+        'kbps_per_viewer': round(total_bytes / max(1, viewers) / elapsed * 8 / 1000, 1),
+        'audio_per_s': round(audio / max(1, viewers) / elapsed, 1),
+        'server_cpu_percent': round(cpu, 1),
+        'server_rss_mb': round(peak_rss, 1),
+        'dropped': dropped_frames(stats) - dropped_before
+    }
+
+
+def report(results, target_fps):
+    """Scaling table plus a bar chart of received FPS and server CPU per viewer count"""
+    print(f"\n{'viewers':>8}{'ctrl':>6}{'FPS avg':>9}{'FPS min':>9}{'lat p50':>9}{'lat p95':>9}"
+          f"{'kbps/v':>9}{'CPU %':>8}{'RSS MB':>8}{'dropped':>9}")
+    for r in results:
+        p50 = f"{r['latency_p50_ms']:>9.0f}" if r['latency_p50_ms'] is not None else f"{'-':>9}"
+        p95 = f"{r['latency_p95_ms']:>9.0f}" if r['latency_p95_ms'] is not None else f"{'-':>9}"
+        print(f"{r['viewers']:>8}{r['controllers']:>6}{r['fps_mean']:>9.1f}{r['fps_min']:>9.1f}{p50}{p95}"
+              f"{r['kbps_per_viewer']:>9.0f}{r['server_cpu_percent']:>8.0f}{r['server_rss_mb']:>8.0f}{r['dropped']:>9}")
+
+    print("\n📈 Scaling curve (received FPS per viewer | server CPU)")
+    top_fps = max([target_fps] + [r['fps_mean'] for r in results]) or 1
+    top_cpu = max([100.0] + [r['server_cpu_percent'] for r in results])
+    for r in results:
+        fps_bar = "█" * round(r['fps_mean'] / top_fps * 30)
+        cpu_bar = "▒" * round(r['server_cpu_percent'] / top_cpu * 20)
+        print(f"{r['viewers']:>5} | {fps_bar:<30} {r['fps_mean']:>5.1f} | {cpu_bar:<20} {r['server_cpu_percent']:>4.0f}%")
+
+    saturated = next((r for r in results if r['fps_min'] < target_fps * 0.9 or r['dropped']), None)
+    if saturated:
+        print(f"⚠️ Frames back up from {saturated['viewers']} viewers (FPS min {saturated['fps_min']}, dropped {saturated['dropped']})")
+    else:
+        print(f"✅ No backlog up to {results[-1]['viewers']} viewers")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HostCast multi-viewer load test on a synthetic screen")
+    parser.add_argument("--app", default=DEFAULT_APP, help="Server module (screenshare_audio.py or the remote-control n.py)")
+    parser.add_argument("--viewers", nargs="+", type=int, default=[1, 2, 4, 8, 16])
+    parser.add_argument("--controllers", type=int, default=0, help="Viewers that also send mouse_move/key_event (module 3)")
+    parser.add_argument("--source", default="scroll", choices=["static", "scroll", "noise", "recorded"])
+    parser.add_argument("--record", help="Directory of frames for the 'recorded' source")
+    parser.add_argument("--resolution", default="1080p", choices=["720p", "1080p", "1440p", "4k"])
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds per step")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds before measuring")
+    parser.add_argument("--target-fps", type=float, default=20.0, help="FPS below which a step counts as backed up")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", help="Override a server config constant before the app loads")
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--json", help="Write the scaling results to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the server's output")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    try:
+        compile_app(args.app, args.set)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.serve:
+        serve(args)
+        return
+
+    print(f"🚦 Load test: {os.path.basename(args.app)}, {args.source} @ {args.resolution}, "
+          f"{args.duration:.0f} s per step")
+    results = []
+    for count in args.viewers:
+        controllers = min(args.controllers, count)
+        print(f"   {count} viewer(s), {controllers} controller(s)...", flush=True)
+        results.append(run_step(args, count, controllers, args.port))
+
+    report(results, args.target_fps)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({'app': args.app, 'source': args.source, 'resolution': args.resolution,
+                       'set': args.set, 'results': results}, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
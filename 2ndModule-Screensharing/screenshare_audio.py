@@ -1,37 +1,116 @@
-import base64
-import io
-import time
+import os
+import sys
 import threading
-from flask import Flask, render_template
+
+# The engine helpers live in the shared hostcast package at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, Response, render_template, request, jsonify
 from flask_socketio import SocketIO
-from PIL import Image
-import mss
-import numpy as np
-import pyaudiowpatch as pyaudio
+from hostcast.streaming import StreamConfig, ScreenStreamer
+from hostcast.audio import LoopbackAudio
+from hostcast.metrics import Metrics
+from hostcast.latency import LatencyTracker, LATENCY_BUCKETS
+from hostcast.monitors import snap_viewport, relative_viewport
+from hostcast.capture_process import install_sigterm_handler
+from hostcast.fanout import create_fanout
+
+# Server mode: "threading" (an OS thread per connection and per viewer sender), or
+# "eventlet"/"gevent" to serve many viewers from one event loop. Capture, encode and
+# audio run in OS threads either way - nothing is monkey-patched.
+ASYNC_MODE = "threading"
 
 # Flask + SocketIO setup
 app = Flask(__name__)
 socketio = SocketIO(
     app, 
     cors_allowed_origins="*", 
-    async_mode="threading",
+    async_mode=ASYNC_MODE,
     ping_timeout=60,
     ping_interval=25,
     max_http_buffer_size=10**8,
     logger=False,  # Disable logging to keep terminal clean
     engineio_logger=False  # Disable engine.io logging
 )
+fanout = create_fanout(socketio, ASYNC_MODE)  # Hands frames and audio from capture threads to the senders
 
 # Configuration
 TARGET_WIDTH = 1280
-AUDIO_CHUNK = 4096  # Larger chunks = smoother playback, less crackling
-AUDIO_FORMAT = pyaudio.paInt16
+AUDIO_CHUNK = 2048  # Frames per PortAudio callback
+AUDIO_RING_MS = 1000  # Loopback audio held while the sender is stalled (older audio is overwritten and counted)
+AUDIO_BATCH = 4  # Most AUDIO_CHUNK periods sent in one payload after the sender falls behind
 AUDIO_RATE = 48000  # Match your system's native rate
+FRAME_QUEUE_SIZE = 4  # Frames buffered per viewer before the oldest is dropped (>= PIPELINE_DEPTH)
+BINARY_TRANSPORT = True  # Send frame/audio bytes as binary attachments (False = base64 for old clients)
+TILE_MODE = False  # Send only changed tiles between periodic keyframes
+TILE_SIZE = 64  # Tile edge in output pixels
+KEYFRAME_INTERVAL = 90  # Frames between full keyframes in tile mode
+IDLE_DETECTION = True  # Skip resize/encode/emit while the screen is unchanged
+IDLE_SAMPLE_STEP = 4  # Checksum every Nth row (rotating, so all rows are covered)
+IDLE_HEARTBEAT = 1.0  # Seconds between resends of the last frame while idle
+ENCODER_WORKERS = 2  # Frames encoded in parallel (Pillow releases the GIL)
+PIPELINE_DEPTH = 4  # Frames in flight between capture and send before capture waits
+JPEG_QUALITY = 70  # Starting JPEG quality
+JPEG_ENCODER = "auto"  # "auto", "simplejpeg", "turbojpeg" or "pillow"
+BUFFER_RING = False  # Reuse preallocated capture/scale/output buffers instead of allocating per frame
+TARGET_FPS = 30  # Starting frame rate
+ADAPTIVE_STREAM = True  # Adjust quality/width/FPS to encoder load and viewer backpressure
+QUALITY_RANGE = (35, 85)  # Bounds for adaptive JPEG quality
+WIDTH_RANGE = (640, 1920)  # Bounds for adaptive output width
+FPS_RANGE = (10, 30)  # Bounds for adaptive frame rate
+DEFAULT_MONITOR = 1  # Monitor new viewers watch first (mss index, 1 = primary)
+METRICS = True  # Stage timings, bytes sent and queue depths on /metrics and /stats
+FRAME_POLICY = "skip"  # After an overrun: "skip" missed frames or "catchup" with back-to-back frames
+VIDEO_CODEC = None  # None = JPEG frames; "h264" or "vp8" = inter-frame video via PyAV, played through MSE
+VIDEO_GOP = 120  # Frames between scheduled keyframes (joining viewers get one immediately)
+VIDEO_LOW_LATENCY = True  # zerolatency/realtime tuning: no B-frames, no lookahead
+CAPTURE_PROCESS = False  # Grab and encode in a child process so input and sockets never wait on its GIL (JPEG frames only)
+CAPTURE_RING_SLOTS = 8  # Encoded frames the shared-memory ring holds between the processes
+CAPTURE_SLOT_MB = 4  # Largest encoded frame a ring slot fits (bigger ones are dropped and counted)
+AUDIO_CODEC = "opus"  # "opus" = Opus via PyAV for browsers with WebCodecs (the rest still get PCM); "pcm" = raw PCM16 only
+OPUS_BITRATE = 64000  # Opus bits/s for the whole stream (48 kHz stereo PCM16 is 1536 kbit/s)
+OPUS_FRAME_MS = 20  # Opus frame size: 2.5, 5, 10, 20, 40 or 60 ms (adds at most one frame of delay)
 
 # Global flags
 is_streaming = False
-audio_lock = threading.Lock()
 connected_clients = 0
+metrics = Metrics(enabled=METRICS)
+latency_tracker = LatencyTracker(
+    metrics.histogram("capture_to_receive_seconds", "Capture to arrival at the viewer", "media", LATENCY_BUCKETS),
+    metrics.histogram("capture_to_display_seconds", "Capture to display (or audio playout) at the viewer", "media", LATENCY_BUCKETS)
+)
+# Capture/encode/send per watched monitor - the same code modules 3 and 5 run
+streamer = ScreenStreamer(StreamConfig(
+    target_width=TARGET_WIDTH,
+    target_fps=TARGET_FPS,
+    jpeg_quality=JPEG_QUALITY,
+    quality_range=QUALITY_RANGE,
+    width_range=WIDTH_RANGE,
+    fps_range=FPS_RANGE,
+    adaptive=ADAPTIVE_STREAM,
+    frame_queue_size=FRAME_QUEUE_SIZE,
+    binary_transport=BINARY_TRANSPORT,
+    tile_mode=TILE_MODE,
+    tile_size=TILE_SIZE,
+    keyframe_interval=KEYFRAME_INTERVAL,
+    idle_detection=IDLE_DETECTION,
+    idle_sample_step=IDLE_SAMPLE_STEP,
+    idle_heartbeat=IDLE_HEARTBEAT,
+    encoder_workers=ENCODER_WORKERS,
+    pipeline_depth=PIPELINE_DEPTH,
+    jpeg_encoder=JPEG_ENCODER,
+    buffer_ring=BUFFER_RING,
+    frame_policy=FRAME_POLICY,
+    video_codec=VIDEO_CODEC,
+    video_gop=VIDEO_GOP,
+    video_low_latency=VIDEO_LOW_LATENCY,
+    capture_process=CAPTURE_PROCESS,
+    capture_ring_slots=CAPTURE_RING_SLOTS,
+    capture_slot_mb=CAPTURE_SLOT_MB
+), socketio, fanout, metrics, latency_tracker)
+monitor_registry = streamer.registry
+audio = LoopbackAudio(fanout, metrics, AUDIO_CHUNK, AUDIO_RING_MS, AUDIO_BATCH, AUDIO_CODEC, OPUS_BITRATE, OPUS_FRAME_MS,
+                      BINARY_TRANSPORT)
 
 @app.route('/')
 def index():
@@ -41,167 +120,30 @@ def index():
 def test():
     return render_template("test.html")
 
-def get_loopback_device(p):
-    """Get the WASAPI loopback device for system audio capture"""
-    try:
-        wasapi_info = p.get_host_api_info_by_type(pyaudio.paWASAPI)
-        default_speakers = p.get_device_info_by_index(wasapi_info["defaultOutputDevice"])
-        
-        if not default_speakers["isLoopbackDevice"]:
-            for loopback in p.get_loopback_device_info_generator():
-                if default_speakers["name"] in loopback["name"]:
-                    print(f"🎤 Found loopback: {loopback['name']}")
-                    return loopback
-        return default_speakers
-    except Exception as e:
-        print(f"❌ Error getting loopback device: {e}")
-        return None
+@app.route('/stats')
+def stats():
+    """Per-monitor send queues, idle-frame suppression, encoder pipeline and adaptive settings"""
+    return jsonify({
+        "clients": connected_clients,
+        "encoder": streamer.encoder.name,
+        "fanout": fanout.stats(),
+        "monitors": monitor_registry.stats(),
+        "latency": latency_tracker.stats(),
+        "audio": audio.stats(),
+        "metrics": metrics.snapshot()
+    })
 
-def capture_audio():
-    """Capture system audio using WASAPI loopback - Non-blocking"""
-    global is_streaming
-    p = pyaudio.PyAudio()
-    stream = None
-    
-    try:
-        loopback = get_loopback_device(p)
-        if not loopback:
-            print("❌ No loopback device found!")
-            return
-        
-        # Use system's native sample rate
-        rate = int(loopback["defaultSampleRate"])
-        channels = int(loopback["maxInputChannels"])
-        
-        print(f"🎵 Audio config: {rate}Hz, {channels}ch, chunk={AUDIO_CHUNK}")
-        
-        # Open audio stream with error handling
-        stream = p.open(
-            format=AUDIO_FORMAT,
-            channels=channels,
-            rate=rate,
-            input=True,
-            input_device_index=loopback["index"],
-            frames_per_buffer=AUDIO_CHUNK,
-            stream_callback=None  # Use blocking mode for stability
-        )
-        
-        stream.start_stream()
-        print("✅ Audio capture started")
-        
-        consecutive_errors = 0
-        max_errors = 10
-        
-        # Calculate precise timing for smooth audio
-        chunk_duration = AUDIO_CHUNK / rate  # Duration of each chunk in seconds
-        
-        while is_streaming and consecutive_errors < max_errors:
-            try:
-                chunk_start = time.time()
-                
-                # Non-blocking read with timeout
-                if stream.is_active():
-                    data = stream.read(AUDIO_CHUNK, exception_on_overflow=False)
-                    
-                    # Only encode and send if we have data
-                    if data and len(data) > 0:
-                        audio_b64 = base64.b64encode(data).decode('utf-8')
-                        
-                        # Emit in a thread-safe way
-                        with audio_lock:
-                            socketio.emit("audio", {
-                                "data": audio_b64,
-                                "rate": rate,
-                                "channels": channels
-                            }, namespace='/')
-                        
-                        consecutive_errors = 0  # Reset on success
-                    
-                    # Precise timing to prevent buffer underruns
-                    elapsed = time.time() - chunk_start
-                    sleep_time = max(0, chunk_duration - elapsed)
-                    if sleep_time > 0:
-                        time.sleep(sleep_time)
-                else:
-                    print("⚠️ Audio stream not active")
-                    break
-                    
-            except IOError as e:
-                consecutive_errors += 1
-                print(f"⚠️ Audio IO error ({consecutive_errors}/{max_errors}): {e}")
-                time.sleep(0.01)
-            except Exception as e:
-                consecutive_errors += 1
-                print(f"⚠️ Audio error ({consecutive_errors}/{max_errors}): {e}")
-                time.sleep(0.01)
-                
-    except Exception as e:
-        print(f"❌ Audio initialization error: {e}")
-    finally:
-        print("🛑 Stopping audio capture...")
-        if stream:
-            try:
-                stream.stop_stream()
-                stream.close()
-            except:
-                pass
-        p.terminate()
-        print("✅ Audio capture stopped")
+@app.route('/metrics')
+def prometheus_metrics():
+    """Stage timing histograms, bytes sent and queue depths for Prometheus"""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
-def stream_screen():
-    """Capture and stream screen - Non-blocking"""
-    global is_streaming
-    
-    try:
-        with mss.mss() as sct:
-            monitor = sct.monitors[1]
-            print(f"📺 Screen capture started: {monitor['width']}x{monitor['height']}")
-            
-            frame_count = 0
-            fps_time = time.time()
-            target_frame_time = 1.0 / 30  # 30 FPS target
-            
-            while is_streaming:
-                frame_start = time.time()
-                
-                try:
-                    # Capture screen
-                    frame = sct.grab(monitor)
-                    img_np = np.array(frame)
-                    img_np = img_np[:, :, :3][:, :, ::-1]  # BGRA -> RGB
-                    
-                    img = Image.fromarray(img_np)
-                    
-                    # Resize if needed
-                    if TARGET_WIDTH and img.width > TARGET_WIDTH:
-                        ratio = TARGET_WIDTH / img.width
-                        target_height = int(img.height * ratio)
-                        img = img.resize((TARGET_WIDTH, target_height), Image.LANCZOS)
-                    
-                    # Encode JPEG
-                    buffer = io.BytesIO()
-                    img.save(buffer, format="JPEG", quality=70, optimize=True)
-                    img_b64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
-                    
-                    # Emit to clients
-                    socketio.emit("frame", img_b64, namespace='/')
-                    
-                    frame_count += 1
-                    
-                    # Frame timing
-                    elapsed = time.time() - frame_start
-                    sleep_time = max(0, target_frame_time - elapsed)
-                    if sleep_time > 0:
-                        time.sleep(sleep_time)
-                    
-                except Exception as e:
-                    print(f"⚠️ Screen capture error: {e}")
-                    time.sleep(0.1)
-                    
-    except Exception as e:
-        print(f"❌ Screen streaming error: {e}")
-    finally:
-        print("✅ Screen capture stopped")
+metrics.gauge("client_queue_depth", "Frames waiting in a viewer's send queue", streamer.queue_depths)
+metrics.gauge("connected_clients", "Connected Socket.IO clients", lambda: [({}, connected_clients)])
+metrics.gauge("audio_buffer_depth_ms", "Audio queued in a viewer's jitter buffer",
+              lambda: [({'sid': sid}, depth) for sid, depth in latency_tracker.buffer_depths()])
+metrics.gauge("audio_capture_events", "Loopback ring overruns/underruns and PortAudio overflow/underflow flags",
+              lambda: [({'event': event}, count) for event, count in audio.events().items()])
 
 # Connection handlers
 @socketio.on("connect")
@@ -210,15 +152,17 @@ def on_connect():
     connected_clients += 1
     print(f"✅ Client connected (Total: {connected_clients})")
     
+    # Watching a monitor starts its capture thread if nobody else watches it yet
+    info = streamer.screen_info(DEFAULT_MONITOR)
+    monitor_registry.subscribe(request.sid, info['index'])
+    socketio.emit("screen_info", info, room=request.sid, namespace='/')
+    audio.join(request.sid)
+    
     if not is_streaming:
         is_streaming = True
         
-        # Start screen streaming in thread
-        screen_thread = threading.Thread(target=stream_screen, daemon=True)
-        screen_thread.start()
-        
         # Start audio streaming in separate thread
-        audio_thread = threading.Thread(target=capture_audio, daemon=True)
+        audio_thread = threading.Thread(target=audio.capture, args=(lambda: is_streaming,), daemon=True)
         audio_thread.start()
         
         print("🚀 Streaming started")
@@ -227,23 +171,93 @@ def on_connect():
 def on_disconnect():
     global connected_clients, is_streaming
     connected_clients -= 1
+    counters = monitor_registry.unsubscribe(request.sid)
+    latency_tracker.remove(request.sid)
+    audio.remove(request.sid)
     print(f"❌ Client disconnected (Remaining: {connected_clients})")
+    if counters:
+        print(f"   Frames sent: {counters['sent']}, dropped: {counters['dropped']}")
     
     if connected_clients <= 0:
         is_streaming = False
         connected_clients = 0
         print("🛑 All clients disconnected, stopping streams")
 
+@socketio.on("set_audio")
+def handle_set_audio(data=None):
+    """
+    Viewer's audio codec - "opus" once it knows it can decode it (WebCodecs), "pcm" otherwise -
+    and profile (AUDIO_PROFILES, e.g. "mono16" for a phone); either can be left out to keep it
+    """
+    audio.select(request.sid, data)
+
+@socketio.on("frame_ack")
+def handle_frame_ack():
+    """Viewer received a frame/tiles update - measures unacknowledged frames in flight"""
+    stream = monitor_registry.stream_of(request.sid)
+    if stream:
+        stream.broadcaster.ack(request.sid)
+
+@socketio.on("latency_ack")
+def handle_latency_ack(data=None):
+    """Viewer's receive/display times for a stamped payload - glass-to-glass latency"""
+    try:
+        latency_tracker.ack(request.sid, data or {})
+    except (AttributeError, KeyError, TypeError):
+        pass  # Malformed ack; latency is best effort
+
+@socketio.on("select_monitor")
+def handle_select_monitor(data=None):
+    """Switch the viewer to another monitor; a monitor nobody watches is not captured. Unknown indexes are ignored"""
+    try:
+        index = int(data.get('index'))
+    except (AttributeError, TypeError, ValueError):
+        return  # No usable index; stay on the current monitor
+    info = streamer.screen_info(index)  # Fresh layout, so a monitor plugged in since connecting is found
+    if info['index'] != index:
+        print(f"⚠️ Client asked for unknown monitor {index}")
+        return
+    monitor_registry.subscribe(request.sid, info['index'])
+    socketio.emit("screen_info", info, room=request.sid, namespace='/')
+    print(f"🖥️ Client switched to monitor {info['index']}")
+
+@socketio.on("set_viewport")
+def handle_set_viewport(data=None):
+    """Stream only the rectangle this viewer is zoomed into (null = whole monitor)"""
+    index, _ = monitor_registry.selection(request.sid)
+    info = streamer.screen_info(index or DEFAULT_MONITOR)
+    region = snap_viewport(info, data)
+    monitor_registry.subscribe(request.sid, info['index'], region)
+    info['viewport'] = relative_viewport(info, region)
+    socketio.emit("screen_info", info, room=request.sid, namespace='/')
+
+@socketio.on("audio_buffer")
+def handle_audio_buffer(data=None):
+    """Viewer's jitter buffer report: depth, target, underruns, drop/stretch and A/V offset"""
+    try:
+        latency_tracker.buffer(request.sid, data or {})
+    except (AttributeError, TypeError):
+        pass  # Malformed report; buffer stats are best effort
+
 @socketio.on("ping")
-def handle_ping():
-    """Keep connection alive"""
-    socketio.emit("pong", namespace='/')
+def handle_ping(data=None):
+    """Keep connection alive; echoes the probe so the viewer can measure RTT"""
+    data = data if isinstance(data, dict) else {}
+    if data.get('rtt') is not None:
+        try:
+            latency_tracker.rtt(request.sid, data['rtt'])
+        except (TypeError, ValueError):
+            pass  # Malformed probe; RTT is best effort
+    socketio.emit("pong", data, room=request.sid, namespace='/')
 
 if __name__ == "__main__":
+    if CAPTURE_PROCESS:
+        install_sigterm_handler()  # A terminated server takes its capture children and rings with it
+
     print("=" * 60)
     print("⚡ HostCast - Screen + Audio Share")
     print("=" * 60)
-    print("📡 Server: http://0.0.0.0:5000")
+    print(f"📡 Server: http://0.0.0.0:5000 ({ASYNC_MODE})")
     print("🌐 LAN: http://192.168.1.32:5000")
     print("=" * 60)
     
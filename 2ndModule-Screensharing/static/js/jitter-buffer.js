@@ -0,0 +1,164 @@
+/**
+ * HostCast - Audio Jitter Buffer (AudioWorklet)
+ * Plays timestamped audio chunks with an adaptive, bounded delay
+ *
+ * Chunks arrive as {type: "chunk", planes, rate, seq, t, recv}: Float32 planes
+ * at the capture rate, `t` = capture time of the first sample on the server's
+ * clock. Depth swings by a chunk as chunks arrive and play out, so the
+ * buffer steers its average depth: half a chunk plus a few times the measured
+ * arrival jitter. Above the target it plays slightly fast (far above it, it
+ * drops whole chunks); below it, slightly slow - no silence unless it runs dry.
+ */
+
+const MIN_TARGET_MS = 20;
+const MAX_TARGET_MS = 300;
+const JITTER_MULTIPLE = 3;  // Target = chunk / 2 + JITTER_MULTIPLE x jitter (+ cushion after underruns)
+const DEADBAND_MS = 10;  // Average depth within target +- this plays at normal speed
+const AVERAGE_SECONDS = 0.5;  // Time constant of the average depth
+const UNDERRUN_CUSHION_MS = 10;  // Added per underrun, decays by 1 ms per second
+const SPEED_UP = 1.03;  // Playback rate while too deep (pitch change is barely audible)
+const SLOW_DOWN = 0.97;  // Playback rate while too shallow
+const STATS_INTERVAL = 0.25;  // Seconds between stats messages
+
+class JitterBuffer extends AudioWorkletProcessor {
+    constructor() {
+        super();
+        this.queue = [];  // {planes, rate, seq, t, recv, pos, started}
+        this.playing = false;
+        this.jitter = 0;
+        this.lastTransit = null;
+        this.lastEnd = null;  // Capture time just after the newest queued sample
+        this.chunkMs = 0;
+        this.averageDepth = 0;
+        this.cushion = 0;
+        this.underruns = 0;
+        this.droppedMs = 0;
+        this.stretchedMs = 0;
+        this.gaps = 0;
+        this.nextStats = 0;
+        this.port.onmessage = (event) => this.onMessage(event.data);
+    }
+
+    onMessage(message) {
+        if (message.type === "reset") {
+            this.queue = [];
+            this.playing = false;
+            this.lastEnd = null;
+            this.lastTransit = null;
+            return;
+        }
+        const frames = message.planes[0].length;
+        const duration = frames * 1000 / message.rate;
+        if (this.lastEnd !== null) {
+            if (message.t + duration <= this.lastEnd) return;  // Stale or duplicate
+            if (message.t - this.lastEnd > Math.max(5, duration / 2)) this.gaps++;
+        }
+        this.lastEnd = message.t + duration;
+        this.chunkMs = duration;
+
+        // Interarrival jitter (RFC 3550): how much the transit time varies between chunks
+        const transit = currentTime * 1000 - message.t;
+        if (this.lastTransit !== null) {
+            this.jitter += (Math.abs(transit - this.lastTransit) - this.jitter) / 16;
+        }
+        this.lastTransit = transit;
+
+        message.pos = 0;
+        message.started = false;
+        this.queue.push(message);
+
+        // Hard bound on latency: drop the oldest chunks once far too deep
+        const target = this.target();
+        while (this.queue.length > 1 && this.depth() > target * 2 + this.chunkMs + 40) {
+            const dropped = this.queue.shift();
+            this.droppedMs += (dropped.planes[0].length - dropped.pos) * 1000 / dropped.rate;
+        }
+    }
+
+    target() {
+        const target = this.chunkMs / 2 + JITTER_MULTIPLE * this.jitter + this.cushion;
+        return Math.min(MAX_TARGET_MS, Math.max(MIN_TARGET_MS, target));
+    }
+
+    depth() {
+        return this.queue.reduce((total, chunk) => total + (chunk.planes[0].length - chunk.pos) * 1000 / chunk.rate, 0);
+    }
+
+    process(inputs, outputs) {
+        const output = outputs[0];
+        const length = output[0].length;
+        this.cushion = Math.max(0, this.cushion - length / sampleRate);
+
+        const depth = this.depth();
+        const target = this.target();
+        if (!this.playing && this.queue.length && depth >= target + this.chunkMs / 2) {
+            this.playing = true;
+            this.averageDepth = depth;
+        }
+        this.averageDepth += (depth - this.averageDepth) * Math.min(1, length / sampleRate / AVERAGE_SECONDS);
+
+        let speed = 1;
+        if (this.averageDepth > target + DEADBAND_MS) {
+            speed = SPEED_UP;
+        } else if (this.averageDepth < target - DEADBAND_MS) {
+            speed = SLOW_DOWN;
+        }
+
+        for (let i = 0; i < length && this.playing; i++) {
+            const chunk = this.queue[0];
+            if (!chunk) {
+                // Ran dry: silence until the target depth is back, with a little more margin
+                this.playing = false;
+                this.underruns++;
+                this.cushion += UNDERRUN_CUSHION_MS;
+                break;
+            }
+            if (!chunk.started) {
+                chunk.started = true;
+                if (chunk.seq !== undefined) {
+                    this.port.postMessage({ type: "played", seq: chunk.seq, t: chunk.t, recv: chunk.recv, time: currentTime + i / sampleRate });
+                }
+            }
+
+            // Linear interpolation also converts the capture rate to the context rate
+            const frames = chunk.planes[0].length;
+            const index = Math.floor(chunk.pos);
+            const fraction = chunk.pos - index;
+            const next = Math.min(index + 1, frames - 1);
+            for (let channel = 0; channel < output.length; channel++) {
+                const plane = chunk.planes[Math.min(channel, chunk.planes.length - 1)];
+                output[channel][i] = plane[index] + (plane[next] - plane[index]) * fraction;
+            }
+
+            const step = chunk.rate / sampleRate;
+            chunk.pos += step * speed;
+            if (speed > 1) this.droppedMs += step * (speed - 1) * 1000 / chunk.rate;
+            if (speed < 1) this.stretchedMs += step * (1 - speed) * 1000 / chunk.rate;
+            if (chunk.pos >= frames) {
+                this.queue.shift();
+                if (this.queue.length) this.queue[0].pos = chunk.pos - frames;
+            }
+        }
+
+        if (currentTime >= this.nextStats) {
+            this.nextStats = currentTime + STATS_INTERVAL;
+            const head = this.queue[0];
+            this.port.postMessage({
+                type: "stats",
+                depth_ms: this.depth(),
+                target_ms: target,
+                jitter_ms: this.jitter,
+                underruns: this.underruns,
+                dropped_ms: this.droppedMs,
+                stretched_ms: this.stretchedMs,
+                gaps: this.gaps,
+                // Capture time of the sample being played now, for A/V sync
+                t: head && this.playing ? head.t + head.pos * 1000 / head.rate : null,
+                time: currentTime
+            });
+        }
+        return true;
+    }
+}
+
+registerProcessor("jitter-buffer", JitterBuffer);
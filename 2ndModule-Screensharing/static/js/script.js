@@ -7,6 +7,7 @@ class HostCastClient {
     constructor() {
         // DOM Elements
         this.screenElement = document.getElementById("screen");
+        this.screenContext = this.screenElement.getContext("2d");
         this.loadingState = document.getElementById("loading-state");
         this.connectionStatus = document.getElementById("connection-status");
         this.streamStatus = document.getElementById("stream-status");
@@ -30,22 +31,66 @@ class HostCastClient {
         this.audioContext = null;
         this.isPlaying = true;
         
-        // Audio buffering for smooth playback
+        // Monitors on the host (from screen_info) and the one being watched
+        this.monitors = [];
+        this.monitorIndex = null;
+        
+        // Zoomed region of the monitor as fractions {x, y, width, height}; null = all of it.
+        // The server streams only this rectangle, so zooming in sharpens the picture.
+        this.viewport = null;
+        this.viewportTimer = null;
+        this.dragStart = null;
+        
+        // Frame/tile drawing (a full frame supersedes anything still queued)
+        this.drawQueue = [];
+        this.isDrawing = false;
+        
+        // Video mode (H.264/VP8 through Media Source Extensions), drawn onto the same canvas
+        this.video = null;
+        this.videoGen = null;
+        this.sourceBuffer = null;
+        this.videoQueue = [];
+        
+        // Audio buffering for smooth playback: an AudioWorklet jitter buffer where available
+        // (secure contexts), otherwise decoded chunks scheduled back to back
+        this.jitterNode = null;
         this.audioQueue = [];
         this.nextPlayTime = 0;
         this.isProcessingAudio = false;
+        this.audioBufferStats = null;
+        
+        // A/V sync: capture time of the audio being heard ({t, at} in performance.now() ms).
+        // Frames are held until the audio reaches their capture time, up to avSyncMaxMs.
+        this.audioClock = null;
+        this.avOffset = null;
+        this.avSyncMaxMs = 200;
+        
+        // Opus audio, decoded with WebCodecs (the server sends PCM until we ask for Opus)
+        this.opusDecoder = null;
+        this.opusFormat = null;  // "rate/channels" the decoder is configured for
+        this.opusTimestamp = 0;
+        this.opusStamps = new Map();
+        
+        // Glass-to-glass latency: capture stamps are echoed back with receive/display times
+        this.rtt = null;
+        this.lastAckTime = {};
+        this.lastAckSeq = {};
+        this.videoShown = null;
         
         // Initialize
         this.initSocket();
         this.initControls();
+        this.initZoom();
         this.startFPSCounter();
         this.startDataRateMonitor();
+        this.startLatencyProbe();
+        this.startAudioBufferReport();
     }
 
     initSocket() {
         console.log("Initializing HostCast connection...");
         
-        this.socket = io({
+        this.socket = io(window.HOSTCAST_NAMESPACE || "/", {
             transports: ["websocket", "polling"],
             reconnection: true,
             reconnectionDelay: 1000,
@@ -56,13 +101,62 @@ class HostCastClient {
         this.socket.on("connect", () => this.onConnect());
         this.socket.on("disconnect", () => this.onDisconnect());
         this.socket.on("connect_error", (error) => this.onConnectionError(error));
-        this.socket.on("frame", (data) => this.onFrame(data));
+        this.socket.on("frame", (data, stamp) => this.onFrame(data, stamp));
+        this.socket.on("tiles", (data) => this.onTiles(data));
+        this.socket.on("video", (update) => this.onVideo(update));
         this.socket.on("audio", (data) => this.onAudio(data));
+        this.socket.on("screen_info", (info) => this.onScreenInfo(info));
+        this.socket.on("pong", (probe) => {
+            if (probe && probe.t) this.rtt = performance.now() - probe.t;
+        });
+    }
+
+    startLatencyProbe() {
+        // Round trips let the server place our receive/display times on its own clock
+        setInterval(() => {
+            if (this.socket.connected) {
+                this.socket.emit("ping", { t: performance.now(), rtt: this.rtt });
+            }
+        }, 2000);
+    }
+
+    ackLatency(media, stamp, recv, shown) {
+        // At most a few acks per second, and never twice for a resent (idle heartbeat) frame
+        if (!stamp || stamp.seq === undefined || stamp.seq === this.lastAckSeq[media]) return;
+        const now = performance.now();
+        this.lastAckSeq[media] = stamp.seq;
+        if (now - (this.lastAckTime[media] || 0) < 250) return;
+        this.lastAckTime[media] = now;
+        this.socket.emit("latency_ack", {
+            media: media,
+            seq: stamp.seq,
+            t: stamp.t,
+            recv: recv,
+            shown: shown,
+            sent: now
+        });
+    }
+
+    onScreenInfo(info) {
+        this.monitors = info.monitors || [];
+        this.monitorIndex = info.index;
+        if (!this.viewportTimer) {
+            // Adopt the server's grid-snapped region unless a newer request is pending
+            this.viewport = info.viewport || null;
+        }
+        
+        const btnMonitor = document.getElementById("btn-monitor");
+        if (btnMonitor) {
+            btnMonitor.style.display = this.monitors.length > 1 ? "" : "none";
+            btnMonitor.setAttribute("data-tooltip", `Monitor ${info.index} of ${this.monitors.length}`);
+        }
+        console.log(`Watching monitor ${info.index}: ${info.width}x${info.height} at (${info.left}, ${info.top})`);
     }
 
     onConnect() {
         console.log("Connected to HostCast server");
         this.updateConnectionStatus("connected", "Connected");
+        this.requestAudio();
         
         // Initialize audio context on user interaction (required by browsers)
         document.addEventListener('click', () => {
@@ -72,6 +166,27 @@ class HostCastClient {
         }, { once: true });
     }
 
+    audioProfile() {
+        // ?audio=native|stereo48|mono24|mono16 picks one; otherwise phones and Data Saver get mono
+        const requested = new URLSearchParams(window.location.search).get("audio");
+        if (requested) return requested;
+        if (navigator.connection && navigator.connection.saveData) return "mono16";
+        if (window.matchMedia("(pointer: coarse)").matches && Math.min(screen.width, screen.height) < 600) return "mono24";
+        return "native";
+    }
+
+    requestAudio() {
+        // Opus is ~25x smaller than PCM; ask for it only if this browser can decode it
+        const profile = this.audioProfile();
+        if (!window.AudioDecoder) {
+            this.socket.emit("set_audio", { profile });
+            return;
+        }
+        AudioDecoder.isConfigSupported({ codec: "opus", sampleRate: 48000, numberOfChannels: 2 })
+            .then((support) => this.socket.emit("set_audio", { codec: support.supported ? "opus" : "pcm", profile }))
+            .catch(() => this.socket.emit("set_audio", { profile }));
+    }
+
     onDisconnect() {
         console.log("Disconnected from server");
         this.updateConnectionStatus("disconnected", "Disconnected");
@@ -83,13 +198,112 @@ class HostCastClient {
         this.updateConnectionStatus("disconnected", "Connection Error");
     }
 
-    onFrame(data) {
+    onFrame(data, stamp) {
         const now = performance.now();
         
-        this.screenElement.src = "data:image/jpeg;base64," + data;
-        this.screenElement.classList.add("active");
+        this.enqueueDraw({ frame: this.frameBlob(data), stamp: stamp, recv: now, due: now + this.avHold(stamp, now) });
+        this.countFrame(now, this.payloadSize(data));
+    }
+
+    onTiles(update) {
+        // Tiles are deltas - composite them onto the last full frame
+        const tiles = update.tiles.map((tile) => ({
+            x: tile.x,
+            y: tile.y,
+            blob: this.frameBlob(tile.data)
+        }));
+        const now = performance.now();
+        this.enqueueDraw({ tiles: tiles, width: update.width, height: update.height, stamp: update, recv: now, due: now + this.avHold(update, now) });
+        
+        const bytes = update.tiles.reduce((sum, tile) => sum + this.payloadSize(tile.data), 0);
+        this.countFrame(performance.now(), bytes);
+    }
+
+    onVideo(update) {
+        // A new generation (new stream size) needs a fresh player, started from
+        // a keyframe fragment - those carry the init segment
+        if (update.gen !== this.videoGen) {
+            if (!update.init || !window.MediaSource || !MediaSource.isTypeSupported(update.mime)) return;
+            this.startVideo(update);
+        }
+        this.videoQueue.push(this.payloadBytes(update.data));
+        this.videoShown = { stamp: update, recv: performance.now() };  // Acked when the next video frame is painted
+        this.flushVideo();
+        this.countFrame(performance.now(), this.payloadSize(update.data));
+    }
+
+    startVideo(update) {
+        if (!this.video) {
+            this.video = document.createElement("video");
+            this.video.muted = true;
+            this.video.playsInline = true;
+            this.drawVideo();
+        } else {
+            URL.revokeObjectURL(this.video.src);
+        }
+        
+        const mediaSource = new MediaSource();
+        this.videoGen = update.gen;
+        this.videoQueue = [this.payloadBytes(update.init)];
+        this.sourceBuffer = null;
+        mediaSource.addEventListener("sourceopen", () => {
+            this.sourceBuffer = mediaSource.addSourceBuffer(update.mime);
+            this.sourceBuffer.addEventListener("updateend", () => this.flushVideo());
+            this.flushVideo();
+            this.video.play().catch(() => {});
+        }, { once: true });
+        this.video.src = URL.createObjectURL(mediaSource);
+        console.log(`Video stream: ${update.mime}`);
+    }
+
+    flushVideo() {
+        const buffer = this.sourceBuffer;
+        if (!buffer || buffer.updating) return;
+        
+        try {
+            if (this.videoQueue.length > 0) {
+                buffer.appendBuffer(this.videoQueue.shift());
+            } else if (buffer.buffered.length && buffer.buffered.start(0) < this.video.currentTime - 10) {
+                buffer.remove(0, this.video.currentTime - 5);  // Keep the buffer small
+            }
+        } catch (error) {
+            console.warn("Video append error:", error);
+            this.videoGen = null;  // Restart at the next keyframe
+            return;
+        }
+        
+        // Stay at the live edge rather than playing through a backlog
+        if (buffer.buffered.length) {
+            const end = buffer.buffered.end(buffer.buffered.length - 1);
+            if (end - this.video.currentTime > 0.3) {
+                this.video.currentTime = end - 0.05;
+            }
+        }
+    }
+
+    drawVideo() {
+        const video = this.video;
+        if (video.videoWidth && this.isPlaying) {
+            this.resizeScreen(video.videoWidth, video.videoHeight);
+            this.screenContext.drawImage(video, 0, 0);
+            if (this.videoShown) {
+                this.ackLatency("frame", this.videoShown.stamp, this.videoShown.recv, performance.now());
+                this.videoShown = null;
+            }
+        }
+        if (video.requestVideoFrameCallback) {
+            video.requestVideoFrameCallback(() => this.drawVideo());
+        } else {
+            requestAnimationFrame(() => this.drawVideo());
+        }
+    }
+
+    countFrame(now, bytes) {
+        // Lets the server measure frames in flight for adaptive quality
+        this.socket.emit("frame_ack");
         
         if (this.videoFrameCount === 0) {
+            this.screenElement.classList.add("active");
             this.loadingState.classList.add("hidden");
             this.updateStreamStatus("Streaming", "#10b981");
             console.log("Stream started");
@@ -97,7 +311,7 @@ class HostCastClient {
         
         this.videoFrameCount++;
         this.fpsFrames++;
-        this.totalDataReceived += data.length;
+        this.totalDataReceived += bytes;
         
         if (this.statVideoFrames) {
             this.statVideoFrames.textContent = this.formatNumber(this.videoFrameCount);
@@ -112,11 +326,182 @@ class HostCastClient {
         this.lastFrameTime = now;
     }
 
+    payloadBytes(data) {
+        // Binary transport delivers an ArrayBuffer, legacy servers a base64 string
+        return typeof data === "string" ? this.base64ToBytes(data) : data;
+    }
+
+    frameBlob(data) {
+        return new Blob([this.payloadBytes(data)], { type: "image/jpeg" });
+    }
+
+    enqueueDraw(update) {
+        if (update.frame) {
+            // A full frame supersedes whatever is already due (frames held for A/V sync stay)
+            const now = performance.now();
+            this.drawQueue = this.drawQueue.filter((queued) => queued.due > now);
+        }
+        this.drawQueue.push(update);
+        
+        if (!this.isDrawing) {
+            this.processDrawQueue();
+        }
+    }
+
+    async processDrawQueue() {
+        this.isDrawing = true;
+        
+        while (this.drawQueue.length > 0) {
+            const wait = this.drawQueue[0].due - performance.now();
+            if (wait > 0) {
+                await new Promise((resolve) => setTimeout(resolve, wait));
+                continue;
+            }
+            const update = this.drawQueue.shift();
+            try {
+                if (update.frame) {
+                    const bitmap = await createImageBitmap(update.frame);
+                    this.resizeScreen(bitmap.width, bitmap.height);
+                    this.screenContext.drawImage(bitmap, 0, 0);
+                    bitmap.close();
+                    this.frameShown(update.stamp, update.recv);
+                } else {
+                    // Decode all tiles in parallel, then paint them in one go
+                    const bitmaps = await Promise.all(update.tiles.map((tile) => createImageBitmap(tile.blob)));
+                    this.resizeScreen(update.width, update.height);
+                    bitmaps.forEach((bitmap, i) => {
+                        this.screenContext.drawImage(bitmap, update.tiles[i].x, update.tiles[i].y);
+                        bitmap.close();
+                    });
+                    this.frameShown(update.stamp, update.recv);
+                }
+            } catch (error) {
+                console.warn("Frame decode error:", error);
+            }
+        }
+        
+        this.isDrawing = false;
+    }
+
+    frameShown(stamp, recv) {
+        const now = performance.now();
+        this.ackLatency("frame", stamp, recv, now);
+        const heard = this.audioPlayoutTime(now);
+        if (stamp && stamp.t !== undefined && heard !== null) {
+            this.avOffset = stamp.t - heard;  // > 0: the picture is ahead of the sound
+        }
+    }
+
+    avHold(stamp, now) {
+        // Show the frame when the audio reaches its capture time - if audio is playing
+        const heard = this.audioPlayoutTime(now);
+        if (!stamp || stamp.t === undefined || heard === null) return 0;
+        return Math.min(this.avSyncMaxMs, Math.max(0, stamp.t - heard));
+    }
+
+    audioPlayoutTime(now) {
+        // Capture time of the audio coming out of the speakers now; null when nothing is playing
+        const clock = this.audioClock;
+        if (!clock || !this.audioContext || this.audioContext.state !== "running" || now - clock.at > 1000) return null;
+        return clock.t + (now - clock.at);
+    }
+
+    initZoom() {
+        const screen = this.screenElement;
+        
+        // Wheel zooms around the pointer
+        screen.addEventListener("wheel", (e) => {
+            e.preventDefault();
+            const point = this.pointerFraction(e);
+            const view = this.viewport || { x: 0, y: 0, width: 1, height: 1 };
+            const scale = e.deltaY < 0 ? 0.8 : 1.25;
+            const width = Math.min(1, Math.max(0.1, view.width * scale));
+            const height = Math.min(1, Math.max(0.1, view.height * scale));
+            this.setViewport({
+                x: view.x + point.x * (view.width - width),
+                y: view.y + point.y * (view.height - height),
+                width: width,
+                height: height
+            });
+        }, { passive: false });
+        
+        // Drag pans while zoomed in, double-click shows the whole monitor again
+        screen.addEventListener("mousedown", (e) => {
+            if (this.viewport) {
+                this.dragStart = { point: this.pointerFraction(e), view: this.viewport };
+            }
+        });
+        window.addEventListener("mousemove", (e) => {
+            if (!this.dragStart) return;
+            const point = this.pointerFraction(e);
+            const view = this.dragStart.view;
+            this.setViewport({
+                x: view.x - (point.x - this.dragStart.point.x) * view.width,
+                y: view.y - (point.y - this.dragStart.point.y) * view.height,
+                width: view.width,
+                height: view.height
+            });
+        });
+        window.addEventListener("mouseup", () => {
+            this.dragStart = null;
+        });
+        screen.addEventListener("dblclick", () => this.setViewport(null));
+    }
+
+    pointerFraction(e) {
+        const rect = this.screenElement.getBoundingClientRect();
+        return {
+            x: (e.clientX - rect.left) / rect.width,
+            y: (e.clientY - rect.top) / rect.height
+        };
+    }
+
+    setViewport(view) {
+        if (view && view.width >= 1 && view.height >= 1) {
+            view = null;
+        }
+        if (view) {
+            view.x = Math.min(Math.max(0, view.x), 1 - view.width);
+            view.y = Math.min(Math.max(0, view.y), 1 - view.height);
+        }
+        this.viewport = view;
+        
+        // Wheel and drag fire rapidly - only ask for the region once they settle
+        clearTimeout(this.viewportTimer);
+        this.viewportTimer = setTimeout(() => {
+            this.viewportTimer = null;
+            this.socket.emit("set_viewport", this.viewport);
+        }, 250);
+    }
+
+    resizeScreen(width, height) {
+        if (this.screenElement.width !== width || this.screenElement.height !== height) {
+            this.screenElement.width = width;
+            this.screenElement.height = height;
+        }
+    }
+
+    base64ToBytes(b64) {
+        const binaryString = atob(b64);
+        const bytes = new Uint8Array(binaryString.length);
+        for (let i = 0; i < binaryString.length; i++) {
+            bytes[i] = binaryString.charCodeAt(i);
+        }
+        return bytes;
+    }
+
+    payloadSize(data) {
+        return typeof data === "string" ? data.length : data.byteLength;
+    }
+
     onAudio(audioData) {
         if (!this.isPlaying) return;
         
         this.audioPacketCount++;
-        this.totalDataReceived += audioData.data.length;
+        audioData.recv = performance.now();
+        this.totalDataReceived += audioData.packets
+            ? audioData.packets.reduce((total, packet) => total + this.payloadSize(packet), 0)
+            : this.payloadSize(audioData.data);
         
         if (this.statAudioPackets) {
             this.statAudioPackets.textContent = this.formatNumber(this.audioPacketCount);
@@ -134,23 +519,155 @@ class HostCastClient {
         
         // Add to queue for scheduled playback
         if (this.audioContext && this.audioContext.state === "running") {
-            this.audioQueue.push(audioData);
-            
-            // Start processing queue if not already running
-            if (!this.isProcessingAudio) {
-                this.processAudioQueue();
+            if (audioData.codec === "opus") {
+                this.decodeOpus(audioData);  // Decoded chunks are played from the decoder's output
+                return;
             }
+            this.playChunk(this.pcmToPlanes(audioData), audioData.rate, audioData);
         } else if (this.audioPacketCount === 1) {
             console.warn("Audio context not running. Click anywhere to enable audio.");
         }
     }
 
+    queueAudio(item) {
+        this.audioQueue.push(item);
+        
+        // Start processing queue if not already running
+        if (!this.isProcessingAudio) {
+            this.processAudioQueue();
+        }
+    }
+
+    decodeOpus(audioData) {
+        if (!this.opusDecoder || this.opusFormat !== `${audioData.rate}/${audioData.channels}`) {
+            if (this.opusDecoder && this.opusDecoder.state !== "closed") this.opusDecoder.close();
+            this.opusDecoder = new AudioDecoder({
+                output: (decoded) => this.onOpusDecoded(decoded),
+                error: (error) => {
+                    console.warn("Opus decode error:", error);
+                    this.opusDecoder = null;
+                }
+            });
+            this.opusDecoder.configure({
+                codec: "opus",
+                sampleRate: audioData.rate,
+                numberOfChannels: audioData.channels
+            });
+            this.opusFormat = `${audioData.rate}/${audioData.channels}`;
+            this.opusStamps.clear();
+        }
+        
+        // Chunk timestamps only pair decoded output with its capture stamp; packets follow
+        // each other every frame_ms, and only the first one is acked
+        audioData.packets.forEach((packet, i) => {
+            this.opusStamps.set(this.opusTimestamp, {
+                seq: i === 0 ? audioData.seq : undefined,
+                t: audioData.t + i * audioData.frame_ms,
+                recv: audioData.recv
+            });
+            this.opusDecoder.decode(new EncodedAudioChunk({
+                type: "key",
+                timestamp: this.opusTimestamp,
+                data: typeof packet === "string" ? this.base64ToBytes(packet) : packet
+            }));
+            this.opusTimestamp += audioData.frame_ms * 1000;
+        });
+    }
+
+    onOpusDecoded(decoded) {
+        try {
+            const planes = [];
+            for (let channel = 0; channel < decoded.numberOfChannels; channel++) {
+                const plane = new Float32Array(decoded.numberOfFrames);
+                decoded.copyTo(plane, { planeIndex: channel, format: "f32-planar" });
+                planes.push(plane);
+            }
+            const stamp = this.opusStamps.get(decoded.timestamp);
+            this.opusStamps.delete(decoded.timestamp);
+            if (stamp) this.playChunk(planes, decoded.sampleRate, stamp);
+        } finally {
+            decoded.close();
+        }
+    }
+
+    playChunk(planes, rate, stamp) {
+        if (this.jitterNode) {
+            this.jitterNode.port.postMessage({
+                type: "chunk",
+                planes: planes,
+                rate: rate,
+                seq: stamp.seq,
+                t: stamp.t,
+                recv: stamp.recv
+            }, planes.map((plane) => plane.buffer));
+            return;
+        }
+        const buffer = this.audioContext.createBuffer(planes.length, planes[0].length, rate);
+        planes.forEach((plane, channel) => buffer.copyToChannel(plane, channel));
+        this.queueAudio({ buffer: buffer, stamp: stamp });
+    }
+
+    initJitterBuffer() {
+        // AudioWorklet only exists in secure contexts (https, localhost)
+        const url = window.HOSTCAST_JITTER_WORKLET;
+        if (!url || !this.audioContext.audioWorklet || !window.AudioWorkletNode) return;
+        this.audioContext.audioWorklet.addModule(url).then(() => {
+            this.jitterNode = new AudioWorkletNode(this.audioContext, "jitter-buffer", { outputChannelCount: [2] });
+            this.jitterNode.port.onmessage = (event) => this.onJitterMessage(event.data);
+            this.jitterNode.connect(this.audioContext.destination);
+            console.log("Audio jitter buffer ready");
+        }).catch((error) => console.warn("Jitter buffer unavailable, scheduling buffers instead:", error));
+    }
+
+    onJitterMessage(message) {
+        if (message.type === "played") {
+            // Audio is "displayed" when the chunk's first sample reaches the speakers
+            this.ackLatency("audio", message, message.recv, this.contextToPerformance(message.time));
+        } else if (message.type === "stats") {
+            this.audioBufferStats = message;
+            if (message.t !== null) {
+                this.audioClock = { t: message.t, at: this.contextToPerformance(message.time) };
+            }
+        }
+    }
+
+    contextToPerformance(time) {
+        // Audio clock -> performance.now(), including output latency where the browser reports it
+        const stamp = this.audioContext.getOutputTimestamp ? this.audioContext.getOutputTimestamp() : null;
+        if (stamp && stamp.performanceTime) {
+            return stamp.performanceTime + (time - stamp.contextTime) * 1000;
+        }
+        return performance.now() + (time - this.audioContext.currentTime) * 1000;
+    }
+
+    startAudioBufferReport() {
+        // Depth, target and A/V offset go back to the server for /stats and /metrics
+        setInterval(() => {
+            if (!this.socket.connected || !this.audioContext || this.audioContext.state !== "running") return;
+            const stats = this.audioBufferStats;
+            const report = stats
+                ? {
+                    depth_ms: stats.depth_ms,
+                    target_ms: stats.target_ms,
+                    jitter_ms: stats.jitter_ms,
+                    underruns: stats.underruns,
+                    dropped_ms: stats.dropped_ms,
+                    stretched_ms: stats.stretched_ms,
+                    gaps: stats.gaps
+                }
+                : { depth_ms: Math.max(0, (this.nextPlayTime - this.audioContext.currentTime) * 1000) };
+            if (this.avOffset !== null) report.av_offset_ms = this.avOffset;
+            this.socket.emit("audio_buffer", report);
+        }, 1000);
+    }
+
     initAudioContext() {
         if (this.audioContext) return;
         
         try {
             this.audioContext = new (window.AudioContext || window.webkitAudioContext)();
             this.nextPlayTime = this.audioContext.currentTime;
+            this.initJitterBuffer();
             console.log("Audio context initialized - State:", this.audioContext.state);
             
             // Force resume if suspended
@@ -174,35 +691,7 @@ class HostCastClient {
         const audioData = this.audioQueue.shift();
         
         try {
-            // Decode base64 to binary
-            const binaryString = atob(audioData.data);
-            const bytes = new Uint8Array(binaryString.length);
-            for (let i = 0; i < binaryString.length; i++) {
-                bytes[i] = binaryString.charCodeAt(i);
-            }
-            
-            // Convert Int16 to Float32
-            const int16Array = new Int16Array(bytes.buffer);
-            const float32Array = new Float32Array(int16Array.length);
-            for (let i = 0; i < int16Array.length; i++) {
-                float32Array[i] = int16Array[i] / 32768.0;
-            }
-            
-            // Create audio buffer
-            const numFrames = float32Array.length / audioData.channels;
-            const audioBuffer = this.audioContext.createBuffer(
-                audioData.channels,
-                numFrames,
-                audioData.rate
-            );
-            
-            // Fill audio buffer (interleaved to planar)
-            for (let channel = 0; channel < audioData.channels; channel++) {
-                const channelData = audioBuffer.getChannelData(channel);
-                for (let i = 0; i < numFrames; i++) {
-                    channelData[i] = float32Array[i * audioData.channels + channel];
-                }
-            }
+            const audioBuffer = audioData.buffer;
             
             // Calculate when to play this chunk
             const currentTime = this.audioContext.currentTime;
@@ -218,6 +707,11 @@ class HostCastClient {
             source.connect(this.audioContext.destination);
             source.start(this.nextPlayTime);
             
+            // Audio is "displayed" when its scheduled playout starts
+            const playout = performance.now() + (this.nextPlayTime - currentTime) * 1000;
+            this.ackLatency("audio", audioData.stamp, audioData.stamp.recv, playout);
+            this.audioClock = { t: audioData.stamp.t, at: playout };
+            
             // Update next play time
             const chunkDuration = audioBuffer.duration;
             this.nextPlayTime += chunkDuration;
@@ -236,6 +730,26 @@ class HostCastClient {
         }
     }
 
+    pcmToPlanes(audioData) {
+        // Binary transport delivers an ArrayBuffer, legacy servers a base64 string
+        const raw = typeof audioData.data === "string"
+            ? this.base64ToBytes(audioData.data).buffer
+            : audioData.data;
+        const int16Array = new Int16Array(raw);
+        
+        // Int16 interleaved to Float32 planar; surround keeps its front left/right pair
+        const numFrames = Math.floor(int16Array.length / audioData.channels);
+        const planes = [];
+        for (let channel = 0; channel < Math.min(2, audioData.channels); channel++) {
+            const plane = new Float32Array(numFrames);
+            for (let i = 0; i < numFrames; i++) {
+                plane[i] = int16Array[i * audioData.channels + channel] / 32768.0;
+            }
+            planes.push(plane);
+        }
+        return planes;
+    }
+
     updateConnectionStatus(status, text) {
         const statusDot = this.connectionStatus.querySelector(".status-dot");
         const statusText = this.connectionStatus.querySelector(".status-text");
@@ -314,6 +828,7 @@ class HostCastClient {
                 if (this.audioContext) {
                     if (this.audioContext.state === "suspended") {
                         this.audioContext.resume();
+                        if (this.jitterNode) this.jitterNode.port.postMessage({ type: "reset" });
                         console.log("Audio unmuted");
                     } else {
                         this.audioContext.suspend();
@@ -354,6 +869,17 @@ class HostCastClient {
             });
         }
 
+        const btnMonitor = document.getElementById("btn-monitor");
+        if (btnMonitor) {
+            btnMonitor.addEventListener("click", () => {
+                if (this.monitors.length < 2) return;
+                // Cycle to the next monitor; the server only captures watched ones
+                const current = this.monitors.findIndex((m) => m.index === this.monitorIndex);
+                const next = this.monitors[(current + 1) % this.monitors.length];
+                this.socket.emit("select_monitor", { index: next.index });
+            });
+        }
+
         const btnSettings = document.getElementById("btn-settings");
         if (btnSettings) {
             btnSettings.addEventListener("click", () => {
@@ -2,358 +2,194 @@
 HostCast Module 3 - Remote Desktop Control
 Full screen sharing + audio + remote control (mouse & keyboard)
 """
-import base64
-import io
-import time
+import os
+import sys
 import threading
-from flask import Flask, render_template, request
+
+# The engine helpers live in the shared hostcast package at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, Response, render_template, request, jsonify
 from flask_socketio import SocketIO, emit
-from PIL import Image
-import mss
-import numpy as np
-import pyaudiowpatch as pyaudio
 import pyautogui
-from pynput import mouse, keyboard as pynput_keyboard
+from hostcast.metrics import Metrics
+from hostcast.latency import LatencyTracker, LATENCY_BUCKETS
+from hostcast.cursor import CursorSampler, CursorOverlay
+from hostcast.monitors import snap_viewport, relative_viewport
+from hostcast.capture_process import install_sigterm_handler
+from hostcast.streaming import StreamConfig, ScreenStreamer
+from hostcast.audio import LoopbackAudio
+from hostcast.remote_input import RemoteInput
+from hostcast.fanout import create_fanout
+
+# Server mode: "threading" (an OS thread per connection and per viewer sender), or
+# "eventlet"/"gevent" to serve many viewers from one event loop. Capture, encode,
+# audio and cursor sampling run in OS threads either way - nothing is monkey-patched.
+ASYNC_MODE = "threading"
 
 # Flask + SocketIO setup
 app = Flask(__name__)
 socketio = SocketIO(
     app, 
     cors_allowed_origins="*", 
-    async_mode="threading",
+    async_mode=ASYNC_MODE,
     ping_timeout=60,
     ping_interval=25,
     max_http_buffer_size=10**8,
     logger=False,
     engineio_logger=False
 )
+fanout = create_fanout(socketio, ASYNC_MODE)  # Hands frames, audio and cursor events from capture threads to the senders
 
 # Configuration
 TARGET_WIDTH = 1280
 AUDIO_CHUNK = 2048
-AUDIO_FORMAT = pyaudio.paInt16
+AUDIO_RING_MS = 1000  # Loopback audio held while the sender is stalled (older audio is overwritten and counted)
+AUDIO_BATCH = 4  # Most AUDIO_CHUNK periods sent in one payload after the sender falls behind
 AUDIO_RATE = 48000
+FRAME_QUEUE_SIZE = 4  # Frames buffered per viewer before the oldest is dropped (>= PIPELINE_DEPTH)
+BINARY_TRANSPORT = True  # Send frame/audio bytes as binary attachments (False = base64 for old clients)
+TILE_MODE = False  # Send only changed tiles between periodic keyframes
+TILE_SIZE = 64  # Tile edge in output pixels
+KEYFRAME_INTERVAL = 90  # Frames between full keyframes in tile mode
+IDLE_DETECTION = True  # Skip resize/encode/emit while the screen is unchanged
+IDLE_SAMPLE_STEP = 4  # Checksum every Nth row (rotating, so all rows are covered)
+IDLE_HEARTBEAT = 1.0  # Seconds between resends of the last frame while idle
+ENCODER_WORKERS = 2  # Frames encoded in parallel (Pillow releases the GIL)
+PIPELINE_DEPTH = 4  # Frames in flight between capture and send before capture waits
+JPEG_QUALITY = 70  # Starting JPEG quality
+JPEG_ENCODER = "auto"  # "auto", "simplejpeg", "turbojpeg" or "pillow"
+BUFFER_RING = False  # Reuse preallocated capture/scale/output buffers instead of allocating per frame
+TARGET_FPS = 30  # Starting frame rate
+ADAPTIVE_STREAM = True  # Adjust quality/width/FPS to encoder load and viewer backpressure
+QUALITY_RANGE = (35, 85)
+WIDTH_RANGE = (640, 1920)
+FPS_RANGE = (10, 30)
+DEFAULT_MONITOR = 1  # Monitor new viewers watch and control first (mss index, 1 = primary)
+METRICS = True  # Stage timings, bytes sent and queue depths on /metrics and /stats
+FRAME_POLICY = "skip"  # After an overrun: "skip" missed frames or "catchup" with back-to-back frames
+VIDEO_CODEC = None  # None = JPEG frames; "h264" or "vp8" = inter-frame video via PyAV, played through MSE
+VIDEO_GOP = 120  # Frames between scheduled keyframes (joining viewers get one immediately)
+VIDEO_LOW_LATENCY = True  # zerolatency/realtime tuning: no B-frames, no lookahead
+CAPTURE_PROCESS = False  # Grab and encode in a child process so input and sockets never wait on its GIL (JPEG frames only)
+CAPTURE_RING_SLOTS = 8  # Encoded frames the shared-memory ring holds between the processes
+CAPTURE_SLOT_MB = 4  # Largest encoded frame a ring slot fits (bigger ones are dropped and counted)
+AUDIO_CODEC = "opus"  # "opus" = Opus via PyAV for browsers with WebCodecs (the rest still get PCM); "pcm" = raw PCM16 only
+OPUS_BITRATE = 64000  # Opus bits/s for the whole stream (48 kHz stereo PCM16 is 1536 kbit/s)
+OPUS_FRAME_MS = 20  # Opus frame size: 2.5, 5, 10, 20, 40 or 60 ms (adds at most one frame of delay)
+CURSOR_RATE = 60  # Host pointer samples per second, sent apart from the frames
 
 # Global state
 is_streaming = False
-audio_lock = threading.Lock()
 connected_clients = 0
 control_enabled = {}
-screen_dimensions = {'width': 1920, 'height': 1080}
+metrics = Metrics(enabled=METRICS)
+latency_tracker = LatencyTracker(
+    metrics.histogram("capture_to_receive_seconds", "Capture to arrival at the viewer", "media", LATENCY_BUCKETS),
+    metrics.histogram("capture_to_display_seconds", "Capture to display (or audio playout) at the viewer", "media", LATENCY_BUCKETS)
+)
+# Capture/encode/send per watched monitor - the same code modules 2 and 5 run
+streamer = ScreenStreamer(StreamConfig(
+    target_width=TARGET_WIDTH,
+    target_fps=TARGET_FPS,
+    jpeg_quality=JPEG_QUALITY,
+    quality_range=QUALITY_RANGE,
+    width_range=WIDTH_RANGE,
+    fps_range=FPS_RANGE,
+    adaptive=ADAPTIVE_STREAM,
+    frame_queue_size=FRAME_QUEUE_SIZE,
+    binary_transport=BINARY_TRANSPORT,
+    tile_mode=TILE_MODE,
+    tile_size=TILE_SIZE,
+    keyframe_interval=KEYFRAME_INTERVAL,
+    idle_detection=IDLE_DETECTION,
+    idle_sample_step=IDLE_SAMPLE_STEP,
+    idle_heartbeat=IDLE_HEARTBEAT,
+    encoder_workers=ENCODER_WORKERS,
+    pipeline_depth=PIPELINE_DEPTH,
+    jpeg_encoder=JPEG_ENCODER,
+    buffer_ring=BUFFER_RING,
+    frame_policy=FRAME_POLICY,
+    video_codec=VIDEO_CODEC,
+    video_gop=VIDEO_GOP,
+    video_low_latency=VIDEO_LOW_LATENCY,
+    capture_process=CAPTURE_PROCESS,
+    capture_ring_slots=CAPTURE_RING_SLOTS,
+    capture_slot_mb=CAPTURE_SLOT_MB
+), socketio, fanout, metrics, latency_tracker)
+monitor_registry = streamer.registry
+monitor_layout = streamer.layout  # mss index -> {'left', 'top', 'width', 'height'}, refreshed on connect/switch
+audio = LoopbackAudio(fanout, metrics, AUDIO_CHUNK, AUDIO_RING_MS, AUDIO_BATCH, AUDIO_CODEC, OPUS_BITRATE, OPUS_FRAME_MS,
+                      BINARY_TRANSPORT)
 
 # PyAutoGUI settings for faster response
 pyautogui.FAILSAFE = False
 pyautogui.PAUSE = 0
 pyautogui.MINIMUM_DURATION = 0
 
-# Mouse and keyboard controllers
-mouse_controller = mouse.Controller()
-keyboard_controller = pynput_keyboard.Controller()
-
-# Keyboard key mapping
-KEY_MAP = {
-    'Backspace': pynput_keyboard.Key.backspace,
-    'Tab': pynput_keyboard.Key.tab,
-    'Enter': pynput_keyboard.Key.enter,
-    'Shift': pynput_keyboard.Key.shift,
-    'Control': pynput_keyboard.Key.ctrl,
-    'Alt': pynput_keyboard.Key.alt,
-    'Pause': pynput_keyboard.Key.pause,
-    'CapsLock': pynput_keyboard.Key.caps_lock,
-    'Escape': pynput_keyboard.Key.esc,
-    ' ': pynput_keyboard.Key.space,
-    'PageUp': pynput_keyboard.Key.page_up,
-    'PageDown': pynput_keyboard.Key.page_down,
-    'End': pynput_keyboard.Key.end,
-    'Home': pynput_keyboard.Key.home,
-    'ArrowLeft': pynput_keyboard.Key.left,
-    'ArrowUp': pynput_keyboard.Key.up,
-    'ArrowRight': pynput_keyboard.Key.right,
-    'ArrowDown': pynput_keyboard.Key.down,
-    'Insert': pynput_keyboard.Key.insert,
-    'Delete': pynput_keyboard.Key.delete,
-    'Meta': pynput_keyboard.Key.cmd,
-    'ContextMenu': pynput_keyboard.Key.menu,
-    'F1': pynput_keyboard.Key.f1,
-    'F2': pynput_keyboard.Key.f2,
-    'F3': pynput_keyboard.Key.f3,
-    'F4': pynput_keyboard.Key.f4,
-    'F5': pynput_keyboard.Key.f5,
-    'F6': pynput_keyboard.Key.f6,
-    'F7': pynput_keyboard.Key.f7,
-    'F8': pynput_keyboard.Key.f8,
-    'F9': pynput_keyboard.Key.f9,
-    'F10': pynput_keyboard.Key.f10,
-    'F11': pynput_keyboard.Key.f11,
-    'F12': pynput_keyboard.Key.f12,
-    'NumLock': pynput_keyboard.Key.num_lock,
-    'ScrollLock': pynput_keyboard.Key.scroll_lock,
-}
+# Mouse and keyboard on the host, driven by viewers with control enabled
+remote_input = RemoteInput()
+cursor_overlay = CursorOverlay(CursorSampler(remote_input.position), monitor_registry, monitor_layout, fanout, CURSOR_RATE)
 
 @app.route('/')
 def index():
     return render_template("index.html")
 
-def get_loopback_device(p):
-    """Get WASAPI loopback device"""
-    try:
-        wasapi_info = p.get_host_api_info_by_type(pyaudio.paWASAPI)
-        default_speakers = p.get_device_info_by_index(wasapi_info["defaultOutputDevice"])
-        
-        if not default_speakers["isLoopbackDevice"]:
-            for loopback in p.get_loopback_device_info_generator():
-                if default_speakers["name"] in loopback["name"]:
-                    print(f"🎤 Loopback: {loopback['name']}")
-                    return loopback
-        return default_speakers
-    except Exception as e:
-        print(f"❌ Loopback error: {e}")
-        return None
+@app.route('/stats')
+def stats():
+    """Per-monitor send queues, idle-frame suppression, encoder pipeline and adaptive settings"""
+    return jsonify({
+        "clients": connected_clients,
+        "encoder": streamer.encoder.name,
+        "fanout": fanout.stats(),
+        "monitors": monitor_registry.stats(),
+        "latency": latency_tracker.stats(),
+        "audio": audio.stats(),
+        "metrics": metrics.snapshot()
+    })
 
-def capture_audio():
-    """Capture system audio"""
-    global is_streaming
-    p = pyaudio.PyAudio()
-    stream = None
-    
-    try:
-        loopback = get_loopback_device(p)
-        if not loopback:
-            print("❌ No loopback device!")
-            return
-        
-        rate = int(loopback["defaultSampleRate"])
-        channels = int(loopback["maxInputChannels"])
-        
-        print(f"🎵 Audio: {rate}Hz, {channels}ch")
-        
-        stream = p.open(
-            format=AUDIO_FORMAT,
-            channels=channels,
-            rate=rate,
-            input=True,
-            input_device_index=loopback["index"],
-            frames_per_buffer=AUDIO_CHUNK,
-            stream_callback=None
-        )
-        
-        stream.start_stream()
-        print("✅ Audio started")
-        
-        consecutive_errors = 0
-        max_errors = 10
-        
-        while is_streaming and consecutive_errors < max_errors:
-            try:
-                if stream.is_active():
-                    data = stream.read(AUDIO_CHUNK, exception_on_overflow=False)
-                    
-                    if data and len(data) > 0:
-                        audio_b64 = base64.b64encode(data).decode('utf-8')
-                        
-                        with audio_lock:
-                            socketio.emit("audio", {
-                                "data": audio_b64,
-                                "rate": rate,
-                                "channels": channels
-                            }, namespace='/')
-                        
-                        consecutive_errors = 0
-                    
-                    time.sleep(0.001)
-                else:
-                    break
-                    
-            except IOError:
-                consecutive_errors += 1
-                time.sleep(0.01)
-            except Exception:
-                consecutive_errors += 1
-                time.sleep(0.01)
-                
-    except Exception as e:
-        print(f"❌ Audio init error: {e}")
-    finally:
-        print("🛑 Audio stopped")
-        if stream:
-            try:
-                stream.stop_stream()
-                stream.close()
-            except:
-                pass
-        p.terminate()
+@app.route('/metrics')
+def prometheus_metrics():
+    """Stage timing histograms, bytes sent and queue depths for Prometheus"""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
-def stream_screen():
-    """Capture and stream screen"""
-    global is_streaming, screen_dimensions
-    
-    try:
-        with mss.mss() as sct:
-            monitor = sct.monitors[1]
-            screen_dimensions = {
-                'width': monitor['width'],
-                'height': monitor['height']
-            }
-            
-            print(f"📺 Screen: {monitor['width']}x{monitor['height']}")
-            
-            # Send screen dimensions to all clients
-            socketio.emit("screen_info", screen_dimensions, namespace='/')
-            
-            frame_count = 0
-            fps_time = time.time()
-            target_frame_time = 1.0 / 30
-            
-            while is_streaming:
-                frame_start = time.time()
-                
-                try:
-                    frame = sct.grab(monitor)
-                    img_np = np.array(frame)
-                    img_np = img_np[:, :, :3][:, :, ::-1]
-                    
-                    img = Image.fromarray(img_np)
-                    
-                    if TARGET_WIDTH and img.width > TARGET_WIDTH:
-                        ratio = TARGET_WIDTH / img.width
-                        target_height = int(img.height * ratio)
-                        img = img.resize((TARGET_WIDTH, target_height), Image.LANCZOS)
-                    
-                    buffer = io.BytesIO()
-                    img.save(buffer, format="JPEG", quality=70, optimize=True)
-                    img_b64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
-                    
-                    socketio.emit("frame", img_b64, namespace='/')
-                    
-                    frame_count += 1
-                    
-                    if frame_count % 150 == 0:
-                        elapsed = time.time() - fps_time
-                        fps = 150 / elapsed
-                        print(f"📊 FPS: {fps:.1f}")
-                        fps_time = time.time()
-                    
-                    elapsed = time.time() - frame_start
-                    sleep_time = max(0, target_frame_time - elapsed)
-                    if sleep_time > 0:
-                        time.sleep(sleep_time)
-                    
-                except Exception as e:
-                    print(f"⚠️ Screen error: {e}")
-                    time.sleep(0.1)
-                    
-    except Exception as e:
-        print(f"❌ Screen error: {e}")
-    finally:
-        print("✅ Screen stopped")
+metrics.gauge("client_queue_depth", "Frames waiting in a viewer's send queue", streamer.queue_depths)
+metrics.gauge("connected_clients", "Connected Socket.IO clients", lambda: [({}, connected_clients)])
+metrics.gauge("audio_buffer_depth_ms", "Audio queued in a viewer's jitter buffer",
+              lambda: [({'sid': sid}, depth) for sid, depth in latency_tracker.buffer_depths()])
+metrics.gauge("audio_capture_events", "Loopback ring overruns/underruns and PortAudio overflow/underflow flags",
+              lambda: [({'event': event}, count) for event, count in audio.events().items()])
 
 # Mouse control handlers
 @socketio.on("mouse_move")
+@metrics.timed("input")
 def handle_mouse_move(data):
     """Handle mouse movement from client"""
-    sid = request.sid
-    if not control_enabled.get(sid, False):
-        return
-    
-    try:
-        # Convert relative coordinates (0-1) to absolute screen coordinates
-        x = int(data['x'] * screen_dimensions['width'])
-        y = int(data['y'] * screen_dimensions['height'])
-        
-        # Clamp to screen bounds
-        x = max(0, min(x, screen_dimensions['width'] - 1))
-        y = max(0, min(y, screen_dimensions['height'] - 1))
-        
-        # Move mouse using pynput for better compatibility
-        mouse_controller.position = (x, y)
-        
-    except Exception as e:
-        print(f"❌ Mouse move error: {e}")
+    if control_enabled.get(request.sid, False):
+        index, region = monitor_registry.selection(request.sid)
+        remote_input.move(monitor_layout.get(index), region, data)
 
 @socketio.on("mouse_click")
+@metrics.timed("input")
 def handle_mouse_click(data):
     """Handle mouse clicks from client"""
-    sid = request.sid
-    if not control_enabled.get(sid, False):
-        return
-    
-    try:
-        button_map = {
-            'left': mouse.Button.left,
-            'right': mouse.Button.right,
-            'middle': mouse.Button.middle
-        }
-        
-        button = button_map.get(data['button'], mouse.Button.left)
-        action = data['action']
-        
-        if action == 'down':
-            mouse_controller.press(button)
-        elif action == 'up':
-            mouse_controller.release(button)
-        elif action == 'click':
-            mouse_controller.click(button, 1)
-        elif action == 'double':
-            mouse_controller.click(button, 2)
-        
-        print(f"🖱️ Mouse {action}: {data['button']}")
-            
-    except Exception as e:
-        print(f"❌ Mouse click error: {e}")
+    if control_enabled.get(request.sid, False):
+        remote_input.click(data)
 
 @socketio.on("mouse_scroll")
+@metrics.timed("input")
 def handle_mouse_scroll(data):
     """Handle mouse scroll from client"""
-    sid = request.sid
-    if not control_enabled.get(sid, False):
-        return
-    
-    try:
-        delta_x = data.get('deltaX', 0)
-        delta_y = data.get('deltaY', 0)
-        
-        # Scroll using pynput (dx, dy)
-        if abs(delta_y) > 0:
-            scroll_amount = -int(delta_y / 50)
-            mouse_controller.scroll(0, scroll_amount)
-        
-        if abs(delta_x) > 0:
-            scroll_amount = int(delta_x / 50)
-            mouse_controller.scroll(scroll_amount, 0)
-        
-        print(f"🖱️ Scroll: dx={delta_x}, dy={delta_y}")
-            
-    except Exception as e:
-        print(f"❌ Mouse scroll error: {e}")
+    if control_enabled.get(request.sid, False):
+        remote_input.scroll(data)
 
 # Keyboard control handlers
 @socketio.on("key_event")
+@metrics.timed("input")
 def handle_key_event(data):
     """Handle keyboard events from client"""
-    sid = request.sid
-    if not control_enabled.get(sid, False):
-        return
-    
-    try:
-        key = data['key']
-        action = data['action']
-        
-        # Map special keys
-        if key in KEY_MAP:
-            mapped_key = KEY_MAP[key]
-        else:
-            # Regular character
-            mapped_key = key
-        
-        if action == 'down':
-            keyboard_controller.press(mapped_key)
-            print(f"⌨️ Key DOWN: {key}")
-        elif action == 'up':
-            keyboard_controller.release(mapped_key)
-            print(f"⌨️ Key UP: {key}")
-            
-    except Exception as e:
-        print(f"❌ Key event error: {e}")
+    if control_enabled.get(request.sid, False):
+        remote_input.key(data)
 
 @socketio.on("enable_control")
 def handle_enable_control(data):
@@ -379,19 +215,21 @@ def on_connect():
     
     print(f"✅ Client connected: {sid[:8]} (Total: {connected_clients})")
     
+    info = streamer.screen_info(DEFAULT_MONITOR)
+    monitor_registry.subscribe(sid, info['index'])
+    emit("screen_info", info)
+    audio.join(sid)
+    
     if not is_streaming:
         is_streaming = True
         
-        screen_thread = threading.Thread(target=stream_screen, daemon=True)
-        screen_thread.start()
-        
-        audio_thread = threading.Thread(target=capture_audio, daemon=True)
+        audio_thread = threading.Thread(target=audio.capture, args=(lambda: is_streaming,), daemon=True)
         audio_thread.start()
         
+        cursor_thread = threading.Thread(target=cursor_overlay.run, args=(lambda: is_streaming,), daemon=True)
+        cursor_thread.start()
+        
         print("🚀 Streaming started")
-    else:
-        # Send screen info to new client
-        emit("screen_info", screen_dimensions)
 
 @socketio.on("disconnect")
 def on_disconnect():
@@ -402,22 +240,92 @@ def on_disconnect():
         del control_enabled[sid]
     
     connected_clients -= 1
+    counters = monitor_registry.unsubscribe(sid)
+    latency_tracker.remove(sid)
+    audio.remove(sid)
     print(f"❌ Client disconnected: {sid[:8]} (Remaining: {connected_clients})")
+    if counters:
+        print(f"   Frames sent: {counters['sent']}, dropped: {counters['dropped']}")
     
     if connected_clients <= 0:
         is_streaming = False
         connected_clients = 0
         print("🛑 All clients disconnected")
 
+@socketio.on("set_audio")
+def handle_set_audio(data=None):
+    """
+    Viewer's audio codec - "opus" once it knows it can decode it (WebCodecs), "pcm" otherwise -
+    and profile (AUDIO_PROFILES, e.g. "mono16" for a phone); either can be left out to keep it
+    """
+    audio.select(request.sid, data)
+
+@socketio.on("frame_ack")
+def handle_frame_ack():
+    stream = monitor_registry.stream_of(request.sid)
+    if stream:
+        stream.broadcaster.ack(request.sid)
+
+@socketio.on("latency_ack")
+def handle_latency_ack(data=None):
+    """Viewer's receive/display times for a stamped payload - glass-to-glass latency"""
+    try:
+        latency_tracker.ack(request.sid, data or {})
+    except (AttributeError, KeyError, TypeError):
+        pass  # Malformed ack; latency is best effort
+
+@socketio.on("select_monitor")
+def handle_select_monitor(data=None):
+    """Watch and control another monitor; unwatched monitors are not captured. Unknown indexes are ignored"""
+    try:
+        index = int(data.get('index'))
+    except (AttributeError, TypeError, ValueError):
+        return  # No usable index; stay on the current monitor
+    info = streamer.screen_info(index)  # Fresh layout, so a monitor plugged in since connecting is found
+    if info['index'] != index:
+        print(f"⚠️ Client {request.sid[:8]} asked for unknown monitor {index}")
+        return
+    monitor_registry.subscribe(request.sid, info['index'])
+    emit("screen_info", info)
+    print(f"🖥️ Client {request.sid[:8]} switched to monitor {info['index']}")
+
+@socketio.on("set_viewport")
+def handle_set_viewport(data=None):
+    """Stream only the rectangle this viewer is zoomed into (null = whole monitor)"""
+    index, _ = monitor_registry.selection(request.sid)
+    info = streamer.screen_info(index or DEFAULT_MONITOR)
+    region = snap_viewport(info, data)
+    monitor_registry.subscribe(request.sid, info['index'], region)
+    info['viewport'] = relative_viewport(info, region)
+    emit("screen_info", info)
+
+@socketio.on("audio_buffer")
+def handle_audio_buffer(data=None):
+    """Viewer's jitter buffer report: depth, target, underruns, drop/stretch and A/V offset"""
+    try:
+        latency_tracker.buffer(request.sid, data or {})
+    except (AttributeError, TypeError):
+        pass  # Malformed report; buffer stats are best effort
+
 @socketio.on("ping")
-def handle_ping():
-    emit("pong")
+def handle_ping(data=None):
+    """Keepalive; echoes the probe so the viewer can measure RTT"""
+    data = data if isinstance(data, dict) else {}
+    if data.get('rtt') is not None:
+        try:
+            latency_tracker.rtt(request.sid, data['rtt'])
+        except (TypeError, ValueError):
+            pass  # Malformed probe; RTT is best effort
+    emit("pong", data)
 
 if __name__ == "__main__":
+    if CAPTURE_PROCESS:
+        install_sigterm_handler()  # A terminated server takes its capture children and rings with it
+
     print("=" * 60)
     print("⚡ HostCast Module 3 - Remote Desktop Control")
     print("=" * 60)
-    print("📡 Server: http://0.0.0.0:5000")
+    print(f"📡 Server: http://0.0.0.0:5000 ({ASYNC_MODE})")
     print("🎮 Features: Screen + Audio + Mouse + Keyboard Control")
     print("=" * 60)
     print("\n⚠️  IMPORTANT: Run as Administrator for keyboard control!")
@@ -3,468 +3,134 @@ HostCast Module 4 - Extended Display
 Extends host display to client devices as virtual monitors
 Client becomes an extended screen that host can drag windows to
 """
-import base64
-import io
-import time
+import os
+import sys
 import threading
-from flask import Flask, render_template, request
+
+# The engine helpers live in the shared hostcast package at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, Response, render_template, request, jsonify
 from flask_socketio import SocketIO, emit
-from PIL import Image, ImageDraw, ImageFont
-import mss
-import numpy as np
-import pyaudiowpatch as pyaudio
-from pynput import mouse, keyboard as pynput_keyboard
-import ctypes
-import win32api
-import win32con
+from hostcast.metrics import Metrics
+from hostcast.latency import LatencyTracker, LATENCY_BUCKETS
+from hostcast.extended import ExtendedDisplays
+from hostcast.audio import LoopbackAudio
+from hostcast.remote_input import RemoteInput
+from hostcast.fanout import create_fanout
+
+# Server mode: "threading" (an OS thread per connection), or "eventlet"/"gevent" to
+# serve many displays from one event loop. Rendering, encoding and audio run in OS
+# threads either way - nothing is monkey-patched.
+ASYNC_MODE = "threading"
 
 # Flask + SocketIO setup
 app = Flask(__name__)
 socketio = SocketIO(
     app, 
     cors_allowed_origins="*", 
-    async_mode="threading",
+    async_mode=ASYNC_MODE,
     ping_timeout=60,
     ping_interval=25,
     max_http_buffer_size=10**8,
     logger=False,
     engineio_logger=False
 )
+fanout = create_fanout(socketio, ASYNC_MODE)  # Hands frames, cursor and audio from worker threads to the server
 
 # Configuration
 TARGET_WIDTH = 1280
 AUDIO_CHUNK = 2048
-AUDIO_FORMAT = pyaudio.paInt16
+AUDIO_RING_MS = 1000  # Loopback audio held while the sender is stalled (older audio is overwritten and counted)
+AUDIO_BATCH = 4  # Most AUDIO_CHUNK periods sent in one payload after the sender falls behind
 AUDIO_RATE = 48000
+BINARY_TRANSPORT = True  # Send frame/audio bytes as binary attachments (False = base64 for old clients)
+JPEG_QUALITY = 75
+TARGET_FPS = 30
+FRAME_POLICY = "skip"  # After an overrun: "skip" missed frames or "catchup" with back-to-back frames
+CURSOR_OVERLAY = True  # Host cursor as `cursor` events drawn by the client (False = composited into frames)
+LAYER_REFRESH = 2.0  # With CURSOR_OVERLAY, resend the cached background every N seconds so a lost frame heals (0 = only on change)
+RENDER_WORKERS = 4  # Displays composited and encoded in parallel when the cursor is composited
+METRICS = True  # Stage timings, bytes sent and queue depths on /metrics and /stats
+AUDIO_CODEC = "opus"  # "opus" = Opus via PyAV for browsers with WebCodecs (the rest still get PCM); "pcm" = raw PCM16 only
+OPUS_BITRATE = 64000  # Opus bits/s for the whole stream (48 kHz stereo PCM16 is 1536 kbit/s)
+OPUS_FRAME_MS = 20  # Opus frame size: 2.5, 5, 10, 20, 40 or 60 ms (adds at most one frame of delay)
 
 # Global state
 is_streaming = False
-audio_lock = threading.Lock()
-connected_clients = {}
-screen_dimensions = {'width': 1920, 'height': 1080}
-keyboard_controller = pynput_keyboard.Controller()
-
-# Key mapping
-KEY_MAP = {
-    'Backspace': pynput_keyboard.Key.backspace,
-    'Tab': pynput_keyboard.Key.tab,
-    'Enter': pynput_keyboard.Key.enter,
-    'Shift': pynput_keyboard.Key.shift,
-    'Control': pynput_keyboard.Key.ctrl,
-    'Alt': pynput_keyboard.Key.alt,
-    'Pause': pynput_keyboard.Key.pause,
-    'CapsLock': pynput_keyboard.Key.caps_lock,
-    'Escape': pynput_keyboard.Key.esc,
-    ' ': pynput_keyboard.Key.space,
-    'PageUp': pynput_keyboard.Key.page_up,
-    'PageDown': pynput_keyboard.Key.page_down,
-    'End': pynput_keyboard.Key.end,
-    'Home': pynput_keyboard.Key.home,
-    'ArrowLeft': pynput_keyboard.Key.left,
-    'ArrowUp': pynput_keyboard.Key.up,
-    'ArrowRight': pynput_keyboard.Key.right,
-    'ArrowDown': pynput_keyboard.Key.down,
-    'Insert': pynput_keyboard.Key.insert,
-    'Delete': pynput_keyboard.Key.delete,
-    'Meta': pynput_keyboard.Key.cmd,
-    'ContextMenu': pynput_keyboard.Key.menu,
-    'F1': pynput_keyboard.Key.f1, 'F2': pynput_keyboard.Key.f2,
-    'F3': pynput_keyboard.Key.f3, 'F4': pynput_keyboard.Key.f4,
-    'F5': pynput_keyboard.Key.f5, 'F6': pynput_keyboard.Key.f6,
-    'F7': pynput_keyboard.Key.f7, 'F8': pynput_keyboard.Key.f8,
-    'F9': pynput_keyboard.Key.f9, 'F10': pynput_keyboard.Key.f10,
-    'F11': pynput_keyboard.Key.f11, 'F12': pynput_keyboard.Key.f12,
-    'NumLock': pynput_keyboard.Key.num_lock,
-    'ScrollLock': pynput_keyboard.Key.scroll_lock,
-}
+metrics = Metrics(enabled=METRICS)
+latency_tracker = LatencyTracker(
+    metrics.histogram("capture_to_receive_seconds", "Render to arrival at the client", "media", LATENCY_BUCKETS),
+    metrics.histogram("capture_to_display_seconds", "Render to display (or audio playout) at the client", "media", LATENCY_BUCKETS)
+)
+# Display placement, rendering and pointer input, and the audio rooms - the same code the unified host runs
+extended_displays = ExtendedDisplays(fanout, metrics, latency_tracker, TARGET_WIDTH, JPEG_QUALITY, TARGET_FPS, FRAME_POLICY,
+                                     CURSOR_OVERLAY, LAYER_REFRESH, RENDER_WORKERS, BINARY_TRANSPORT)
+connected_clients = extended_displays.displays  # sid -> mode, position, resolution, display_name
+audio = LoopbackAudio(fanout, metrics, AUDIO_CHUNK, AUDIO_RING_MS, AUDIO_BATCH, AUDIO_CODEC, OPUS_BITRATE, OPUS_FRAME_MS,
+                      BINARY_TRANSPORT)
+remote_input = RemoteInput()  # Keyboard from extended displays (the pointer goes through win32)
+
+metrics.gauge("connected_clients", "Connected Socket.IO clients", lambda: [({}, len(connected_clients))])
+metrics.gauge("client_queue_depth", "Frames being composited per client (0 or 1: a second is never queued)",
+              extended_displays.queue_depths)
+metrics.gauge("audio_buffer_depth_ms", "Audio queued in a client's jitter buffer",
+              lambda: [({'sid': sid}, depth) for sid, depth in latency_tracker.buffer_depths()])
+metrics.gauge("audio_capture_events", "Loopback ring overruns/underruns and PortAudio overflow/underflow flags",
+              lambda: [({'event': event}, count) for event, count in audio.events().items()])
 
 @app.route('/')
 def index():
     return render_template("index.html")
 
-def get_loopback_device(p):
-    """Get WASAPI loopback device"""
-    try:
-        wasapi_info = p.get_host_api_info_by_type(pyaudio.paWASAPI)
-        default_speakers = p.get_device_info_by_index(wasapi_info["defaultOutputDevice"])
-        
-        if not default_speakers["isLoopbackDevice"]:
-            for loopback in p.get_loopback_device_info_generator():
-                if default_speakers["name"] in loopback["name"]:
-                    return loopback
-        return default_speakers
-    except Exception as e:
-        print(f"❌ Loopback error: {e}")
-        return None
-
-def create_virtual_screen(width, height, display_name, mouse_x=None, mouse_y=None):
-    """Create a virtual extended screen image with host cursor"""
-    img = Image.new('RGB', (width, height), color=(15, 15, 25))
-    draw = ImageDraw.Draw(img)
-    
-    # Draw border
-    draw.rectangle([0, 0, width-1, height-1], outline=(0, 255, 0), width=5)
-    
-    # Draw grid
-    grid_spacing = 80
-    for x in range(0, width, grid_spacing):
-        draw.line([(x, 0), (x, height)], fill=(35, 35, 45), width=1)
-    for y in range(0, height, grid_spacing):
-        draw.line([(0, y), (width, y)], fill=(35, 35, 45), width=1)
-    
-    # Draw center crosshair
-    center_x, center_y = width // 2, height // 2
-    draw.line([(center_x - 50, center_y), (center_x + 50, center_y)], fill=(0, 255, 0), width=2)
-    draw.line([(center_x, center_y - 50), (center_x, center_y + 50)], fill=(0, 255, 0), width=2)
-    
-    # Draw text
-    try:
-        font_large = ImageFont.truetype("arial.ttf", 60)
-        font_small = ImageFont.truetype("arial.ttf", 30)
-    except:
-        font_large = ImageFont.load_default()
-        font_small = ImageFont.load_default()
-    
-    text = f"Extended Display"
-    bbox = draw.textbbox((0, 0), text, font=font_large)
-    text_width = bbox[2] - bbox[0]
-    draw.text(((width - text_width) // 2, height // 2 - 100), text, fill=(0, 255, 0), font=font_large)
-    
-    text2 = f"{display_name}"
-    bbox2 = draw.textbbox((0, 0), text2, font=font_small)
-    text_width2 = bbox2[2] - bbox2[0]
-    draw.text(((width - text_width2) // 2, height // 2), text2, fill=(100, 255, 100), font=font_small)
-    
-    text3 = f"{width}x{height}"
-    bbox3 = draw.textbbox((0, 0), text3, font=font_small)
-    text_width3 = bbox3[2] - bbox3[0]
-    draw.text(((width - text_width3) // 2, height // 2 + 50), text3, fill=(100, 255, 100), font=font_small)
-    
-    # Draw host cursor if provided
-    if mouse_x is not None and mouse_y is not None:
-        cursor_x = int(mouse_x * width)
-        cursor_y = int(mouse_y * height)
-        
-        # Draw cursor circle
-        cursor_size = 20
-        draw.ellipse(
-            [cursor_x - cursor_size, cursor_y - cursor_size, 
-             cursor_x + cursor_size, cursor_y + cursor_size],
-            outline=(255, 0, 255),
-            width=4
-        )
-        
-        # Draw crosshair on cursor
-        draw.line([(cursor_x - cursor_size - 10, cursor_y), (cursor_x + cursor_size + 10, cursor_y)], 
-                  fill=(255, 0, 255), width=3)
-        draw.line([(cursor_x, cursor_y - cursor_size - 10), (cursor_x, cursor_y + cursor_size + 10)], 
-                  fill=(255, 0, 255), width=3)
-    
-    return img
-
-def capture_audio():
-    """Capture system audio"""
-    global is_streaming
-    p = pyaudio.PyAudio()
-    stream = None
-    
-    try:
-        loopback = get_loopback_device(p)
-        if not loopback:
-            print("⚠️ No loopback device - audio disabled")
-            return
-        
-        rate = int(loopback["defaultSampleRate"])
-        channels = int(loopback["maxInputChannels"])
-        
-        print(f"🎵 Audio: {rate}Hz, {channels}ch")
-        
-        stream = p.open(
-            format=AUDIO_FORMAT,
-            channels=channels,
-            rate=rate,
-            input=True,
-            input_device_index=loopback["index"],
-            frames_per_buffer=AUDIO_CHUNK,
-            stream_callback=None
-        )
-        
-        stream.start_stream()
-        
-        while is_streaming:
-            try:
-                if stream.is_active():
-                    data = stream.read(AUDIO_CHUNK, exception_on_overflow=False)
-                    if data and len(data) > 0:
-                        audio_b64 = base64.b64encode(data).decode('utf-8')
-                        socketio.emit("audio", {
-                            "data": audio_b64,
-                            "rate": rate,
-                            "channels": channels
-                        }, namespace='/')
-                    time.sleep(0.001)
-                else:
-                    break
-            except:
-                time.sleep(0.01)
-                
-    except Exception as e:
-        print(f"❌ Audio error: {e}")
-    finally:
-        if stream:
-            try:
-                stream.stop_stream()
-                stream.close()
-            except:
-                pass
-        p.terminate()
-
-def calculate_virtual_bounds(sid):
-    """Calculate virtual display bounds"""
-    client = connected_clients.get(sid)
-    if not client:
-        return None
-    
-    position = client['position']
-    res = client['resolution']
-    host_w = screen_dimensions['width']
-    host_h = screen_dimensions['height']
-    
-    # Calculate bounds based on position
-    if position == 'right':
-        return {
-            'x_min': host_w,
-            'x_max': host_w + res['width'],
-            'y_min': 0,
-            'y_max': res['height']
-        }
-    elif position == 'left':
-        return {
-            'x_min': -res['width'],
-            'x_max': 0,
-            'y_min': 0,
-            'y_max': res['height']
-        }
-    elif position == 'top':
-        return {
-            'x_min': 0,
-            'x_max': res['width'],
-            'y_min': -res['height'],
-            'y_max': 0
-        }
-    elif position == 'bottom':
-        return {
-            'x_min': 0,
-            'x_max': res['width'],
-            'y_min': host_h,
-            'y_max': host_h + res['height']
-        }
-    
-    return None
+@app.route('/stats')
+def stats():
+    """Clients, render cache hits and stage timings"""
+    return jsonify({
+        "clients": len(connected_clients),
+        "cursor_overlay": CURSOR_OVERLAY,
+        "fanout": fanout.stats(),
+        "render_cache": extended_displays.cache.stats(),
+        "latency": latency_tracker.stats(),
+        "audio": audio.stats(),
+        "metrics": metrics.snapshot()
+    })
 
-def stream_extended_displays():
-    """Stream virtual extended displays to clients"""
-    global is_streaming
-    
-    try:
-        print("📺 Extended display streaming started")
-        
-        target_frame_time = 1.0 / 30
-        last_mouse_pos = {}
-        
-        while is_streaming:
-            frame_start = time.time()
-            
-            try:
-                # Get current mouse position
-                mouse_pos = win32api.GetCursorPos()
-                
-                # Update each connected client
-                for sid, client_info in list(connected_clients.items()):
-                    if client_info.get('mode') == 'extended':
-                        width = client_info['resolution']['width']
-                        height = client_info['resolution']['height']
-                        display_name = client_info['display_name']
-                        
-                        # Calculate if mouse is in this client's virtual area
-                        bounds = calculate_virtual_bounds(sid)
-                        mouse_x_rel = None
-                        mouse_y_rel = None
-                        
-                        if bounds:
-                            if (bounds['x_min'] <= mouse_pos[0] <= bounds['x_max'] and
-                                bounds['y_min'] <= mouse_pos[1] <= bounds['y_max']):
-                                # Mouse is in this display's area
-                                mouse_x_rel = (mouse_pos[0] - bounds['x_min']) / (bounds['x_max'] - bounds['x_min'])
-                                mouse_y_rel = (mouse_pos[1] - bounds['y_min']) / (bounds['y_max'] - bounds['y_min'])
-                                
-                                # Clamp to 0-1
-                                mouse_x_rel = max(0, min(1, mouse_x_rel))
-                                mouse_y_rel = max(0, min(1, mouse_y_rel))
-                        
-                        # Only regenerate if mouse moved or first frame
-                        if sid not in last_mouse_pos or last_mouse_pos[sid] != (mouse_x_rel, mouse_y_rel):
-                            last_mouse_pos[sid] = (mouse_x_rel, mouse_y_rel)
-                            
-                            # Create virtual screen with cursor
-                            img = create_virtual_screen(width, height, display_name, mouse_x_rel, mouse_y_rel)
-                            
-                            # Resize for streaming
-                            if TARGET_WIDTH and img.width > TARGET_WIDTH:
-                                ratio = TARGET_WIDTH / img.width
-                                target_height = int(img.height * ratio)
-                                img = img.resize((TARGET_WIDTH, target_height), Image.LANCZOS)
-                            
-                            # Encode
-                            buffer = io.BytesIO()
-                            img.save(buffer, format="JPEG", quality=75, optimize=True)
-                            img_b64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
-                            
-                            # Send to specific client
-                            socketio.emit("frame", img_b64, room=sid)
-                
-                # Frame timing
-                elapsed = time.time() - frame_start
-                sleep_time = max(0, target_frame_time - elapsed)
-                if sleep_time > 0:
-                    time.sleep(sleep_time)
-                    
-            except Exception as e:
-                print(f"⚠️ Stream error: {e}")
-                time.sleep(0.1)
-                    
-    except Exception as e:
-        print(f"❌ Display stream error: {e}")
+@app.route('/metrics')
+def prometheus_metrics():
+    """Stage timing histograms, bytes sent and queue depths for Prometheus"""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
 # Client input handlers
 @socketio.on("client_mouse_move")
+@metrics.timed("input")
 def handle_client_mouse_move(data):
     """Handle mouse movement from client - move host cursor"""
-    sid = request.sid
-    client = connected_clients.get(sid)
-    
-    if not client or client.get('mode') != 'extended':
-        return
-    
-    try:
-        # Calculate absolute position in virtual space
-        bounds = calculate_virtual_bounds(sid)
-        if bounds:
-            abs_x = int(bounds['x_min'] + data['x'] * (bounds['x_max'] - bounds['x_min']))
-            abs_y = int(bounds['y_min'] + data['y'] * (bounds['y_max'] - bounds['y_min']))
-            
-            # Move cursor
-            ctypes.windll.user32.SetCursorPos(abs_x, abs_y)
-    except Exception as e:
-        print(f"❌ Client mouse error: {e}")
+    extended_displays.move_pointer(request.sid, data)
 
 @socketio.on("client_mouse_click")
+@metrics.timed("input")
 def handle_client_mouse_click(data):
     """Handle mouse click from client"""
-    sid = request.sid
-    client = connected_clients.get(sid)
-    
-    if not client or client.get('mode') != 'extended':
-        return
-    
-    try:
-        button_map = {
-            'left': (win32con.MOUSEEVENTF_LEFTDOWN, win32con.MOUSEEVENTF_LEFTUP),
-            'right': (win32con.MOUSEEVENTF_RIGHTDOWN, win32con.MOUSEEVENTF_RIGHTUP),
-            'middle': (win32con.MOUSEEVENTF_MIDDLEDOWN, win32con.MOUSEEVENTF_MIDDLEUP)
-        }
-        
-        action = data['action']
-        button = data['button']
-        
-        if button in button_map:
-            down_event, up_event = button_map[button]
-            
-            if action == 'down':
-                win32api.mouse_event(down_event, 0, 0, 0, 0)
-            elif action == 'up':
-                win32api.mouse_event(up_event, 0, 0, 0, 0)
-            elif action == 'click':
-                win32api.mouse_event(down_event, 0, 0, 0, 0)
-                time.sleep(0.01)
-                win32api.mouse_event(up_event, 0, 0, 0, 0)
-        
-        print(f"🖱️ Click: {button} {action}")
-    except Exception as e:
-        print(f"❌ Click error: {e}")
+    extended_displays.click(request.sid, data)
 
 @socketio.on("client_mouse_scroll")
+@metrics.timed("input")
 def handle_client_mouse_scroll(data):
     """Handle scroll from client"""
-    sid = request.sid
-    client = connected_clients.get(sid)
-    
-    if not client or client.get('mode') != 'extended':
-        return
-    
-    try:
-        delta_y = data.get('deltaY', 0)
-        if abs(delta_y) > 0:
-            scroll_amount = -int(delta_y)
-            win32api.mouse_event(win32con.MOUSEEVENTF_WHEEL, 0, 0, scroll_amount, 0)
-    except Exception as e:
-        print(f"❌ Scroll error: {e}")
+    extended_displays.scroll(request.sid, data)
 
 @socketio.on("client_key_event")
+@metrics.timed("input")
 def handle_client_key_event(data):
     """Handle keyboard from client"""
-    sid = request.sid
-    client = connected_clients.get(sid)
-    
-    if not client or client.get('mode') != 'extended':
-        return
-    
-    try:
-        key = data['key']
-        action = data['action']
-        
-        if key in KEY_MAP:
-            mapped_key = KEY_MAP[key]
-        else:
-            mapped_key = key
-        
-        if action == 'down':
-            keyboard_controller.press(mapped_key)
-        elif action == 'up':
-            keyboard_controller.release(mapped_key)
-        
-        print(f"⌨️ Key: {key} {action}")
-    except Exception as e:
-        print(f"❌ Key error: {e}")
+    if extended_displays.extended(request.sid):
+        remote_input.key(data)
 
 @socketio.on("set_display_mode")
 def handle_set_display_mode(data):
     """Set client display mode and configuration"""
-    sid = request.sid
-    
-    mode = data.get('mode', 'extended')
-    position = data.get('position', 'right')
-    resolution = data.get('resolution', {'width': 1920, 'height': 1080})
-    display_name = data.get('display_name', f'Display-{sid[:8]}')
-    
-    connected_clients[sid] = {
-        'mode': mode,
-        'position': position,
-        'resolution': resolution,
-        'display_name': display_name
-    }
-    
-    bounds = calculate_virtual_bounds(sid)
-    
-    print(f"📺 Client configured: {display_name}")
-    print(f"   Position: {position}")
-    print(f"   Resolution: {resolution['width']}x{resolution['height']}")
-    print(f"   Virtual bounds: X({bounds['x_min']} to {bounds['x_max']}), Y({bounds['y_min']} to {bounds['y_max']})")
-    
-    emit("display_configured", {
-        'virtual_bounds': bounds,
-        'host_screen': screen_dimensions
-    })
+    emit("display_configured", extended_displays.configure(request.sid, data))
 
 @socketio.on("connect")
 def on_connect():
@@ -474,20 +140,17 @@ def on_connect():
     print(f"✅ Client connected: {sid[:8]}")
     
     # Get host screen info
-    with mss.mss() as sct:
-        monitor = sct.monitors[1]
-        screen_dimensions['width'] = monitor['width']
-        screen_dimensions['height'] = monitor['height']
-    
-    print(f"   Host screen: {screen_dimensions['width']}x{screen_dimensions['height']}")
+    screen = extended_displays.refresh_screen()
+    print(f"   Host screen: {screen['width']}x{screen['height']}")
     
-    emit("screen_info", screen_dimensions)
+    emit("screen_info", screen)
+    audio.join(sid)
     
     if not is_streaming:
         is_streaming = True
         
-        threading.Thread(target=stream_extended_displays, daemon=True).start()
-        threading.Thread(target=capture_audio, daemon=True).start()
+        threading.Thread(target=extended_displays.run, args=(lambda: is_streaming,), daemon=True).start()
+        threading.Thread(target=audio.capture, args=(lambda: is_streaming,), daemon=True).start()
         
         print("🚀 Streaming started")
 
@@ -496,23 +159,56 @@ def on_disconnect():
     global is_streaming
     sid = request.sid
     
-    if sid in connected_clients:
-        print(f"❌ Client disconnected: {connected_clients[sid]['display_name']}")
-        del connected_clients[sid]
+    client = extended_displays.remove(sid)
+    if client:
+        print(f"❌ Client disconnected: {client['display_name']}")
+    latency_tracker.remove(sid)
+    audio.remove(sid)
     
     if len(connected_clients) == 0:
         is_streaming = False
         print("🛑 All clients disconnected")
 
+@socketio.on("set_audio")
+def handle_set_audio(data=None):
+    """
+    Viewer's audio codec - "opus" once it knows it can decode it (WebCodecs), "pcm" otherwise -
+    and profile (AUDIO_PROFILES, e.g. "mono16" for a phone); either can be left out to keep it
+    """
+    audio.select(request.sid, data)
+
+@socketio.on("latency_ack")
+def handle_latency_ack(data=None):
+    """Client's receive/display times for a stamped payload - glass-to-glass latency"""
+    try:
+        latency_tracker.ack(request.sid, data or {})
+    except (AttributeError, KeyError, TypeError):
+        pass  # Malformed ack; latency is best effort
+
+@socketio.on("audio_buffer")
+def handle_audio_buffer(data=None):
+    """Client's jitter buffer report: depth, target, underruns, drop/stretch and A/V offset"""
+    try:
+        latency_tracker.buffer(request.sid, data or {})
+    except (AttributeError, TypeError):
+        pass  # Malformed report; buffer stats are best effort
+
 @socketio.on("ping")
-def handle_ping():
-    emit("pong")
+def handle_ping(data=None):
+    """Keepalive; echoes the probe so the client can measure RTT"""
+    data = data if isinstance(data, dict) else {}
+    if data.get('rtt') is not None:
+        try:
+            latency_tracker.rtt(request.sid, data['rtt'])
+        except (TypeError, ValueError):
+            pass  # Malformed probe; RTT is best effort
+    emit("pong", data)
 
 if __name__ == "__main__":
     print("=" * 70)
     print("⚡ HostCast Module 4 - Extended Display System")
     print("=" * 70)
-    print("📡 Server: http://0.0.0.0:5000")
+    print(f"📡 Server: http://0.0.0.0:5000 ({ASYNC_MODE})")
     print("🖥️  Features: Virtual Extended Display + Audio")
     print("=" * 70)
     print("\n💡 How to use:")
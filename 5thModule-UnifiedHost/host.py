@@ -0,0 +1,462 @@
+"""
+HostCast Unified Host
+One process, one capture/encode engine: screen sharing, remote control,
+extended display and file sharing attach to it as Socket.IO namespaces
+"""
+import os
+import sys
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULE_DIRS = {
+    'files': os.path.join(ROOT, "1stModule-FileSharing"),
+    'share': os.path.join(ROOT, "2ndModule-Screensharing"),
+    'control': os.path.join(ROOT, "3rdModule-RemoteControl"),
+    'extend': os.path.join(ROOT, "4thModule-ExtendedDisplay")
+}
+# The engine helpers come from the shared hostcast package at the repository root,
+# the same one the feature modules' own servers import
+sys.path.insert(0, ROOT)
+
+from flask import Flask, Response, render_template, request, jsonify
+from flask_socketio import SocketIO, emit
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+import pyautogui
+from hostcast.metrics import Metrics
+from hostcast.latency import LatencyTracker, LATENCY_BUCKETS
+from hostcast.cursor import CursorSampler, CursorOverlay
+from hostcast.monitors import snap_viewport, relative_viewport
+from hostcast.capture_process import install_sigterm_handler
+from hostcast.streaming import StreamConfig, ScreenStreamer
+from hostcast.audio import LoopbackAudio
+from hostcast.remote_input import RemoteInput
+from hostcast.extended import ExtendedDisplays
+from hostcast.file_sharing import create_file_sharing
+from hostcast.fanout import create_fanout
+
+# Features served by this host; each is mounted at /<name> (page + Socket.IO namespace)
+FEATURES = ("share", "control", "extend", "files")
+
+# Server mode: "threading", or "eventlet"/"gevent" to serve many viewers from one
+# event loop. Capture, encode, audio and rendering run in OS threads either way.
+ASYNC_MODE = "threading"
+
+# Flask + SocketIO setup - every feature keeps its own page and static files
+app = Flask(__name__)
+feature_apps = {name: Flask(f"hostcast_{name}", root_path=MODULE_DIRS[name]) for name in FEATURES}
+app.wsgi_app = DispatcherMiddleware(app.wsgi_app, {f"/{name}": feature for name, feature in feature_apps.items()})
+socketio = SocketIO(
+    app,
+    cors_allowed_origins="*",
+    async_mode=ASYNC_MODE,
+    ping_timeout=60,
+    ping_interval=25,
+    max_http_buffer_size=10**8,
+    logger=False,
+    engineio_logger=False
+)
+fanout = create_fanout(socketio, ASYNC_MODE)  # Hands frames, audio and cursor events from capture threads to the senders
+
+SHARE, CONTROL, EXTEND, FILES = "/share", "/control", "/extend", "/files"
+VIEWER_NAMESPACES = tuple(f"/{name}" for name in FEATURES if name in ("share", "control"))
+MEDIA_NAMESPACES = tuple(f"/{name}" for name in FEATURES if name != "files")  # Namespaces that get audio
+
+# Configuration
+TARGET_WIDTH = 1280
+AUDIO_CHUNK = 2048
+AUDIO_RING_MS = 1000  # Loopback audio held while the sender is stalled (older audio is overwritten and counted)
+AUDIO_BATCH = 4  # Most AUDIO_CHUNK periods sent in one payload after the sender falls behind
+AUDIO_RATE = 48000
+FRAME_QUEUE_SIZE = 4  # Frames buffered per viewer before the oldest is dropped (>= PIPELINE_DEPTH)
+BINARY_TRANSPORT = True  # Send frame/audio bytes as binary attachments (False = base64 for old clients)
+TILE_MODE = False  # Send only changed tiles between periodic keyframes
+TILE_SIZE = 64  # Tile edge in output pixels
+KEYFRAME_INTERVAL = 90  # Frames between full keyframes in tile mode
+IDLE_DETECTION = True  # Skip resize/encode/emit while the screen is unchanged
+IDLE_SAMPLE_STEP = 4  # Checksum every Nth row (rotating, so all rows are covered)
+IDLE_HEARTBEAT = 1.0  # Seconds between resends of the last frame while idle
+ENCODER_WORKERS = 2  # Frames encoded in parallel (Pillow releases the GIL)
+PIPELINE_DEPTH = 4  # Frames in flight between capture and send before capture waits
+JPEG_QUALITY = 70  # Starting JPEG quality
+JPEG_ENCODER = "auto"  # "auto", "simplejpeg", "turbojpeg" or "pillow"
+BUFFER_RING = False  # Reuse preallocated capture/scale/output buffers instead of allocating per frame
+TARGET_FPS = 30  # Starting frame rate
+ADAPTIVE_STREAM = True  # Adjust quality/width/FPS to encoder load and viewer backpressure
+QUALITY_RANGE = (35, 85)
+WIDTH_RANGE = (640, 1920)
+FPS_RANGE = (10, 30)
+DEFAULT_MONITOR = 1  # Monitor new viewers watch first (mss index, 1 = primary)
+METRICS = True  # Stage timings, bytes sent and queue depths on /metrics and /stats
+FRAME_POLICY = "skip"  # After an overrun: "skip" missed frames or "catchup" with back-to-back frames
+VIDEO_CODEC = None  # None = JPEG frames; "h264" or "vp8" = inter-frame video via PyAV, played through MSE
+VIDEO_GOP = 120  # Frames between scheduled keyframes (joining viewers get one immediately)
+VIDEO_LOW_LATENCY = True  # zerolatency/realtime tuning: no B-frames, no lookahead
+CAPTURE_PROCESS = False  # Grab and encode in a child process so input and sockets never wait on its GIL (JPEG frames only)
+CAPTURE_RING_SLOTS = 8  # Encoded frames the shared-memory ring holds between the processes
+CAPTURE_SLOT_MB = 4  # Largest encoded frame a ring slot fits (bigger ones are dropped and counted)
+AUDIO_CODEC = "opus"  # "opus" = Opus via PyAV for browsers with WebCodecs (the rest still get PCM); "pcm" = raw PCM16 only
+OPUS_BITRATE = 64000  # Opus bits/s for the whole stream (48 kHz stereo PCM16 is 1536 kbit/s)
+OPUS_FRAME_MS = 20  # Opus frame size: 2.5, 5, 10, 20, 40 or 60 ms (adds at most one frame of delay)
+CURSOR_RATE = 60  # Host pointer samples per second for remote-control viewers
+EXTEND_JPEG_QUALITY = 75  # Extended-display backgrounds
+EXTEND_FPS = 30  # Extended-display cursor updates per second
+CURSOR_OVERLAY = True  # Extended displays get `cursor` events (False = cursor composited into frames)
+LAYER_REFRESH = 2.0  # With CURSOR_OVERLAY, resend the cached background every N seconds so a lost frame heals (0 = only on change)
+RENDER_WORKERS = 4  # Extended displays composited and encoded in parallel when the cursor is composited
+UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
+
+# Global state
+is_streaming = False  # Audio, cursor and extended-display loops run while any media client is connected
+engine_lock = threading.Lock()
+clients = {f"/{name}": set() for name in FEATURES}  # namespace -> connected sids
+control_enabled = {}
+metrics = Metrics(enabled=METRICS)
+latency_tracker = LatencyTracker(
+    metrics.histogram("capture_to_receive_seconds", "Capture to arrival at the viewer", "media", LATENCY_BUCKETS),
+    metrics.histogram("capture_to_display_seconds", "Capture to display (or audio playout) at the viewer", "media", LATENCY_BUCKETS)
+)
+# One capture/encode stream per watched monitor, shared by share and control viewers
+streamer = ScreenStreamer(StreamConfig(
+    target_width=TARGET_WIDTH,
+    target_fps=TARGET_FPS,
+    jpeg_quality=JPEG_QUALITY,
+    quality_range=QUALITY_RANGE,
+    width_range=WIDTH_RANGE,
+    fps_range=FPS_RANGE,
+    adaptive=ADAPTIVE_STREAM,
+    frame_queue_size=FRAME_QUEUE_SIZE,
+    binary_transport=BINARY_TRANSPORT,
+    tile_mode=TILE_MODE,
+    tile_size=TILE_SIZE,
+    keyframe_interval=KEYFRAME_INTERVAL,
+    idle_detection=IDLE_DETECTION,
+    idle_sample_step=IDLE_SAMPLE_STEP,
+    idle_heartbeat=IDLE_HEARTBEAT,
+    encoder_workers=ENCODER_WORKERS,
+    pipeline_depth=PIPELINE_DEPTH,
+    jpeg_encoder=JPEG_ENCODER,
+    buffer_ring=BUFFER_RING,
+    frame_policy=FRAME_POLICY,
+    video_codec=VIDEO_CODEC,
+    video_gop=VIDEO_GOP,
+    video_low_latency=VIDEO_LOW_LATENCY,
+    capture_process=CAPTURE_PROCESS,
+    capture_ring_slots=CAPTURE_RING_SLOTS,
+    capture_slot_mb=CAPTURE_SLOT_MB
+), socketio, fanout, metrics, latency_tracker, namespace=SHARE)
+monitor_registry = streamer.registry
+monitor_layout = streamer.layout  # mss index -> {'left', 'top', 'width', 'height'}, refreshed on connect/switch
+# Loopback audio captured once and sent to every feature with clients
+audio = LoopbackAudio(fanout, metrics, AUDIO_CHUNK, AUDIO_RING_MS, AUDIO_BATCH, AUDIO_CODEC, OPUS_BITRATE, OPUS_FRAME_MS,
+                      BINARY_TRANSPORT, namespaces=lambda: [namespace for namespace in MEDIA_NAMESPACES if clients[namespace]])
+extended_displays = ExtendedDisplays(fanout, metrics, latency_tracker, TARGET_WIDTH, EXTEND_JPEG_QUALITY, EXTEND_FPS, FRAME_POLICY,
+                                     CURSOR_OVERLAY, LAYER_REFRESH, RENDER_WORKERS, BINARY_TRANSPORT, namespace=EXTEND)
+
+# PyAutoGUI settings for faster response
+pyautogui.FAILSAFE = False
+pyautogui.PAUSE = 0
+pyautogui.MINIMUM_DURATION = 0
+
+# Mouse and keyboard on the host; the pointer overlay goes to remote-control viewers only
+remote_input = RemoteInput()
+cursor_overlay = CursorOverlay(CursorSampler(remote_input.position), monitor_registry, monitor_layout, fanout, CURSOR_RATE,
+                               namespace=CONTROL, viewers=lambda: clients[CONTROL])
+
+# Host pages and endpoints
+@app.route('/')
+def index():
+    return render_template("index.html", features=FEATURES)
+
+@app.route('/stats')
+def stats():
+    """Clients per feature plus the shared engine: monitor streams, render cache, latency and stage timings"""
+    return jsonify({
+        "clients": {namespace: len(sids) for namespace, sids in clients.items()},
+        "encoder": streamer.encoder.name,
+        "fanout": fanout.stats(),
+        "monitors": monitor_registry.stats(),
+        "render_cache": extended_displays.cache.stats(),
+        "latency": latency_tracker.stats(),
+        "audio": audio.stats(),
+        "metrics": metrics.snapshot()
+    })
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Stage timing histograms, bytes sent and queue depths for Prometheus"""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+def feature_page(name):
+    if name in feature_apps:
+        feature_apps[name].add_url_rule('/', f"{name}_index", lambda: render_template("index.html"))
+
+for name in ("share", "control", "extend"):
+    feature_page(name)
+
+# File sharing (module 1), mounted at /files
+if "files" in feature_apps:
+    feature_apps["files"].register_blueprint(create_file_sharing(socketio, UPLOAD_FOLDER, namespace=FILES))
+
+metrics.gauge("client_queue_depth", "Frames waiting in a viewer's send queue", streamer.queue_depths)
+metrics.gauge("connected_clients", "Connected Socket.IO clients per feature namespace",
+              lambda: [({'namespace': namespace}, len(sids)) for namespace, sids in clients.items()])
+metrics.gauge("audio_buffer_depth_ms", "Audio queued in a viewer's jitter buffer",
+              lambda: [({'sid': sid}, depth) for sid, depth in latency_tracker.buffer_depths()])
+metrics.gauge("audio_capture_events", "Loopback ring overruns/underruns and PortAudio overflow/underflow flags",
+              lambda: [({'event': event}, count) for event, count in audio.events().items()])
+
+def start_engine():
+    """First media client: start the shared audio, cursor and extended-display loops"""
+    global is_streaming
+    with engine_lock:
+        if is_streaming:
+            return
+        is_streaming = True
+    threading.Thread(target=audio.capture, args=(lambda: is_streaming,), daemon=True).start()
+    if CONTROL in clients:
+        threading.Thread(target=cursor_overlay.run, args=(lambda: is_streaming,), daemon=True).start()
+    if EXTEND in clients:
+        threading.Thread(target=extended_displays.run, args=(lambda: is_streaming,), daemon=True).start()
+    print("🚀 Streaming started")
+
+def stop_engine_if_idle():
+    """Last media client gone: the shared loops exit (monitor streams stop with their last viewer)"""
+    global is_streaming
+    with engine_lock:
+        if is_streaming and not any(clients[namespace] for namespace in MEDIA_NAMESPACES):
+            is_streaming = False
+            print("🛑 All media clients disconnected")
+
+# Screen viewers: share (view only) and control namespaces
+def on_viewer_connect():
+    sid = request.sid
+    clients[request.namespace].add(sid)
+    if request.namespace == CONTROL:
+        control_enabled[sid] = False
+    print(f"✅ {request.namespace[1:].capitalize()} viewer connected: {sid[:8]} (Total: {len(clients[request.namespace])})")
+
+    # Viewers of the same monitor share one capture stream, whatever their feature
+    info = streamer.screen_info(DEFAULT_MONITOR)
+    monitor_registry.subscribe(sid, info['index'], namespace=request.namespace)
+    emit("screen_info", info)
+    audio.join(sid)  # Audio rooms are per namespace
+    start_engine()
+
+def on_viewer_disconnect():
+    sid = request.sid
+    clients[request.namespace].discard(sid)
+    control_enabled.pop(sid, None)
+    counters = monitor_registry.unsubscribe(sid)
+    latency_tracker.remove(sid)
+    audio.remove(sid)
+    print(f"❌ {request.namespace[1:].capitalize()} viewer disconnected: {sid[:8]} (Remaining: {len(clients[request.namespace])})")
+    if counters:
+        print(f"   Frames sent: {counters['sent']}, dropped: {counters['dropped']}")
+    stop_engine_if_idle()
+
+def handle_frame_ack():
+    stream = monitor_registry.stream_of(request.sid)
+    if stream:
+        stream.broadcaster.ack(request.sid)
+
+def handle_select_monitor(data=None):
+    """Watch another monitor; unwatched monitors are not captured. Unknown indexes are ignored"""
+    try:
+        index = int(data.get('index'))
+    except (AttributeError, TypeError, ValueError):
+        return  # No usable index; stay on the current monitor
+    info = streamer.screen_info(index)  # Fresh layout, so a monitor plugged in since connecting is found
+    if info['index'] != index:
+        print(f"⚠️ Client {request.sid[:8]} asked for unknown monitor {index}")
+        return
+    monitor_registry.subscribe(request.sid, info['index'], namespace=request.namespace)
+    emit("screen_info", info)
+    print(f"🖥️ Client {request.sid[:8]} switched to monitor {info['index']}")
+
+def handle_set_viewport(data=None):
+    """Stream only the rectangle this viewer is zoomed into (null = whole monitor)"""
+    index, _ = monitor_registry.selection(request.sid)
+    info = streamer.screen_info(index or DEFAULT_MONITOR)
+    region = snap_viewport(info, data)
+    monitor_registry.subscribe(request.sid, info['index'], region, namespace=request.namespace)
+    info['viewport'] = relative_viewport(info, region)
+    emit("screen_info", info)
+
+def handle_latency_ack(data=None):
+    """Viewer's receive/display times for a stamped payload - glass-to-glass latency"""
+    try:
+        latency_tracker.ack(request.sid, data or {})
+    except (AttributeError, KeyError, TypeError):
+        pass  # Malformed ack; latency is best effort
+
+def handle_set_audio(data=None):
+    """
+    Viewer's audio codec - "opus" once it knows it can decode it (WebCodecs), "pcm" otherwise -
+    and profile (AUDIO_PROFILES, e.g. "mono16" for a phone); either can be left out to keep it
+    """
+    audio.select(request.sid, data)
+
+def handle_audio_buffer(data=None):
+    """Viewer's jitter buffer report: depth, target, underruns, drop/stretch and A/V offset"""
+    try:
+        latency_tracker.buffer(request.sid, data or {})
+    except (AttributeError, TypeError):
+        pass  # Malformed report; buffer stats are best effort
+
+def handle_ping(data=None):
+    """Keepalive; echoes the probe so the viewer can measure RTT"""
+    data = data if isinstance(data, dict) else {}
+    if data.get('rtt') is not None:
+        try:
+            latency_tracker.rtt(request.sid, data['rtt'])
+        except (TypeError, ValueError):
+            pass  # Malformed probe; RTT is best effort
+    emit("pong", data)
+
+for namespace in VIEWER_NAMESPACES:
+    socketio.on_event("connect", on_viewer_connect, namespace=namespace)
+    socketio.on_event("disconnect", on_viewer_disconnect, namespace=namespace)
+    socketio.on_event("frame_ack", handle_frame_ack, namespace=namespace)
+    socketio.on_event("select_monitor", handle_select_monitor, namespace=namespace)
+    socketio.on_event("set_viewport", handle_set_viewport, namespace=namespace)
+for namespace in MEDIA_NAMESPACES:
+    socketio.on_event("latency_ack", handle_latency_ack, namespace=namespace)
+    socketio.on_event("ping", handle_ping, namespace=namespace)
+    socketio.on_event("set_audio", handle_set_audio, namespace=namespace)
+    socketio.on_event("audio_buffer", handle_audio_buffer, namespace=namespace)
+
+# Remote control input (control namespace only)
+@socketio.on("mouse_move", namespace=CONTROL)
+@metrics.timed("input")
+def handle_mouse_move(data):
+    """Handle mouse movement from client"""
+    if control_enabled.get(request.sid, False):
+        index, region = monitor_registry.selection(request.sid)
+        remote_input.move(monitor_layout.get(index), region, data)
+
+@socketio.on("mouse_click", namespace=CONTROL)
+@metrics.timed("input")
+def handle_mouse_click(data):
+    """Handle mouse clicks from client"""
+    if control_enabled.get(request.sid, False):
+        remote_input.click(data)
+
+@socketio.on("mouse_scroll", namespace=CONTROL)
+@metrics.timed("input")
+def handle_mouse_scroll(data):
+    """Handle mouse scroll from client"""
+    if control_enabled.get(request.sid, False):
+        remote_input.scroll(data)
+
+@socketio.on("key_event", namespace=CONTROL)
+@metrics.timed("input")
+def handle_key_event(data):
+    """Handle keyboard events from client"""
+    if control_enabled.get(request.sid, False):
+        remote_input.key(data)
+
+@socketio.on("enable_control", namespace=CONTROL)
+def handle_enable_control(data):
+    """Enable/disable remote control for a client"""
+    sid = request.sid
+    enabled = data.get('enabled', False)
+    control_enabled[sid] = enabled
+    print(f"🎮 Control {'ENABLED' if enabled else 'DISABLED'} for client {sid[:8]}")
+    emit("control_status", {"enabled": enabled})
+
+# Extended display (extend namespace)
+@socketio.on("connect", namespace=EXTEND)
+def on_display_connect():
+    sid = request.sid
+    clients[EXTEND].add(sid)
+    print(f"✅ Display client connected: {sid[:8]}")
+
+    emit("screen_info", extended_displays.refresh_screen())
+    audio.join(sid)
+    start_engine()
+
+@socketio.on("disconnect", namespace=EXTEND)
+def on_display_disconnect():
+    sid = request.sid
+    clients[EXTEND].discard(sid)
+    display = extended_displays.remove(sid)
+    latency_tracker.remove(sid)
+    audio.remove(sid)
+    print(f"❌ Display client disconnected: {display['display_name'] if display else sid[:8]}")
+    stop_engine_if_idle()
+
+@socketio.on("set_display_mode", namespace=EXTEND)
+def handle_set_display_mode(data):
+    """Set client display mode and configuration"""
+    emit("display_configured", extended_displays.configure(request.sid, data))
+
+@socketio.on("client_mouse_move", namespace=EXTEND)
+@metrics.timed("input")
+def handle_client_mouse_move(data):
+    """Handle mouse movement from client - move host cursor"""
+    extended_displays.move_pointer(request.sid, data)
+
+@socketio.on("client_mouse_click", namespace=EXTEND)
+@metrics.timed("input")
+def handle_client_mouse_click(data):
+    """Handle mouse click from client"""
+    extended_displays.click(request.sid, data)
+
+@socketio.on("client_mouse_scroll", namespace=EXTEND)
+@metrics.timed("input")
+def handle_client_mouse_scroll(data):
+    """Handle scroll from client"""
+    extended_displays.scroll(request.sid, data)
+
+@socketio.on("client_key_event", namespace=EXTEND)
+@metrics.timed("input")
+def handle_client_key_event(data):
+    """Handle keyboard from client"""
+    if extended_displays.extended(request.sid):
+        remote_input.key(data)
+
+# File sharing (files namespace): live upload/delete notifications
+@socketio.on("connect", namespace=FILES)
+def on_files_connect():
+    clients[FILES].add(request.sid)
+    emit('connected', {'msg': 'Client connected'})
+
+@socketio.on("disconnect", namespace=FILES)
+def on_files_disconnect():
+    clients[FILES].discard(request.sid)
+
+def reject_connect():
+    """Features left out of FEATURES refuse connections (their handlers stay unreachable)"""
+    return False
+
+for namespace in (SHARE, CONTROL, EXTEND, FILES):
+    if namespace not in clients:
+        socketio.on_event("connect", reject_connect, namespace=namespace)
+
+if __name__ == "__main__":
+    if CAPTURE_PROCESS:
+        install_sigterm_handler()  # A terminated server takes its capture children and rings with it
+
+    print("=" * 60)
+    print("⚡ HostCast - Unified Host")
+    print("=" * 60)
+    print(f"📡 Server: http://0.0.0.0:5000 ({ASYNC_MODE})")
+    for name in FEATURES:
+        print(f"   /{name}")
+    print("=" * 60)
+    if "control" in FEATURES or "extend" in FEATURES:
+        print("\n⚠️  IMPORTANT: Run as Administrator for keyboard control!")
+        print("=" * 60)
+
+    try:
+        socketio.run(
+            app,
+            host="0.0.0.0",
+            port=5000,
+            debug=False,
+            use_reloader=False,
+            log_output=False
+        )
+    except KeyboardInterrupt:
+        print("\n🛑 Server stopped")
+        is_streaming = False
@@ -0,0 +1,6 @@
+"""
+HostCast - Shared Engine
+Capture, encoding, fan-out, audio, cursor and rendering helpers used by every
+HostCast server. The servers put the repository root on sys.path and import
+from here, so there is one copy of each for all of them.
+"""
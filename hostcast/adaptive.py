@@ -0,0 +1,109 @@
+"""
+HostCast - Adaptive Stream Controller
+Trades JPEG quality, output width and frame rate against backpressure
+"""
+import time
+
+
+class AdaptiveController:
+    """
+    Feedback loop evaluated every `interval` seconds.
+
+    Signals:
+      encode_ms  - average encode time per frame in the last window
+      queue      - frames waiting in a viewer's send queue (median viewer)
+      in_flight  - frames sent but not yet acknowledged by the viewer
+
+    Network congestion lowers quality first, then width, then FPS.
+    CPU overload lowers width, then FPS (quality barely changes encode time).
+    After `recover_windows` clean windows the steps are undone in reverse.
+    """
+
+    def __init__(self, quality, width, fps, quality_range, width_range, fps_range,
+                 enabled=True, interval=0.5, in_flight_limit=4, recover_windows=4):
+        self.enabled = enabled
+        self.interval = interval
+        self.in_flight_limit = in_flight_limit
+        self.recover_windows = recover_windows
+        self.quality_range = quality_range
+        self.width_range = width_range
+        self.fps_range = fps_range
+        self.initial = (quality, width, fps)
+        self.reset()
+
+    def reset(self):
+        self.quality, self.width, self.fps = self.initial
+        self.last_update = time.monotonic()
+        self.clean_windows = 0
+        self.reason = "initial"
+        self.signals = {}
+
+    def due(self):
+        return self.enabled and time.monotonic() - self.last_update >= self.interval
+
+    def update(self, encode_ms, workers, queue, queue_size, in_flight):
+        """Evaluate one window; returns True if any setting changed"""
+        self.last_update = time.monotonic()
+        cpu_fps = workers * 1000.0 / encode_ms if encode_ms else float('inf')
+        self.signals = {
+            'encode_ms': round(encode_ms, 2),
+            'cpu_fps': round(cpu_fps, 1) if encode_ms else None,
+            'queue': queue,
+            'in_flight': in_flight
+        }
+
+        congested = queue >= queue_size - 1 or in_flight > self.in_flight_limit
+        overloaded = cpu_fps < self.fps * 0.9
+        before = (self.quality, self.width, self.fps)
+
+        if congested:
+            self.clean_windows = 0
+            self._step_down(("quality", "width", "fps"), "network backpressure")
+        elif overloaded:
+            self.clean_windows = 0
+            self._step_down(("width", "fps"), "encoder overloaded")
+        else:
+            self.clean_windows += 1
+            if self.clean_windows >= self.recover_windows:
+                self.clean_windows = 0
+                # Only raise FPS/width if the encoder could sustain the next FPS step with margin
+                order = ("fps", "width", "quality") if cpu_fps > (self.fps + 5) * 1.2 else ("quality",)
+                self._step_up(order, "recovered")
+
+        return (self.quality, self.width, self.fps) != before
+
+    def _step_down(self, order, reason):
+        for knob in order:
+            if knob == "quality" and self.quality > self.quality_range[0]:
+                self.quality = max(self.quality_range[0], self.quality - 10)
+            elif knob == "width" and self.width > self.width_range[0]:
+                self.width = max(self.width_range[0], int(self.width * 0.8) // 16 * 16)
+            elif knob == "fps" and self.fps > self.fps_range[0]:
+                self.fps = max(self.fps_range[0], self.fps - 5)
+            else:
+                continue
+            self.reason = f"{reason}: lowered {knob}"
+            return
+
+    def _step_up(self, order, reason):
+        for knob in order:
+            if knob == "fps" and self.fps < self.fps_range[1]:
+                self.fps = min(self.fps_range[1], self.fps + 5)
+            elif knob == "width" and self.width < self.width_range[1]:
+                self.width = min(self.width_range[1], int(self.width * 1.25) // 16 * 16)
+            elif knob == "quality" and self.quality < self.quality_range[1]:
+                self.quality = min(self.quality_range[1], self.quality + 5)
+            else:
+                continue
+            self.reason = f"{reason}: raised {knob}"
+            return
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'quality': self.quality,
+            'width': self.width,
+            'fps': self.fps,
+            'reason': self.reason,
+            'signals': self.signals
+        }
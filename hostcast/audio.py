@@ -0,0 +1,674 @@
+"""
+HostCast - Audio Capture & Encoding
+A ring buffer filled from the PortAudio callback, per-viewer audio profiles
+(downmixed and resampled once per chunk), and Opus through PyAV (libopus) in
+place of raw PCM16, decoded in the browser with WebCodecs - plus the
+loopback capture and per-room sending every server shares
+
+Run `python -m hostcast.audio` from the repository root for the bandwidth ratio
+and added delay on a synthetic signal.
+"""
+import math
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+from flask_socketio import join_room, leave_room
+
+from .fanout import pack_bytes
+from .latency import AudioClock, now_ms
+
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)  # Rates libopus encodes natively; anything else goes to 48 kHz
+FRAME_DURATIONS = (2.5, 5, 10, 20, 40, 60)  # ms, the frame sizes Opus allows
+LAYOUTS = {1: "mono", 2: "stereo", 3: "2.1", 4: "quad", 6: "5.1", 8: "7.1"}
+
+# Formats a viewer can ask for with set_audio: (sample rate, channels), None = as captured
+AUDIO_PROFILES = {
+    "native": None,
+    "stereo48": (48000, 2),
+    "mono24": (24000, 1),
+    "mono16": (16000, 1)
+}
+
+# Speaker order of WASAPI's default channel masks per channel count
+SPEAKERS = {
+    1: ("FC",),
+    2: ("FL", "FR"),
+    3: ("FL", "FR", "LFE"),
+    4: ("FL", "FR", "BL", "BR"),
+    6: ("FL", "FR", "FC", "LFE", "BL", "BR"),
+    8: ("FL", "FR", "FC", "LFE", "BL", "BR", "SL", "SR")
+}
+STEREO_GAINS = {  # Speaker -> (left, right) gains for a stereo downmix (LFE is left out)
+    "FL": (1.0, 0.0), "FR": (0.0, 1.0), "FC": (0.7071, 0.7071),
+    "BL": (0.7071, 0.0), "BR": (0.0, 0.7071), "SL": (0.7071, 0.0), "SR": (0.0, 0.7071)
+}
+
+# PortAudio callback status flags and return code (pyaudio.paInputUnderflow, ...)
+PA_INPUT_UNDERFLOW = 1
+PA_INPUT_OVERFLOW = 2
+PA_CONTINUE = 0
+
+
+class AudioRing:
+    """
+    Preallocated PCM16 ring between the PortAudio callback (the only
+    writer) and the audio sender (the only reader). Neither side locks:
+    the writer announces how far it is about to write (`reserved`), copies
+    the block in, then advances `head`; the reader copies out up to `head`
+    and checks `reserved` afterwards to see whether it was lapped meanwhile.
+    So a sender stuck in a slow emit never makes the callback wait - and
+    the device never overruns because of the network.
+
+    If the sender falls more than the ring behind, the oldest audio is
+    overwritten: counted as an overrun and skipped by the reader.
+    Device-side overflow/underflow flags from PortAudio are counted too,
+    as are underruns - the sender waiting two callback periods for nothing
+    (WASAPI loopback also goes quiet while nothing is playing).
+    """
+
+    def __init__(self, rate, channels, capacity_ms=1000, period_frames=1024):
+        self.rate = rate
+        self.channels = channels
+        self.frame_bytes = 2 * channels  # paInt16
+        self.capacity = max(2 * period_frames, int(rate * capacity_ms / 1000))
+        self.period_frames = period_frames
+        self.buf = bytearray(self.capacity * self.frame_bytes)
+        self.view = memoryview(self.buf)
+        self.reserved = 0  # Frames written once the copy in progress lands
+        self.head = (0, 0.0)  # (frames ever written, capture time of the newest one in ms) - replaced in one go
+        self.read_pos = 0  # Frames ever read; reader only
+        self.ready = threading.Event()
+        self.callbacks = 0
+        self.device_overflows = 0
+        self.device_underflows = 0
+        self.overruns = 0
+        self.overrun_frames = 0
+        self.underruns = 0
+
+    def callback(self, in_data, frame_count, time_info, status):
+        """PortAudio stream_callback: copy the block into the ring and return at once"""
+        self.callbacks += 1
+        if status & PA_INPUT_OVERFLOW:
+            self.device_overflows += 1
+        if status & PA_INPUT_UNDERFLOW:
+            self.device_underflows += 1
+        if in_data:
+            self.write(in_data, now_ms())
+        return (None, PA_CONTINUE)
+
+    def write(self, data, t_ms):
+        size = len(self.buf)
+        data = memoryview(data)[-size:]
+        frames = len(data) // self.frame_bytes
+        written = self.head[0]
+        start = (written % self.capacity) * self.frame_bytes
+        first = min(len(data), size - start)
+        self.reserved = written + frames
+        self.view[start:start + first] = data[:first]
+        self.view[:len(data) - first] = data[first:]
+        self.head = (written + frames, t_ms)
+        self.ready.set()
+
+    def read(self, max_frames):
+        """(PCM16 bytes, frames skipped by overruns, capture time just after the last frame in ms)"""
+        written, t_ms = self.head
+        skipped = 0
+        if written - self.read_pos > self.capacity:
+            skipped = written - self.capacity - self.read_pos
+            self.read_pos = written - self.capacity
+        start_pos = self.read_pos
+        end_pos = min(written, start_pos + max_frames)
+        start = (start_pos % self.capacity) * self.frame_bytes
+        length = (end_pos - start_pos) * self.frame_bytes
+        first = min(length, len(self.buf) - start)
+        data = bytes(self.view[start:start + first]) + bytes(self.view[:length - first])
+
+        # Whatever the writer overwrote (or is overwriting) while we copied is torn - drop it
+        lapped = self.reserved - self.capacity - start_pos
+        if lapped > 0:
+            lapped = min(lapped, end_pos - start_pos)
+            data = data[lapped * self.frame_bytes:]
+            skipped += lapped
+        if skipped:
+            self.overruns += 1
+            self.overrun_frames += skipped
+        self.read_pos = end_pos
+        return data, skipped, t_ms - (written - end_pos) * 1000 / self.rate
+
+    def wait(self, min_frames, timeout):
+        """Block until `min_frames` are buffered; False (an underrun) if the device delivered nothing in time"""
+        deadline = time.monotonic() + timeout
+        while self.head[0] - self.read_pos < min_frames:
+            self.ready.clear()
+            if self.head[0] - self.read_pos >= min_frames:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.ready.wait(remaining):
+                self.underruns += 1
+                return False
+        return True
+
+    def buffered_ms(self):
+        return min(self.head[0] - self.read_pos, self.capacity) * 1000 / self.rate
+
+    def events(self):
+        """Counters for a /metrics gauge"""
+        return {
+            'overrun': self.overruns,
+            'underrun': self.underruns,
+            'device_overflow': self.device_overflows,
+            'device_underflow': self.device_underflows
+        }
+
+    def stats(self):
+        return {
+            'ring_ms': round(self.capacity * 1000 / self.rate),
+            'buffered_ms': round(self.buffered_ms(), 1),
+            'callbacks': self.callbacks,
+            'overruns': self.overruns,
+            'overrun_ms': round(self.overrun_frames * 1000 / self.rate, 1),
+            'underruns': self.underruns,
+            'device_overflows': self.device_overflows,
+            'device_underflows': self.device_underflows
+        }
+
+
+def downmix_matrix(in_channels, out_channels):
+    """
+    (in_channels, out_channels) gains: surround to stereo the usual way
+    (centre and surrounds at -3 dB into both sides), then stereo to mono by
+    averaging. Each output is scaled so a full-scale input can't clip.
+    Unknown layouts keep their first two channels.
+    """
+    speakers = SPEAKERS.get(in_channels)
+    if speakers is None:
+        stereo = np.zeros((in_channels, 2), dtype=np.float32)
+        stereo[0, 0] = stereo[min(1, in_channels - 1), 1] = 1.0
+    else:
+        stereo = np.array([STEREO_GAINS.get(speaker, (0.0, 0.0)) for speaker in speakers], dtype=np.float32)
+    matrix = stereo if out_channels == 2 else stereo.mean(axis=1, keepdims=True)
+    return matrix / np.maximum(matrix.sum(axis=0), 1.0)
+
+
+class Resampler:
+    """
+    Streaming rate conversion of float32 (frames, channels) blocks with a
+    Kaiser-windowed sinc polyphase filter: one precomputed filter per output
+    phase, applied to every output sample of a block at once. Stopband and
+    passband error are around -90 dB (libsoxr "HQ" territory), but the
+    filter only waits for `half` input samples (~1 ms) where soxr's
+    steeper streaming filters hold back 20-30 ms. The filter's tail is
+    carried between blocks, so chunk boundaries are seamless.
+    """
+
+    def __init__(self, in_rate, out_rate, channels, zero_crossings=16, beta=8.6):
+        self.channels = channels
+        g = math.gcd(in_rate, out_rate)
+        self.up, self.down = out_rate // g, in_rate // g
+        cutoff = min(1.0, self.up / self.down) * 0.95  # Of the input Nyquist frequency, with a small transition band
+        self.half = math.ceil(zero_crossings / cutoff)
+        taps = np.arange(-self.half + 1, self.half + 1)
+        x = taps[None, :] - np.arange(self.up)[:, None] / self.up  # Distance of each tap from the output sample, per phase
+        window = np.i0(beta * np.sqrt(np.clip(1 - (x / self.half) ** 2, 0, 1))) / np.i0(beta)  # Kaiser, at each tap
+        bank = cutoff * np.sinc(cutoff * x) * window
+        self.bank = (bank / bank.sum(axis=1, keepdims=True)).astype(np.float32)
+        self.taps = taps
+        self.tail = np.zeros((self.half - 1, channels), dtype=np.float32)
+        self.pos = (self.half - 1) * self.up  # Next output sample, in 1/up input samples from the tail's start
+
+    def process(self, block):
+        buffer = np.concatenate((self.tail, block))
+        last = (len(buffer) - self.half) * self.up  # Outputs before this need no input we haven't got yet
+        count = max(0, -(-(last - self.pos) // self.down))
+        positions = self.pos + np.arange(count) * self.down
+        phase = positions % self.up
+        index = (positions // self.up)[:, None] + self.taps[None, :]  # (outputs, taps) input samples
+        weights = self.bank[phase]
+        out = np.empty((count, self.channels), dtype=np.float32)
+        for channel in range(self.channels):
+            out[:, channel] = (weights * buffer[:, channel][index]).sum(axis=1)
+        self.pos += count * self.down
+        drop = min(len(buffer), max(0, self.pos // self.up - self.half + 1))
+        self.tail = buffer[drop:]
+        self.pos -= drop * self.up
+        return out
+
+
+class AudioConverter:
+    """PCM16 chunks from the capture format to one profile's rate and channel count"""
+
+    def __init__(self, rate, channels, out_rate, out_channels):
+        self.rate = rate
+        self.channels = channels
+        self.out_rate = out_rate
+        self.out_channels = out_channels
+        self.matrix = downmix_matrix(channels, out_channels) if out_channels != channels else None
+        self.resampler = Resampler(rate, out_rate, out_channels) if out_rate != rate else None
+        self.frames_in = 0
+        self.frames_out = 0
+        self.chunks = 0
+        self.convert_time = 0.0
+
+    def convert(self, pcm):
+        """(PCM16 bytes, how far the output's first sample lies before the chunk's, in ms)"""
+        start = time.perf_counter()
+        samples = np.frombuffer(pcm, dtype=np.int16).reshape(-1, self.channels).astype(np.float32)
+        delay_ms = (self.frames_in / self.rate - self.frames_out / self.out_rate) * 1000
+        self.frames_in += len(samples)
+        if self.matrix is not None:
+            samples = samples @ self.matrix
+        if self.resampler:
+            samples = self.resampler.process(samples)
+        self.frames_out += len(samples)
+        out = np.clip(np.rint(samples), -32768, 32767).astype(np.int16).tobytes()
+        self.chunks += 1
+        self.convert_time += time.perf_counter() - start
+        return out, delay_ms
+
+
+class AudioProfiles:
+    """
+    The formats viewers asked for, produced once per captured chunk:
+    each distinct (rate, channels) gets one converter and, for Opus
+    viewers, one encoder - shared by every viewer and profile that maps to
+    it. So the work grows with the formats in use, never with viewers.
+    A format nobody wants is dropped and starts afresh when asked for again.
+    """
+
+    def __init__(self, rate, channels, codec="opus", bitrate=64000, frame_ms=20, observe=None):
+        self.rate = rate
+        self.channels = channels
+        self.codec = codec
+        self.bitrate = bitrate
+        self.frame_ms = frame_ms
+        self.observe = observe
+        self.converters = {}  # (rate, channels) -> AudioConverter, or None for the capture format
+        self.encoders = {}  # (rate, channels) -> OpusEncoder
+
+    def format(self, profile):
+        """(rate, channels) a profile maps to from this device; never upmixed or upsampled past the capture"""
+        target = AUDIO_PROFILES.get(profile)
+        if target is None:
+            return (self.rate, self.channels)
+        rate, channels = target
+        return (min(rate, self.rate), min(channels, self.channels))
+
+    def convert(self, pcm, formats, opus_formats=()):
+        """{format: (PCM16 bytes, conversion delay in ms)} for this chunk; encoders outside `opus_formats` are dropped"""
+        for stale in set(self.converters) - set(formats):
+            del self.converters[stale]
+        for stale in set(self.encoders) - set(opus_formats):
+            del self.encoders[stale]
+        converted = {}
+        for rate, channels in formats:
+            if (rate, channels) == (self.rate, self.channels):
+                converted[(rate, channels)] = (pcm, 0.0)
+                self.converters[(rate, channels)] = None
+                continue
+            converter = self.converters.get((rate, channels))
+            if converter is None:
+                converter = self.converters[(rate, channels)] = AudioConverter(self.rate, self.channels, rate, channels)
+            converted[(rate, channels)] = converter.convert(pcm)
+        return converted
+
+    def encoder(self, fmt):
+        """The format's OpusEncoder, or None (send PCM) when Opus is off or unavailable"""
+        if self.codec != "opus":
+            return None
+        if fmt not in self.encoders:
+            rate, channels = fmt
+            # Fewer channels and less bandwidth need fewer bits for the same quality
+            scale = min(channels, 2) * rate / (min(self.channels, 2) * self.rate)
+            bitrate = self.bitrate if scale >= 1 else max(16000, round(self.bitrate * scale))
+            encoder = create_audio_encoder(self.codec, rate, channels, bitrate, self.frame_ms, self.observe)
+            if encoder is None:
+                self.codec = "pcm"  # PyAV missing: don't try again for every chunk
+                return None
+            self.encoders[fmt] = encoder
+        return self.encoders[fmt]
+
+    def stats(self):
+        formats = []
+        for (rate, channels), converter in sorted(self.converters.items(), reverse=True):
+            encoder = self.encoders.get((rate, channels))
+            formats.append({
+                'rate': rate,
+                'channels': channels,
+                'avg_convert_ms': round(converter.convert_time / converter.chunks * 1000, 3)
+                if converter and converter.chunks else 0.0,
+                'opus': encoder.stats() if encoder else None
+            })
+        return {'codec': self.codec, 'formats': formats}
+
+
+class OpusEncoder:
+    """
+    Loopback PCM16 chunks in, Opus packets out - one packet per `frame_ms`.
+    Surround loopback devices are downmixed to stereo. libopus runs at the
+    input rate when it supports it (so mono16/mono24 are not resampled back
+    up); other rates (44.1 kHz) are resampled to 48 kHz by PyAV on the way in.
+
+    A capture chunk rarely holds a whole number of Opus frames; the
+    remainder waits for the next chunk, so the added delay stays below
+    one frame (plus libopus's 2.5 ms lookahead in low-delay mode).
+    """
+
+    def __init__(self, rate, channels, bitrate=64000, frame_ms=20, observe=None):
+        import av
+        if frame_ms not in FRAME_DURATIONS:
+            raise ValueError(f"Opus frame size must be one of {FRAME_DURATIONS} ms, got {frame_ms}")
+        self.av = av
+        self.observe = observe or (lambda stage, seconds: None)  # Stage timings for /metrics
+        self.rate = rate
+        self.channels = channels
+        self.out_channels = 1 if channels == 1 else 2
+        self.input_layout = LAYOUTS.get(channels)  # None: unknown layout, keep the first two channels
+        self.bitrate = bitrate
+        self.frame_ms = frame_ms
+        self.sample_rate = rate if rate in OPUS_RATES else 48000  # What libopus encodes and the viewer decodes at
+        self.context = av.CodecContext.create("libopus", "w")
+        self.context.sample_rate = self.sample_rate
+        self.context.layout = LAYOUTS[self.out_channels]
+        self.context.format = "s16"
+        self.context.bit_rate = bitrate
+        self.context.options = {"frame_duration": str(frame_ms), "application": "lowdelay"}
+        self.context.open()
+        self.frame_samples = self.context.frame_size
+        self.frames_in = 0  # Input frames at `rate`; converted to `sample_rate` to compare with packets * frame_samples
+        self.packets = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.encode_time = 0.0
+
+    def encode(self, pcm):
+        """Opus packets completed by this PCM16 chunk (possibly none)"""
+        start = time.perf_counter()
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        layout = self.input_layout
+        if layout is None:
+            samples = samples.reshape(-1, self.channels)[:, :2].reshape(-1)
+            layout = "stereo"
+        frame = self.av.AudioFrame.from_ndarray(samples.reshape(1, -1), format="s16", layout=layout)
+        frame.sample_rate = self.rate
+        packets = [bytes(packet) for packet in self.context.encode(frame)]
+
+        elapsed = time.perf_counter() - start
+        self.observe("audio_encode", elapsed)
+        self.encode_time += elapsed
+        self.frames_in += samples.size // (2 if self.input_layout is None else self.channels)
+        self.packets += len(packets)
+        self.bytes_in += len(pcm)
+        self.bytes_out += sum(len(packet) for packet in packets)
+        return packets
+
+    def buffered_ms(self):
+        """Audio waiting in the encoder for a full frame - the delay Opus adds right now"""
+        samples_in = self.frames_in * self.sample_rate / self.rate
+        return max(0, samples_in - self.packets * self.frame_samples) * 1000 / self.sample_rate
+
+    def stats(self):
+        return {
+            'codec': "opus",
+            'rate': self.sample_rate,
+            'bitrate': self.bitrate,
+            'frame_ms': self.frame_ms,
+            'channels': self.out_channels,
+            'packets': self.packets,
+            'ratio': round(self.bytes_in / self.bytes_out, 1) if self.bytes_out else None,
+            'buffered_ms': round(self.buffered_ms(), 1),
+            'avg_encode_ms': round(self.encode_time / self.packets * 1000, 3) if self.packets else 0.0
+        }
+
+
+def create_audio_encoder(codec, rate, channels, bitrate=64000, frame_ms=20, observe=None):
+    """An OpusEncoder, or None (raw PCM16) when the codec or PyAV is unavailable"""
+    if codec != "opus":
+        return None
+    try:
+        return OpusEncoder(rate, channels, bitrate, frame_ms, observe)
+    except ImportError as e:
+        print(f"⚠️ Opus unavailable ({e}) - sending PCM audio")
+    except ValueError as e:
+        print(f"⚠️ {e} - sending PCM audio")
+    return None
+
+
+class LoopbackAudio:
+    """
+    System audio for one server's viewers. Each viewer listens in a room per
+    (codec, profile) it asked for; a captured chunk is converted and encoded
+    once per format in use and emitted once per room list, so the cost never
+    grows with viewers. capture() is the sending thread: PortAudio's callback
+    fills an AudioRing of `ring_ms` and the thread sends what has arrived,
+    up to `batch` chunks per payload.
+    """
+
+    def __init__(self, fanout, metrics, chunk=2048, ring_ms=1000, batch=4, codec="opus", bitrate=64000,
+                 frame_ms=20, binary=True, namespaces=None):
+        self.fanout = fanout
+        self.metrics = metrics
+        self.chunk = chunk  # Frames per PortAudio callback
+        self.ring_ms = ring_ms
+        self.batch = batch
+        self.codec = codec
+        self.bitrate = bitrate
+        self.frame_ms = frame_ms
+        self.binary = binary
+        self.namespaces = namespaces or (lambda: ('/',))  # Namespaces with listeners right now
+        self.streams = {}  # sid -> (codec, profile) from set_audio
+        self.profiles = None  # AudioProfiles while audio is captured, for /stats
+        self.ring = None  # AudioRing of the last capture (its counters stay on /stats)
+
+    def join(self, sid):
+        """New viewer: native PCM audio until it asks for Opus or a profile"""
+        self.streams[sid] = ("pcm", "native")
+        join_room("audio:pcm:native")
+
+    def select(self, sid, data):
+        """
+        Viewer's audio codec - "opus" once it knows it can decode it (WebCodecs), "pcm" otherwise -
+        and profile (AUDIO_PROFILES, e.g. "mono16" for a phone); either can be left out to keep it
+        """
+        data = data if isinstance(data, dict) else {}
+        codec, profile = self.streams.get(sid, ("pcm", "native"))
+        leave_room(f"audio:{codec}:{profile}")
+        if 'codec' in data:
+            codec = "opus" if data['codec'] == "opus" else "pcm"
+        if data.get('profile') in AUDIO_PROFILES:
+            profile = data['profile']
+        join_room(f"audio:{codec}:{profile}")
+        self.streams[sid] = (codec, profile)
+
+    def remove(self, sid):
+        self.streams.pop(sid, None)
+
+    def pack(self, data):
+        return pack_bytes(data, self.binary, self.metrics)
+
+    def payloads(self, data, stamp, profiles):
+        """
+        [(payload, rooms)] for this PCM16 chunk, one per format actually sent: every
+        (codec, profile) in use maps to a format, and profiles that share one
+        are converted and encoded once (Opus falls back to PCM without PyAV)
+        """
+        formats = {(codec, profile): profiles.format(profile) for codec, profile in set(self.streams.values())}
+        opus_formats = {fmt for (codec, _), fmt in formats.items() if codec == "opus"}
+        converted = profiles.convert(data, set(formats.values()), opus_formats)
+        payloads = {}  # (codec sent, format) -> (payload, rooms)
+        for (codec, profile), fmt in sorted(formats.items()):
+            opus = profiles.encoder(fmt) if codec == "opus" else None
+            key = ("opus" if opus else "pcm", fmt)
+            if key not in payloads:
+                pcm, delay_ms = converted[fmt]
+                t = stamp['t'] - delay_ms  # Resampling releases the output a little after the input
+                if opus:
+                    held_ms = opus.buffered_ms()  # The first packet starts this much before the chunk
+                    packets = opus.encode(pcm)
+                    payload = {
+                        "codec": "opus",
+                        "packets": [self.pack(packet) for packet in packets],
+                        "rate": opus.sample_rate,
+                        "channels": opus.out_channels,
+                        "frame_ms": opus.frame_ms,
+                        **stamp,
+                        "t": round(t - held_ms, 1),
+                        "dur": len(packets) * opus.frame_ms
+                    } if packets else None
+                else:
+                    payload = {
+                        "data": self.pack(pcm),
+                        "rate": fmt[0],
+                        "channels": fmt[1],
+                        **stamp,
+                        "t": round(t, 1)
+                    }
+                payloads[key] = (payload, [])
+            payloads[key][1].append(f"audio:{codec}:{profile}")
+        return [(payload, rooms) for payload, rooms in payloads.values() if payload]
+
+    def send(self, data, stamp, profiles):
+        """Convert/encode a chunk once, then emit the same payloads to every namespace with listeners"""
+        payloads = self.payloads(data, stamp, profiles)
+        for namespace in self.namespaces():
+            for payload, rooms in payloads:
+                with self.metrics.stage("emit"):
+                    self.fanout.emit("audio", payload, room=rooms, namespace=namespace)  # One serialization for all the rooms
+                self.metrics.count_sent("audio", payload)
+
+    @staticmethod
+    def loopback_device(pyaudio, p):
+        """WASAPI loopback device of the default speakers, or None"""
+        try:
+            wasapi_info = p.get_host_api_info_by_type(pyaudio.paWASAPI)
+            default_speakers = p.get_device_info_by_index(wasapi_info["defaultOutputDevice"])
+
+            if not default_speakers["isLoopbackDevice"]:
+                for loopback in p.get_loopback_device_info_generator():
+                    if default_speakers["name"] in loopback["name"]:
+                        print(f"🎤 Loopback: {loopback['name']}")
+                        return loopback
+            return default_speakers
+        except Exception as e:
+            print(f"❌ Loopback error: {e}")
+            return None
+
+    def create_profiles(self, rate, channels):
+        self.profiles = AudioProfiles(rate, channels, self.codec, self.bitrate, self.frame_ms, self.metrics.observe)
+        print(f"✅ Audio started ({'Opus' if self.codec == 'opus' else 'PCM'}, profiles: {', '.join(AUDIO_PROFILES)})")
+        return self.profiles
+
+    def capture(self, active):
+        """Capture system audio while active(): PortAudio's callback fills a ring, this thread batches and sends it"""
+        import pyaudiowpatch as pyaudio
+        chunk = self.chunk
+        p = pyaudio.PyAudio()
+        stream = None
+
+        try:
+            loopback = self.loopback_device(pyaudio, p)
+            if not loopback:
+                print("⚠️ No loopback device - audio disabled")
+                return
+
+            rate = int(loopback["defaultSampleRate"])
+            channels = int(loopback["maxInputChannels"])
+
+            print(f"🎵 Audio: {rate}Hz, {channels}ch")
+
+            # PortAudio calls ring.callback on its own thread for every chunk; it only
+            # copies into the ring, so a stalled emit here can never overrun the device
+            ring = self.ring = AudioRing(rate, channels, self.ring_ms, chunk)
+            stream = p.open(
+                format=pyaudio.paInt16,  # The ring, profiles and Opus all take PCM16
+                channels=channels,
+                rate=rate,
+                input=True,
+                input_device_index=loopback["index"],
+                frames_per_buffer=chunk,
+                stream_callback=ring.callback
+            )
+
+            stream.start_stream()
+            profiles = self.create_profiles(rate, channels)
+            audio_clock = AudioClock(rate)  # Same clock as the frame stamps, advanced by sample count
+
+            audio_seq = 0
+            period = chunk / rate
+
+            while active() and stream.is_active():
+                if not ring.wait(chunk, 2 * period):
+                    continue  # Nothing from the device for two periods (counted as an underrun)
+                # Everything buffered, up to `batch` periods, goes out as one payload
+                with self.metrics.stage("audio_read"):
+                    data, skipped, end_ms = ring.read(chunk * self.batch)
+                if skipped:
+                    audio_clock.skip(skipped)  # Overwritten while the sender was stalled (counted as an overrun)
+                if not data:
+                    continue
+                stamp = audio_clock.stamp(audio_seq, len(data) // ring.frame_bytes, end_ms)
+                audio_seq += 1
+
+                try:
+                    self.send(data, stamp, profiles)
+                except Exception as e:
+                    print(f"⚠️ Audio send error: {e}")
+
+        except Exception as e:
+            print(f"❌ Audio error: {e}")
+        finally:
+            self.profiles = None
+            print("🛑 Audio stopped")
+            if stream:
+                try:
+                    stream.stop_stream()
+                    stream.close()
+                except Exception as e:
+                    print(f"⚠️ Audio stream close error: {e}")
+            p.terminate()
+
+    def events(self):
+        """Loopback ring overruns/underruns and PortAudio flags, for a /metrics gauge"""
+        return self.ring.events() if self.ring else {}
+
+    def stats(self):
+        return {
+            **(self.profiles.stats() if self.profiles else {'codec': "pcm", 'formats': []}),
+            'viewers': dict(Counter(f"{codec}:{profile}" for codec, profile in list(self.streams.values()))),
+            'capture': self.ring.stats() if self.ring else None
+        }
+
+
+if __name__ == "__main__":
+    rate, channels, chunk = 48000, 2, 2048
+    t = np.arange(rate * 10) / rate
+    # Music-like test signal: a few tones with a slow tremolo and a little noise
+    signal = sum(np.sin(2 * np.pi * f * t) for f in (220, 330, 440, 660)) * (0.6 + 0.4 * np.sin(2 * np.pi * 0.5 * t))
+    signal = signal / 4 + np.random.default_rng(1).normal(0, 0.02, t.size)
+    pcm = (np.repeat(signal[:, None], channels, axis=1) * 12000).astype(np.int16)
+
+    print(f"🎵 Opus vs PCM16, {rate} Hz {channels}ch, {chunk}-sample capture chunks")
+    for bitrate in (32000, 64000, 96000):
+        for frame_ms in (10, 20):
+            encoder = OpusEncoder(rate, channels, bitrate, frame_ms)
+            worst = 0.0
+            for i in range(0, len(pcm) - chunk, chunk):
+                encoder.encode(pcm[i:i + chunk].tobytes())
+                worst = max(worst, encoder.buffered_ms())
+            stats = encoder.stats()
+            print(f"   {bitrate // 1000:>3} kbit/s {frame_ms:>2} ms frames: {stats['ratio']:>5}x smaller, "
+                  f"held back <= {worst:.1f} ms, {stats['avg_encode_ms']:.3f} ms/packet")
+
+    print(f"🎚️ Audio profiles from {rate} Hz {channels}ch PCM16")
+    profiles = AudioProfiles(rate, channels, codec="pcm")
+    formats = {}
+    for name in AUDIO_PROFILES:
+        formats.setdefault(profiles.format(name), []).append(name)
+    for i in range(0, len(pcm) - chunk, chunk):
+        profiles.convert(pcm[i:i + chunk].tobytes(), set(formats))
+    for stats in profiles.stats()['formats']:
+        names = "/".join(formats[(stats['rate'], stats['channels'])])
+        kbits = stats['rate'] * stats['channels'] * 16 // 1000
+        print(f"   {names:>15}: {stats['rate']} Hz {stats['channels']}ch, {kbits:>4} kbit/s, "
+              f"{stats['avg_convert_ms']:.3f} ms/chunk")
@@ -0,0 +1,163 @@
+"""
+HostCast - Frame Broadcaster
+Encode once, fan out to every viewer through its own bounded send queue
+"""
+import threading
+import time
+from collections import deque
+
+from .fanout import ThreadFanOut
+
+
+class ClientQueue:
+    """Bounded send queue for one viewer - drops the oldest item when full"""
+
+    def __init__(self, sid, maxlen, ready=None, namespace=None):
+        self.sid = sid
+        self.namespace = namespace  # Socket.IO namespace the viewer joined (None = the broadcaster's)
+        self.maxlen = maxlen
+        self.items = deque()
+        self.lock = threading.Lock()  # Never held across a wait, so green senders can share it
+        self.ready = ready or threading.Event()  # Set while items are queued (green Event in async mode)
+        self.active = True
+        self.sent = 0
+        self.dropped = 0
+        self.acked = 0  # Frames the viewer confirmed receiving (0 = client never acks)
+
+    def put(self, item):
+        """Queue an item, returning the one dropped to make room (if any)"""
+        dropped = None
+        with self.lock:
+            if len(self.items) >= self.maxlen:
+                dropped = self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+        self.ready.set()
+        return dropped
+
+    def get(self, timeout=1.0):
+        """Block until an item is available, None on timeout or close"""
+        with self.lock:
+            if not self.items:
+                self.ready.clear()
+        if self.active:
+            self.ready.wait(timeout)
+        with self.lock:
+            if not self.active or not self.items:
+                return None
+            return self.items.popleft()
+
+    def close(self):
+        with self.lock:
+            self.active = False
+            self.items.clear()
+        self.ready.set()
+
+    def depth(self):
+        with self.lock:
+            return len(self.items)
+
+
+class FrameBroadcaster:
+    """Shares each published payload with all viewers without blocking the producer"""
+
+    def __init__(self, socketio, namespace='/', queue_size=2, metrics=None, fanout=None):
+        self.socketio = socketio
+        self.metrics = metrics  # Optional Metrics: emit timings and bytes sent
+        self.fanout = fanout or ThreadFanOut(socketio)  # Where senders run (OS threads or the event loop)
+        self.namespace = namespace
+        self.queue_size = queue_size
+        self.clients = {}
+        self.lock = threading.Lock()
+        self.keyframe_requested = False
+
+    def add_client(self, sid, namespace=None):
+        queue = ClientQueue(sid, self.queue_size, self.fanout.event(), namespace)
+        with self.lock:
+            old = self.clients.get(sid)
+            self.clients[sid] = queue
+            self.keyframe_requested = True  # New viewers need a full picture
+        if old:
+            old.close()
+        self.fanout.spawn(self._sender, queue)
+
+    def remove_client(self, sid):
+        """Stop the viewer's sender and return its final counters"""
+        with self.lock:
+            queue = self.clients.pop(sid, None)
+        if not queue:
+            return None
+        queue.close()
+        return {'sent': queue.sent, 'dropped': queue.dropped}
+
+    def publish(self, event, payload, delta=False):
+        """
+        Queue one already-encoded payload for every viewer.
+        Delta payloads depend on earlier ones - dropping one asks for a keyframe.
+        """
+        self.fanout.call(self._publish, event, payload, delta)
+
+    def _publish(self, event, payload, delta):
+        with self.lock:
+            queues = list(self.clients.values())
+        for queue in queues:
+            dropped = queue.put((event, payload, delta))
+            if dropped and dropped[2]:
+                self.keyframe_requested = True
+
+    def consume_keyframe_request(self):
+        """True once after a viewer joined or lost a delta payload"""
+        with self.lock:
+            requested = self.keyframe_requested
+            self.keyframe_requested = False
+        return requested
+
+    def ack(self, sid):
+        with self.lock:
+            queue = self.clients.get(sid)
+        if queue:
+            queue.acked += 1
+
+    def backpressure(self):
+        """Median send-queue depth and unacknowledged frames across viewers"""
+        with self.lock:
+            queues = list(self.clients.values())
+        if not queues:
+            return 0, 0
+        depths = sorted(queue.depth() for queue in queues)
+        in_flight = sorted(queue.sent - queue.acked for queue in queues if queue.acked)
+        return depths[len(depths) // 2], in_flight[len(in_flight) // 2] if in_flight else 0
+
+    def client_count(self):
+        with self.lock:
+            return len(self.clients)
+
+    def stats(self):
+        with self.lock:
+            queues = list(self.clients.values())
+        return {
+            queue.sid: {
+                'queued': queue.depth(),
+                'sent': queue.sent,
+                'dropped': queue.dropped,
+                'in_flight': queue.sent - queue.acked if queue.acked else None
+            }
+            for queue in queues
+        }
+
+    def _sender(self, queue):
+        """Drain one viewer's queue - a slow socket only stalls this sender"""
+        while queue.active:
+            item = queue.get()
+            if item is None:
+                continue
+            event, payload, _ = item
+            try:
+                start = time.perf_counter()
+                self.socketio.emit(event, payload, room=queue.sid, namespace=queue.namespace or self.namespace)
+                queue.sent += 1
+                if self.metrics:
+                    self.metrics.observe("emit", time.perf_counter() - start)
+                    self.metrics.count_sent(event, payload)
+            except Exception as e:
+                print(f"⚠️ Send error ({queue.sid[:8]}): {e}")
@@ -0,0 +1,173 @@
+"""
+HostCast - Frame Buffer Ring
+Preallocated capture buffers reused across frames instead of allocated per grab
+
+Run `python -m hostcast.buffers` from the repository root to check per-frame
+allocations (tracemalloc, Pillow blocks, RSS).
+"""
+import os
+import queue
+import numpy as np
+from PIL import Image
+
+
+class FrameRing:
+    """
+    Fixed pool of BGRA capture slots. The capture thread takes a slot per
+    grab and the slot returns to the pool when its encode job completes,
+    so at most `slots` frame buffers ever exist.
+    """
+
+    def __init__(self, slots=6, timeout=0.5):
+        self.slots = slots
+        self.timeout = timeout
+        self.shape = None
+        self.free = queue.SimpleQueue()
+        self.owned = set()
+        self.misses = 0
+
+    def _allocate(self, shape):
+        # New resolution: slots of the old size are dropped as they come back
+        self.shape = shape
+        self.free = queue.SimpleQueue()
+        self.owned = set()
+        for _ in range(self.slots):
+            slot = np.empty(shape, dtype=np.uint8)
+            self.owned.add(id(slot))
+            self.free.put(slot)
+
+    def acquire(self, height, width):
+        """A free (height, width, 4) slot; a temporary array if all are busy"""
+        shape = (height, width, 4)
+        if shape != self.shape:
+            self._allocate(shape)
+        try:
+            return self.free.get(timeout=self.timeout)
+        except queue.Empty:
+            self.misses += 1
+            return np.empty(shape, dtype=np.uint8)
+
+    def release(self, slot):
+        if id(slot) in self.owned and slot.shape == self.shape:
+            self.free.put(slot)
+
+    def release_after(self, future, slot):
+        """Return the slot once its encode job is done (now if there is no job)"""
+        if future is None:
+            self.release(slot)
+        else:
+            future.add_done_callback(lambda _: self.release(slot))
+
+    def stats(self):
+        return {
+            'slots': self.slots,
+            'free': self.free.qsize(),
+            'misses': self.misses
+        }
+
+
+def enable_image_arena(blocks):
+    """Let Pillow keep freed image blocks for reuse instead of returning them to the OS"""
+    Image.core.set_blocks_max(blocks)
+
+
+def _rss():
+    """Resident set size in bytes via psutil or /proc; None where neither is available"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def measure(encoder, ring, frames=20, shape=(2160, 3840), size=(1280, 720), quality=70):
+    """
+    Memory cost per frame beyond the JPEG payload itself, from three views:
+    'traced'  - average transient Python/NumPy allocation (tracemalloc),
+    'blocks'  - Pillow image blocks newly malloc'd per frame (not served by its arena),
+    'rss'     - process resident memory growth over the run (None if unavailable),
+    'growth'  - net traced growth over the run.
+    tracemalloc cannot see Pillow's or libjpeg's C allocations; the block count
+    and RSS cover those, but RSS only moves when the allocator grows the heap.
+    The grab buffer is created once - mss allocates its own per grab,
+    which is outside HostCast's control.
+    """
+    import tracemalloc
+
+    height, width = shape
+    grab = np.zeros((height, width, 4), dtype=np.uint8)
+    grab[:, :, 1] = np.arange(width, dtype=np.uint32)[None, :] % 256
+    raw = bytearray(grab.tobytes())
+
+    def frame(i):
+        raw[i * 4:i * 4 + 4] = b"\xff\xff\xff\x00"  # Touch the buffer like a new capture
+        view = np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 4)
+        if ring is None:
+            return view
+        slot = ring.acquire(height, width)
+        np.copyto(slot, view)
+        return slot
+
+    def encode(i):
+        bgra = frame(i)
+        data = encoder.encode(encoder.source(bgra), size, quality)
+        if ring is not None:
+            ring.release(bgra)
+        return data
+
+    for i in range(3):
+        encode(i)  # Warm up scratch buffers and Pillow's arena
+
+    # Untraced pass first: tracemalloc's own bookkeeping would show up in RSS
+    blocks_start = Image.core.get_stats()
+    rss_start = _rss()
+    for i in range(frames):
+        encode(i)
+    rss_end = _rss()
+    blocks_end = Image.core.get_stats()
+    new_blocks = sum(blocks_end[key] - blocks_start[key] for key in ('allocated_blocks', 'reallocated_blocks'))
+
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    transient = 0
+    for i in range(frames):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        data = encode(i)
+        peak = tracemalloc.get_traced_memory()[1]
+        transient += max(0, peak - before - len(data))
+        del data
+    growth = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return {
+        'traced': transient / frames,
+        'blocks': new_blocks / frames,
+        'rss': rss_end - rss_start if rss_start is not None and rss_end is not None else None,
+        'growth': growth
+    }
+
+
+if __name__ == "__main__":
+    from .encoders import ENCODERS
+
+    enable_image_arena(16)
+    print("📏 Memory per 4K frame (excluding the JPEG payload)")
+    for name, cls in ENCODERS.items():
+        for reuse in (False, True):
+            try:
+                encoder = cls(reuse_buffers=reuse)
+            except (ImportError, OSError, RuntimeError):
+                print(f"   {name:<10} unavailable")
+                break
+            ring = FrameRing(2) if reuse else None
+            result = measure(encoder, ring)
+            mode = "buffer ring" if reuse else "per frame"
+            rss = f"{result['rss'] / 1024:.0f} KB" if result['rss'] is not None else "n/a"
+            print(f"   {name:<10} {mode:<11} {result['traced'] / 1024:>9.1f} KB/frame traced  "
+                  f"{result['blocks']:>5.1f} Pillow blocks/frame  (RSS growth {rss}, "
+                  f"traced growth {result['growth'] / 1024:.1f} KB)")
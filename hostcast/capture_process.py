@@ -0,0 +1,388 @@
+"""
+HostCast - Capture Process
+Screen capture and encoding in a child process, handing encoded frames to the web process through a shared-memory ring
+"""
+import atexit
+import importlib.util
+import multiprocessing
+import signal
+import struct
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+
+RING_HEADER = struct.Struct("<Q")  # Newest published sequence number (0 = none yet)
+SLOT_HEADER = struct.Struct("<QQQd")  # Slot sequence, payload length, capture frame seq, capture time (ms)
+
+# Shared counters written by the capture process, read by the web process
+STAT_FIELDS = ("encoded", "failed", "encode_time", "frames", "suppressed", "heartbeats", "oversize")
+
+_running = set()  # CaptureProcess instances with a child, stopped by the SIGTERM handler
+_spawn_lock = threading.Lock()  # _spawn swaps __main__.__spec__ while a child starts
+
+
+class SharedFrameRing:
+    """
+    Fixed-size slots in one shared memory block, written by a single
+    producer. Frame n goes to slot n % slots; the slot's sequence number is
+    cleared while it is rewritten and set last, so a reader that sees the
+    same sequence before and after copying knows the bytes weren't torn.
+    A reader that falls more than `slots` frames behind skips to the newest
+    (old frames would only be dropped from the viewers' queues anyway).
+    """
+
+    def __init__(self, name=None, slots=8, slot_size=4 * 1024 * 1024):
+        self.slots = slots
+        self.slot_size = slot_size
+        self.stride = SLOT_HEADER.size + slot_size
+        size = RING_HEADER.size + slots * self.stride
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)  # Spawned children share the creator's resource tracker
+        self.buf = self.shm.buf
+        self.next_seq = 1  # Writer: next sequence to publish. Reader: next one to read
+        self.frames_read = 0
+        self.skipped = 0
+        self.torn = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def _offset(self, seq):
+        return RING_HEADER.size + (seq % self.slots) * self.stride
+
+    def latest(self):
+        return RING_HEADER.unpack_from(self.buf, 0)[0]
+
+    def write(self, data, frame_seq, t):
+        """Publish one encoded frame; False if it doesn't fit a slot"""
+        if len(data) > self.slot_size:
+            return False
+        seq = self.next_seq
+        offset = self._offset(seq)
+        SLOT_HEADER.pack_into(self.buf, offset, 0, 0, 0, 0.0)
+        start = offset + SLOT_HEADER.size
+        self.buf[start:start + len(data)] = data
+        SLOT_HEADER.pack_into(self.buf, offset, seq, len(data), frame_seq, t)
+        RING_HEADER.pack_into(self.buf, 0, seq)
+        self.next_seq = seq + 1
+        return True
+
+    def read_new(self):
+        """(data, frame_seq, t) for every frame published since the last call, oldest first"""
+        latest = self.latest()
+        if latest - self.next_seq >= self.slots:
+            self.skipped += latest - self.next_seq - self.slots + 1
+            self.next_seq = latest - self.slots + 1
+        frames = []
+        while self.next_seq <= latest:
+            seq = self.next_seq
+            self.next_seq += 1
+            offset = self._offset(seq)
+            slot_seq, length, frame_seq, t = SLOT_HEADER.unpack_from(self.buf, offset)
+            if slot_seq != seq:
+                self.skipped += 1  # Already overwritten by a newer frame
+                continue
+            start = offset + SLOT_HEADER.size
+            data = bytes(self.buf[start:start + length])  # The one copy: into the payload the emit sends
+            if SLOT_HEADER.unpack_from(self.buf, offset)[0] != seq:
+                self.torn += 1
+                continue
+            self.frames_read += 1
+            frames.append((data, frame_seq, t))
+        return frames
+
+    def close(self, unlink=False):
+        self.buf = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+    def stats(self):
+        return {
+            'slots': self.slots,
+            'slot_kb': self.slot_size // 1024,
+            'published': self.latest(),
+            'read': self.frames_read,
+            'skipped': self.skipped,
+            'torn': self.torn
+        }
+
+
+def _encode_job(encoder, bgra, size, quality, frame_seq, t):
+    return encoder.encode(encoder.source(bgra), size, quality), frame_seq, t
+
+
+def capture_main(ring_name, slots, slot_size, index, region, settings, control, counters, published, stop):
+    """
+    Child process: grab, detect idle and encode exactly like the in-process
+    loop, then write each JPEG into the ring. Quality, width and FPS come
+    from `control`, which the web process's adaptive controller updates.
+    Runs until `stop` is set or the web process is gone (killed before it
+    could set it), so an orphaned child never keeps capturing. `published`
+    is a semaphore and `stop` a plain shared flag: neither can leave one
+    side waiting on a lock or a wakeup the other died holding.
+    """
+    import mss
+    import numpy as np
+    from .buffers import FrameRing
+    from .encoders import create_encoder
+    from .idle import IdleDetector
+    from .latency import now_ms
+    from .pipeline import EncodePipeline
+    from .scheduler import FrameScheduler
+
+    ring = SharedFrameRing(ring_name, slots, slot_size)
+    ring.next_seq = ring.latest() + 1  # A restarted child continues the sequence the reader expects
+    encoder = create_encoder(settings['encoder'], reuse_buffers=settings['buffer_ring'])
+    idle = IdleDetector(settings['idle_sample_step'], settings['idle_heartbeat'])
+    scheduler = FrameScheduler(control[2], settings['frame_policy'])
+    frame_ring = FrameRing(settings['depth'] + 2) if settings['buffer_ring'] else None
+
+    def publish(data, frame_seq, t):
+        # Called from the pipeline's single sequencer thread, so the ring has one writer
+        if not ring.write(data, frame_seq, t):
+            counters[STAT_FIELDS.index("oversize")] += 1
+            return
+        published.release()
+
+    pipeline = EncodePipeline(publish, settings['workers'], settings['depth'])
+    parent = multiprocessing.parent_process()
+
+    try:
+        with mss.mss() as sct:
+            monitor = sct.monitors[index]
+            if region is not None:
+                left, top, width, height = region
+                monitor = {'left': monitor['left'] + left, 'top': monitor['top'] + top, 'width': width, 'height': height}
+            pipeline.start()
+            last_job = None
+            frame_seq = 0
+
+            while not stop.value:
+                if not parent.is_alive():
+                    print(f"🛑 Capture process for monitor {index}: web process is gone, exiting")
+                    break
+                try:
+                    frame = sct.grab(monitor)
+                    if frame_ring:
+                        img_np = frame_ring.acquire(frame.height, frame.width)
+                        np.copyto(img_np, np.frombuffer(frame.raw, dtype=np.uint8).reshape(img_np.shape))
+                    else:
+                        img_np = np.frombuffer(frame.raw, dtype=np.uint8).reshape(frame.height, frame.width, 4)
+                    t = round(now_ms(), 1)  # Monotonic clock is system-wide, so the web process can compare it
+                    job = None
+                    quality, target_width, fps = control[0], control[1], control[2]
+                    size = (frame.width, frame.height)
+                    if target_width and frame.width > target_width:
+                        size = (target_width, int(frame.height * target_width / frame.width))
+                    changed = idle.changed(img_np) if settings['idle_detection'] else True
+
+                    if not changed and not idle.heartbeat_due():
+                        idle.suppressed += 1
+                    else:
+                        if not changed and last_job:
+                            idle.heartbeats += 1
+                            pipeline.resubmit(last_job)
+                        else:
+                            job = last_job = pipeline.submit(_encode_job, encoder, img_np, size, quality, frame_seq, t)
+                        idle.mark_sent()
+                    frame_seq += 1
+
+                    if frame_ring:
+                        frame_ring.release_after(job, img_np)
+
+                    counters[STAT_FIELDS.index("frames")] = idle.frames
+                    counters[STAT_FIELDS.index("suppressed")] = idle.suppressed
+                    counters[STAT_FIELDS.index("heartbeats")] = idle.heartbeats
+                    counters[STAT_FIELDS.index("encoded")] = pipeline.encoded
+                    counters[STAT_FIELDS.index("failed")] = pipeline.failed
+                    counters[STAT_FIELDS.index("encode_time")] = pipeline.encode_time
+
+                    scheduler.fps = fps
+                    scheduler.wait()
+
+                except Exception as e:
+                    print(f"⚠️ Capture process error: {e}")
+                    time.sleep(0.1)
+    finally:
+        pipeline.stop()
+        ring.close()
+
+
+class CaptureProcess:
+    """
+    Web-process side of one monitor stream's capture process. Takes the
+    place of the EncodePipeline in a MonitorStream: `workers`,
+    `take_window_ms` and `stats` feed the adaptive controller and /stats
+    the same way. `frames()` returns what the child encoded since the last
+    call. The child is spawned (never forked from a process full of server
+    threads) and restarted if it dies - after 0.5 s, then 1, 2, 4 ... s
+    while it keeps dying right away, giving up after `max_restarts` in a row.
+    """
+
+    def __init__(self, index, region, settings, slots=8, slot_size=4 * 1024 * 1024,
+                 max_restarts=5, backoff=0.5, max_backoff=30.0, stable_after=30.0):
+        self.index = index
+        self.region = region
+        self.settings = settings  # encoder, buffer_ring, workers, depth, idle_*, frame_policy
+        self.workers = settings['workers']
+        self.slots = slots
+        self.slot_size = slot_size
+        self.context = multiprocessing.get_context("spawn")
+        self.ring = None
+        self.process = None
+        self.restarts = 0
+        self.max_restarts = max_restarts
+        self.backoff = backoff  # First restart delay in seconds, doubled per consecutive failure
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after  # A child that ran this long resets the failure count
+        self.failures = 0
+        self.retry_at = None
+        self.failed = False  # Gave up restarting
+        self.started = 0.0
+        self.lock = threading.RLock()  # stop() vs stats()/frames(); re-entrant for the SIGTERM handler
+        self.window = (0.0, 0)
+
+    def start(self, quality, width, fps):
+        self.ring = SharedFrameRing(None, self.slots, self.slot_size)
+        self.control = self.context.Array('i', [quality, width or 0, fps], lock=False)
+        self.counters = self.context.Array('d', len(STAT_FIELDS), lock=False)
+        self.published = self.context.Semaphore(0)  # Released once per frame written
+        self.stop_flag = self.context.RawValue('b', 0)
+        self.window = (0.0, 0)
+        self.failures = 0
+        self.retry_at = None
+        self.failed = False
+        self._spawn()
+        _running.add(self)
+        atexit.register(self.stop)
+
+    def _spawn(self):
+        self.process = self.context.Process(
+            target=capture_main,
+            args=(self.ring.name, self.slots, self.slot_size, self.index, self.region, self.settings,
+                  self.control, self.counters, self.published, self.stop_flag),
+            name=f"capture-{self.index}",
+            daemon=True
+        )
+        # spawn re-runs the parent's __main__ in the child unless __main__ names an
+        # importable module. Naming this one keeps the server script - its app,
+        # sockets and threads - out of the child.
+        main = sys.modules['__main__']
+        with _spawn_lock:
+            spec = getattr(main, '__spec__', None)
+            main.__spec__ = importlib.util.find_spec(__name__)
+            try:
+                self.process.start()
+            finally:
+                main.__spec__ = spec
+        self.started = time.monotonic()
+
+    def ensure_running(self):
+        """Restart a crashed child (same ring, so readers carry on) once its backoff passes; True if restarted"""
+        if self.failed or self.process is None or self.process.is_alive() or self.stop_flag.value:
+            return False
+        now = time.monotonic()
+        if self.retry_at is None:
+            if now - self.started >= self.stable_after:
+                self.failures = 0  # It ran fine for a while: a new problem, not a crash loop
+            self.failures += 1
+            if self.failures > self.max_restarts:
+                self.failed = True
+                print(f"❌ Capture process for monitor {self.index} exited ({self.process.exitcode}) "
+                      f"{self.max_restarts + 1} times in a row - giving up. Check its error above, then restart the server")
+                return False
+            delay = min(self.max_backoff, self.backoff * 2 ** (self.failures - 1))
+            self.retry_at = now + delay
+            print(f"⚠️ Capture process for monitor {self.index} exited ({self.process.exitcode}), restarting in {delay:.1f} s")
+        if now < self.retry_at:
+            return False
+        self.retry_at = None
+        self.restarts += 1
+        self._spawn()
+        return True
+
+    def configure(self, quality, width, fps):
+        self.control[0], self.control[1], self.control[2] = quality, width or 0, fps
+
+    def frames(self, timeout=0.5):
+        """Encoded frames published since the last call as (data, frame_seq, t); waits up to `timeout` for one"""
+        if self.published.acquire(timeout=timeout):
+            while self.published.acquire(False):
+                pass  # One read picks up every frame since
+        with self.lock:
+            return self.ring.read_new() if self.process else []
+
+    def stop(self):
+        with self.lock:
+            if self.process is None:
+                return
+            atexit.unregister(self.stop)
+            _running.discard(self)
+            self.stop_flag.value = 1
+            self.process.join(timeout=2.0)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(timeout=1.0)
+            self.process = None
+            self.ring.close(unlink=True)
+
+    def take_window_ms(self):
+        """Average encode time since the last call, in milliseconds"""
+        total = self.counters[STAT_FIELDS.index("encode_time")]
+        count = int(self.counters[STAT_FIELDS.index("encoded")])
+        last_total, last_count = self.window
+        self.window = (total, count)
+        if count <= last_count:
+            return 0.0
+        return (total - last_total) / (count - last_count) * 1000
+
+    def stats(self):
+        with self.lock:
+            return self._stats()
+
+    def _stats(self):
+        counters = dict(zip(STAT_FIELDS, self.counters)) if self.process else {}
+        encoded = int(counters.get('encoded', 0))
+        frames = int(counters.get('frames', 0))
+        return {
+            'process': self.process.pid if self.process else None,
+            'restarts': self.restarts,
+            'gave_up': self.failed,
+            'workers': self.workers,
+            'encoded': encoded,
+            'failed': int(counters.get('failed', 0)),
+            'oversize': int(counters.get('oversize', 0)),
+            'avg_encode_ms': round(counters['encode_time'] / encoded * 1000, 2) if encoded else 0.0,
+            'idle': {
+                'frames': frames,
+                'suppressed': int(counters.get('suppressed', 0)),
+                'heartbeats': int(counters.get('heartbeats', 0)),
+                'suppressed_ratio': round(counters['suppressed'] / frames, 3) if frames else 0.0
+            },
+            'ring': self.ring.stats() if self.process else None
+        }
+
+
+def install_sigterm_handler():
+    """
+    On SIGTERM, stop every capture child and unlink its ring, then exit
+    (or call the previous handler, if there was one). Call once from the main thread at startup;
+    without it a terminated server's children only exit when they notice
+    the parent is gone, and their rings wait for the resource tracker.
+    """
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle(signum, frame):
+        for capture in list(_running):
+            capture.stop()
+        if callable(previous):
+            previous(signum, frame)
+        elif previous != signal.SIG_IGN:
+            sys.exit(128 + signum)  # Like the default action, but atexit and finalizers still run
+
+    signal.signal(signal.SIGTERM, handle)
@@ -0,0 +1,123 @@
+"""
+HostCast - Cursor Overlay
+The host pointer sampled apart from the captured frames and sent as tiny `cursor` events
+"""
+import time
+
+from .scheduler import FrameScheduler
+
+try:
+    import win32con
+    import win32gui
+except ImportError:
+    win32gui = None
+
+CURSOR_SHOWING = 0x00000001  # CURSORINFO.flags bit
+
+# Standard Windows cursors -> CSS cursor names the client understands
+SHAPES = {
+    "IDC_ARROW": "default",
+    "IDC_IBEAM": "text",
+    "IDC_HAND": "pointer",
+    "IDC_WAIT": "wait",
+    "IDC_APPSTARTING": "progress",
+    "IDC_CROSS": "crosshair",
+    "IDC_SIZEWE": "ew-resize",
+    "IDC_SIZENS": "ns-resize",
+    "IDC_SIZENWSE": "nwse-resize",
+    "IDC_SIZENESW": "nesw-resize",
+    "IDC_SIZEALL": "move",
+    "IDC_NO": "not-allowed"
+}
+
+
+class CursorSampler:
+    """
+    Reads the pointer position and shape. mss never draws the cursor into
+    a grab, so pointer movement alone leaves the frames unchanged and
+    idle detection keeps skipping them.
+    """
+
+    def __init__(self, position):
+        self.position = position  # () -> (x, y) fallback when the Win32 API is unavailable
+        self.handles = {}
+        if win32gui:
+            for idc, shape in SHAPES.items():
+                try:
+                    self.handles[win32gui.LoadCursor(0, getattr(win32con, idc))] = shape
+                except Exception:
+                    pass  # Cursor not available on this Windows version
+
+    def sample(self):
+        """(x, y, shape, visible) in virtual-desktop coordinates"""
+        if win32gui:
+            flags, handle, (x, y) = win32gui.GetCursorInfo()
+            return x, y, self.handles.get(handle, "default"), bool(flags & CURSOR_SHOWING)
+        x, y = self.position()
+        return int(x), int(y), "default", True
+
+
+def cursor_event(area, x, y, shape, visible):
+    """Pointer relative to a stream's capture area (0-1); hidden when outside it"""
+    rel_x = (x - area['left']) / area['width']
+    rel_y = (y - area['top']) / area['height']
+    if not (visible and 0 <= rel_x < 1 and 0 <= rel_y < 1):
+        return {'visible': False}  # Identical while the pointer is elsewhere, so it is sent once
+    return {
+        'x': round(rel_x, 4),
+        'y': round(rel_y, 4),
+        'shape': shape,
+        'visible': True
+    }
+
+
+class CursorOverlay:
+    """
+    Sends each viewer the pointer relative to the stream it watches, `rate`
+    times a second and only when it moved or changed shape - frames are
+    never re-encoded for it. `viewers` () -> sids narrows who gets it
+    (None = every viewer of the registry)
+    """
+
+    def __init__(self, sampler, registry, layout, fanout, rate=60, namespace='/', viewers=None):
+        self.sampler = sampler
+        self.registry = registry
+        self.layout = layout  # mss index -> monitor geometry
+        self.fanout = fanout
+        self.rate = rate
+        self.namespace = namespace
+        self.viewers = viewers
+
+    def run(self, active):
+        """Sampling loop while active()"""
+        last_sent = {}
+        scheduler = FrameScheduler(self.rate, "skip")  # A late sample is already stale: never send a burst
+        print(f"🖱️ Cursor overlay started ({self.rate} Hz)")
+
+        while active():
+            try:
+                wanted = self.viewers() if self.viewers else None
+                watching = set()
+                if wanted is None or wanted:
+                    x, y, shape, visible = self.sampler.sample()
+                    for stream, sids in self.registry.viewers():
+                        monitor = self.layout.get(stream.index)
+                        if not monitor:
+                            continue
+                        event = cursor_event(stream.area(monitor), x, y, shape, visible)
+                        for sid in sids:
+                            if wanted is not None and sid not in wanted:
+                                continue
+                            watching.add(sid)
+                            if last_sent.get(sid) != event:
+                                last_sent[sid] = event
+                                self.fanout.emit("cursor", event, room=sid, namespace=self.namespace)
+                for sid in set(last_sent) - watching:
+                    del last_sent[sid]
+            except Exception as e:
+                print(f"⚠️ Cursor error: {e}")
+                time.sleep(0.5)
+
+            scheduler.wait()
+
+        print("✅ Cursor overlay stopped")
@@ -0,0 +1,192 @@
+"""
+HostCast - JPEG Encoder Backends
+Encode straight from the mss BGRA buffer without a NumPy channel-swap copy
+"""
+import io
+import threading
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+from PIL import Image
+
+
+def _ignore(stage, seconds):
+    pass
+
+
+class PillowEncoder:
+    """
+    Pillow/libjpeg. The BGRA buffer is unpacked to RGB in one pass by
+    Image.frombuffer's BGRX raw mode - no intermediate NumPy copy.
+    """
+    name = "pillow"
+
+    def __init__(self, resample=Image.LANCZOS, optimize=True, reuse_buffers=False, observe=None):
+        self.resample = resample
+        self.observe = observe or _ignore  # observe(stage, seconds) - stage timings for /metrics
+        # optimize=True makes Pillow allocate a frame-sized scratch buffer per save
+        self.optimize = optimize and not reuse_buffers
+        self.reuse_buffers = reuse_buffers
+        self.local = threading.local()
+
+    def source(self, bgra):
+        """Per-frame input, built once and shared by every region encoded from it"""
+        start = time.perf_counter()
+        height, width = bgra.shape[:2]
+        source = Image.frombuffer("RGB", (width, height), bgra, "raw", "BGRX", 0, 1)
+        self.observe("convert", time.perf_counter() - start)
+        return source
+
+    def encode(self, source, size, quality, box=None):
+        """JPEG of the whole source (or `box` of it) scaled to `size`"""
+        start = time.perf_counter()
+        img = source
+        box_size = (box[2] - box[0], box[3] - box[1]) if box else img.size
+        if box_size != size:
+            img = img.resize(size, self.resample, box=box)
+        elif box:
+            img = img.crop(box)
+        resized = time.perf_counter()
+        self.observe("resize", resized - start)
+
+        try:
+            return self._save(img, quality)
+        finally:
+            self.observe("encode", time.perf_counter() - resized)
+
+    def _save(self, img, quality):
+        if not self.reuse_buffers:
+            buffer = io.BytesIO()
+            img.save(buffer, format="JPEG", quality=quality, optimize=self.optimize)
+            return buffer.getvalue()
+
+        # Per-worker output buffer: rewound instead of regrown for every frame
+        buffer = getattr(self.local, "output", None)
+        if buffer is None:
+            buffer = self.local.output = io.BytesIO()
+        buffer.seek(0)
+        img.save(buffer, format="JPEG", quality=quality, optimize=self.optimize)
+        length = buffer.tell()
+        with buffer.getbuffer() as view:
+            return bytes(view[:length])
+
+
+class TurboEncoder(ABC):
+    """
+    Shared base for libjpeg-turbo bindings that take BGRA pixels as is.
+    Scaling runs in Pillow on a zero-copy RGBX view of the same buffer -
+    channel order doesn't matter to the filter, so no swap is needed.
+    Subclasses supply `_encode` for their binding.
+    """
+    name = None
+
+    def __init__(self, resample=Image.LANCZOS, reuse_buffers=False, observe=None):
+        self.resample = resample
+        self.reuse_buffers = reuse_buffers
+        self.observe = observe or _ignore
+        self.local = threading.local()
+
+    def source(self, bgra):
+        height, width = bgra.shape[:2]
+        return bgra, Image.frombuffer("RGBX", (width, height), bgra, "raw", "RGBX", 0, 1)
+
+    def encode(self, source, size, quality, box=None):
+        start = time.perf_counter()
+        bgra, view = source
+        box_size = (box[2] - box[0], box[3] - box[1]) if box else view.size
+        if box_size != size:
+            resized = view.resize(size, self.resample, box=box)
+            if self.reuse_buffers:
+                pixels = self._scratch(*size)
+                # Core paste writes straight into the mapped scratch buffer -
+                # Image.paste would first copy the read-only mapped image
+                target = Image.frombuffer("RGBX", size, pixels, "raw", "RGBX", 0, 1)
+                target.im.paste(resized.im, (0, 0) + size)
+            else:
+                pixels = np.asarray(resized)
+        elif box:
+            region = bgra[box[1]:box[3], box[0]:box[2]]
+            if self.reuse_buffers:
+                pixels = self._scratch(*size)
+                np.copyto(pixels, region)
+            else:
+                pixels = np.ascontiguousarray(region)
+        else:
+            pixels = bgra
+        resized = time.perf_counter()
+        self.observe("resize", resized - start)
+
+        try:
+            return self._encode(pixels, quality)
+        finally:
+            self.observe("encode", time.perf_counter() - resized)
+
+    def _scratch(self, width, height):
+        """Per-worker scale buffer, grown to the largest region seen so far"""
+        length = width * height * 4
+        buffer = getattr(self.local, "scale", None)
+        if buffer is None or buffer.size < length:
+            buffer = self.local.scale = np.empty(length, dtype=np.uint8)
+        return buffer[:length].reshape(height, width, 4)
+
+    @abstractmethod
+    def _encode(self, pixels, quality):
+        """JPEG bytes for a contiguous BGRA (height, width, 4) array"""
+
+
+class SimpleJpegEncoder(TurboEncoder):
+    """simplejpeg (bundled libjpeg-turbo) - releases the GIL while encoding"""
+    name = "simplejpeg"
+
+    def __init__(self, resample=Image.LANCZOS, reuse_buffers=False, observe=None):
+        super().__init__(resample, reuse_buffers, observe)
+        import simplejpeg
+        self.simplejpeg = simplejpeg
+
+    def _encode(self, pixels, quality):
+        return self.simplejpeg.encode_jpeg(
+            pixels, quality=quality, colorspace="BGRA", colorsubsampling="420", fastdct=True
+        )
+
+
+class TurboJpegEncoder(TurboEncoder):
+    """PyTurboJPEG - needs the libjpeg-turbo shared library installed"""
+    name = "turbojpeg"
+
+    def __init__(self, resample=Image.LANCZOS, reuse_buffers=False, observe=None):
+        super().__init__(resample, reuse_buffers, observe)
+        import turbojpeg
+        self.turbojpeg = turbojpeg
+        self.jpeg = turbojpeg.TurboJPEG()
+
+    def _encode(self, pixels, quality):
+        tj = self.turbojpeg
+        return self.jpeg.encode(
+            pixels, quality=quality, pixel_format=tj.TJPF_BGRA,
+            jpeg_subsample=tj.TJSAMP_420, flags=tj.TJFLAG_FASTDCT
+        )
+
+
+ENCODERS = {
+    "simplejpeg": SimpleJpegEncoder,
+    "turbojpeg": TurboJpegEncoder,
+    "pillow": PillowEncoder
+}
+
+
+def create_encoder(name="auto", reuse_buffers=False, observe=None):
+    """Instantiate a backend by name; "auto" picks the fastest one installed"""
+    names = list(ENCODERS) if name == "auto" else [name]
+    for candidate in names:
+        try:
+            encoder = ENCODERS[candidate](reuse_buffers=reuse_buffers, observe=observe)
+            print(f"🖼️ JPEG encoder: {encoder.name}")
+            return encoder
+        except KeyError:
+            print(f"⚠️ Unknown JPEG encoder '{candidate}'")
+        except (ImportError, OSError, RuntimeError) as e:
+            if name != "auto":
+                print(f"⚠️ JPEG encoder '{candidate}' unavailable: {e}")
+    print("🖼️ JPEG encoder: pillow")
+    return PillowEncoder(reuse_buffers=reuse_buffers, observe=observe)
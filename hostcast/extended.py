@@ -0,0 +1,259 @@
+"""
+HostCast - Extended Displays
+Client screens placed beside the host's as virtual monitors: where each one
+sits on the virtual desktop, the background + cursor stream it gets, and its
+mouse driving the host pointer past the screen edge (Win32)
+"""
+import ctypes
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mss
+import win32api
+import win32con
+
+from .fanout import pack_bytes
+from .render import VirtualScreenCache
+from .scheduler import FrameScheduler
+
+BUTTON_EVENTS = {
+    'left': (win32con.MOUSEEVENTF_LEFTDOWN, win32con.MOUSEEVENTF_LEFTUP),
+    'right': (win32con.MOUSEEVENTF_RIGHTDOWN, win32con.MOUSEEVENTF_RIGHTUP),
+    'middle': (win32con.MOUSEEVENTF_MIDDLEDOWN, win32con.MOUSEEVENTF_MIDDLEUP)
+}
+
+
+class ExtendedDisplays:
+    """
+    Configured displays by sid. With `cursor_overlay` a display gets its
+    cached background on change (and every `layer_refresh` s) plus tiny
+    `cursor` events; otherwise the cursor is composited into frames on
+    `render_workers` threads, never more than one in flight per display.
+    """
+
+    def __init__(self, fanout, metrics, latency, width=1280, quality=75, fps=30, frame_policy="skip",
+                 cursor_overlay=True, layer_refresh=2.0, render_workers=4, binary=True, namespace='/'):
+        self.fanout = fanout
+        self.metrics = metrics
+        self.latency = latency
+        self.fps = fps
+        self.frame_policy = frame_policy
+        self.cursor_overlay = cursor_overlay
+        self.layer_refresh = layer_refresh
+        self.binary = binary  # Frame bytes as binary attachments (False = base64 for old clients)
+        self.namespace = namespace
+        self.displays = {}  # sid -> mode, position, resolution, display_name
+        self.screen = {'width': 1920, 'height': 1080}  # Host screen the displays are placed around
+        self.cache = VirtualScreenCache(width, quality)  # Rendered + encoded backgrounds per (resolution, name)
+        self.render_pool = ThreadPoolExecutor(max_workers=render_workers, thread_name_prefix="render")
+        self.render_lock = threading.Lock()
+        self.rendering = set()  # sids with a frame still being composited
+
+    def refresh_screen(self):
+        """Host screen size from the primary monitor"""
+        with mss.mss() as sct:
+            monitor = sct.monitors[1]
+            self.screen['width'] = monitor['width']
+            self.screen['height'] = monitor['height']
+        return self.screen
+
+    def configure(self, sid, data):
+        """set_display_mode: store the display and return its placement for display_configured"""
+        display_name = data.get('display_name', f'Display-{sid[:8]}')
+        self.displays[sid] = {
+            'mode': data.get('mode', 'extended'),
+            'position': data.get('position', 'right'),
+            'resolution': data.get('resolution', {'width': 1920, 'height': 1080}),
+            'display_name': display_name
+        }
+        bounds = self.bounds(sid)
+        print(f"📺 Display configured: {display_name} ({self.displays[sid]['position']}, "
+              f"{self.displays[sid]['resolution']['width']}x{self.displays[sid]['resolution']['height']})")
+        return {'virtual_bounds': bounds, 'host_screen': self.screen}
+
+    def remove(self, sid):
+        return self.displays.pop(sid, None)
+
+    def extended(self, sid):
+        """Whether this client is an extended display (its input drives the host)"""
+        client = self.displays.get(sid)
+        return bool(client) and client.get('mode') == 'extended'
+
+    def bounds(self, sid):
+        """Virtual desktop rectangle of a display next to the host screen"""
+        client = self.displays.get(sid)
+        if not client:
+            return None
+
+        position = client['position']
+        res = client['resolution']
+        host_w = self.screen['width']
+        host_h = self.screen['height']
+
+        if position == 'right':
+            return {'x_min': host_w, 'x_max': host_w + res['width'], 'y_min': 0, 'y_max': res['height']}
+        elif position == 'left':
+            return {'x_min': -res['width'], 'x_max': 0, 'y_min': 0, 'y_max': res['height']}
+        elif position == 'top':
+            return {'x_min': 0, 'x_max': res['width'], 'y_min': -res['height'], 'y_max': 0}
+        elif position == 'bottom':
+            return {'x_min': 0, 'x_max': res['width'], 'y_min': host_h, 'y_max': host_h + res['height']}
+
+        return None
+
+    def cursor_position(self, sid, mouse_pos):
+        """Host cursor relative to this display (0-1), or (None, None) when outside it"""
+        bounds = self.bounds(sid)
+        if not bounds:
+            return None, None
+        if not (bounds['x_min'] <= mouse_pos[0] <= bounds['x_max'] and
+                bounds['y_min'] <= mouse_pos[1] <= bounds['y_max']):
+            return None, None
+
+        mouse_x_rel = (mouse_pos[0] - bounds['x_min']) / (bounds['x_max'] - bounds['x_min'])
+        mouse_y_rel = (mouse_pos[1] - bounds['y_min']) / (bounds['y_max'] - bounds['y_min'])
+        return max(0, min(1, mouse_x_rel)), max(0, min(1, mouse_y_rel))
+
+    def send_frame(self, sid, data, stamp):
+        """Emit one JPEG (plus its render stamp) to a display, timed and counted for /metrics"""
+        payload = (pack_bytes(data, self.binary, self.metrics), stamp)
+        with self.metrics.stage("emit"):
+            self.fanout.emit("frame", payload, room=sid, namespace=self.namespace)
+        self.metrics.count_sent("frame", payload)
+
+    def render_job(self, sid, layer_key, mouse, stamp):
+        """Worker: composite the cursor onto the cached layer, encode and send"""
+        try:
+            with self.metrics.stage("render"):
+                data = self.cache.frame(*layer_key, *mouse)
+            self.send_frame(sid, data, stamp)
+        except Exception as e:
+            print(f"⚠️ Render error ({sid[:8]}): {e}")
+        finally:
+            with self.render_lock:
+                self.rendering.discard(sid)
+
+    def run(self, active):
+        """Stream every extended display while active()"""
+        try:
+            print("📺 Extended display streaming started")
+
+            frame_scheduler = FrameScheduler(self.fps, self.frame_policy)
+            last_sent = {}  # sid -> what the client currently shows
+            frame_seq = 0
+
+            while active():
+                try:
+                    displays = list(self.displays.items())  # One snapshot: connects/disconnects land next frame
+                    if displays:
+                        mouse_pos = win32api.GetCursorPos()
+                        stamp = self.latency.stamp(frame_seq)
+                        frame_seq += 1
+
+                    for sid, client_info in displays:
+                        if client_info.get('mode') != 'extended':
+                            continue
+
+                        layer_key = (
+                            client_info['resolution']['width'],
+                            client_info['resolution']['height'],
+                            client_info['display_name']
+                        )
+                        mouse = self.cursor_position(sid, mouse_pos)
+                        shown = last_sent.setdefault(sid, {})
+
+                        if self.cursor_overlay:
+                            # Static background on change (and every layer_refresh s), otherwise only tiny cursor events
+                            now = time.monotonic()
+                            if shown.get('layer') != layer_key or (
+                                    self.layer_refresh and now - shown['layer_sent'] >= self.layer_refresh):
+                                shown['layer'] = layer_key
+                                shown['layer_sent'] = now
+                                layer = self.cache.layer(*layer_key)
+                                self.send_frame(sid, layer.jpeg, stamp)
+                            if shown.get('mouse') != mouse:
+                                shown['mouse'] = mouse
+                                cursor = {
+                                    'x': round(mouse[0], 4) if mouse[0] is not None else None,
+                                    'y': round(mouse[1], 4) if mouse[1] is not None else None,
+                                    'visible': mouse[0] is not None,
+                                    **stamp
+                                }
+                                self.fanout.emit("cursor", cursor, room=sid, namespace=self.namespace)
+                                self.metrics.count_sent("cursor", cursor)
+                        elif shown.get('frame') != (layer_key, mouse):
+                            # Only re-render when the cursor moved or the display changed,
+                            # and never queue a second frame behind one still rendering
+                            with self.render_lock:
+                                if sid in self.rendering:
+                                    continue
+                                self.rendering.add(sid)
+                            shown['frame'] = (layer_key, mouse)
+                            self.render_pool.submit(self.render_job, sid, layer_key, mouse, stamp)
+
+                    for sid in list(last_sent):
+                        if sid not in self.displays:
+                            del last_sent[sid]
+
+                    if frame_scheduler.report_due():
+                        print(f"📊 Extended displays: {frame_scheduler.summary()}")
+
+                    # Frame timing: fixed deadlines, so sleep overshoot doesn't accumulate
+                    frame_scheduler.wait()
+
+                except Exception as e:
+                    print(f"⚠️ Extended display error: {e}")
+                    time.sleep(0.1)
+
+        except Exception as e:
+            print(f"❌ Extended display stream error: {e}")
+
+    def move_pointer(self, sid, data):
+        """Client mouse at (x, y) on its display (0-1) moves the host cursor there on the virtual desktop"""
+        if not self.extended(sid):
+            return
+        try:
+            bounds = self.bounds(sid)
+            if bounds:
+                abs_x = int(bounds['x_min'] + data['x'] * (bounds['x_max'] - bounds['x_min']))
+                abs_y = int(bounds['y_min'] + data['y'] * (bounds['y_max'] - bounds['y_min']))
+                ctypes.windll.user32.SetCursorPos(abs_x, abs_y)
+        except Exception as e:
+            print(f"❌ Client mouse error: {e}")
+
+    def click(self, sid, data):
+        if not self.extended(sid):
+            return
+        try:
+            action = data['action']
+            button = data['button']
+
+            if button in BUTTON_EVENTS:
+                down_event, up_event = BUTTON_EVENTS[button]
+                if action == 'down':
+                    win32api.mouse_event(down_event, 0, 0, 0, 0)
+                elif action == 'up':
+                    win32api.mouse_event(up_event, 0, 0, 0, 0)
+                elif action == 'click':
+                    win32api.mouse_event(down_event, 0, 0, 0, 0)
+                    time.sleep(0.01)
+                    win32api.mouse_event(up_event, 0, 0, 0, 0)
+
+            print(f"🖱️ Click: {button} {action}")
+        except Exception as e:
+            print(f"❌ Click error: {e}")
+
+    def scroll(self, sid, data):
+        if not self.extended(sid):
+            return
+        try:
+            delta_y = data.get('deltaY', 0)
+            if abs(delta_y) > 0:
+                win32api.mouse_event(win32con.MOUSEEVENTF_WHEEL, 0, 0, -int(delta_y), 0)
+        except Exception as e:
+            print(f"❌ Scroll error: {e}")
+
+    def queue_depths(self):
+        """Scrape-time gauge: frames being composited per display (0 or 1: a second is never queued)"""
+        return [({'sid': sid}, int(sid in self.rendering)) for sid in list(self.displays)]
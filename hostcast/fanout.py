@@ -0,0 +1,118 @@
+"""
+HostCast - Fan-Out Runtime
+Where per-viewer senders run and how capture threads hand them work: OS threads, or one eventlet/gevent loop
+"""
+import base64
+import queue
+import threading
+
+ASYNC_MODES = ("threading", "eventlet", "gevent")
+
+
+class ThreadFanOut:
+    """threading mode: every viewer's sender is an OS thread and emits happen on the calling thread"""
+    mode = "threading"
+
+    def __init__(self, socketio):
+        self.socketio = socketio
+
+    def spawn(self, target, *args):
+        threading.Thread(target=target, args=args, daemon=True).start()
+
+    def event(self):
+        return threading.Event()
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn where the server can send - here, right away"""
+        fn(*args, **kwargs)
+
+    def emit(self, event, data, **kwargs):
+        self.call(self.socketio.emit, event, data, **kwargs)
+
+    def stats(self):
+        return {'mode': self.mode}
+
+
+class LoopFanOut(ThreadFanOut):
+    """
+    eventlet/gevent mode: sockets, handlers and viewer senders are green
+    tasks on one event loop, so dozens of viewers cost no OS threads.
+    Nothing is monkey-patched - capture, encode and audio stay real OS
+    threads (the encoders release the GIL) and must never touch the loop
+    directly. They call() into it through a bounded queue that a loop task
+    drains; waiting on that queue is parked in the loop's own thread pool,
+    which is the only thread-safe way to wake it. A full queue blocks the
+    producer briefly, then drops, so a stalled loop can't grow memory.
+    """
+
+    def __init__(self, socketio, mode, maxsize=256, put_timeout=0.5):
+        super().__init__(socketio)
+        self.mode = mode
+        self.calls = queue.Queue(maxsize=maxsize)
+        self.put_timeout = put_timeout
+        self.dropped = 0
+        self.handed_off = 0
+        socketio.start_background_task(self._pump)
+
+    def spawn(self, target, *args):
+        self.socketio.start_background_task(target, *args)
+
+    def event(self):
+        return self.socketio.server.eio.create_event()
+
+    def call(self, fn, *args, **kwargs):
+        """Queue fn to run on the event loop (safe from any OS thread)"""
+        try:
+            self.calls.put((fn, args, kwargs), timeout=self.put_timeout)
+            self.handed_off += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _wait(self):
+        """Block for the next call in a pool thread while the loop keeps serving"""
+        if self.mode == "eventlet":
+            from eventlet import tpool
+            return tpool.execute(self.calls.get)
+        import gevent
+        return gevent.get_hub().threadpool.apply(self.calls.get)
+
+    def _pump(self):
+        while True:
+            batch = [self._wait()]
+            while True:
+                try:
+                    batch.append(self.calls.get_nowait())
+                except queue.Empty:
+                    break
+            for fn, args, kwargs in batch:
+                try:
+                    fn(*args, **kwargs)
+                except Exception as e:
+                    print(f"⚠️ Fan-out error: {e}")
+
+    def stats(self):
+        return {
+            'mode': self.mode,
+            'queued': self.calls.qsize(),
+            'handed_off': self.handed_off,
+            'dropped': self.dropped
+        }
+
+
+def create_fanout(socketio, mode="threading"):
+    """Fan-out runtime matching the SocketIO async_mode"""
+    if mode not in ASYNC_MODES:
+        raise ValueError(f"Unknown async mode: {mode} (choose from {', '.join(ASYNC_MODES)})")
+    if mode == "threading":
+        return ThreadFanOut(socketio)
+    return LoopFanOut(socketio, mode)
+
+
+def pack_bytes(data, binary=True, metrics=None):
+    """Raw bytes for binary transport, base64 text for legacy clients"""
+    if binary:
+        return data
+    if metrics is None:
+        return base64.b64encode(data).decode('utf-8')
+    with metrics.stage("base64"):
+        return base64.b64encode(data).decode('utf-8')
@@ -0,0 +1,87 @@
+"""
+HostCast - File Sharing
+Upload, download, preview and sender-only delete as a Flask blueprint, with
+live new_file/delete_file events - served on its own by module 1's
+file_server.py and mounted at /files by the unified host
+"""
+import json
+import mimetypes
+import os
+from datetime import datetime
+
+from flask import Blueprint, render_template, request, send_from_directory, redirect, url_for, jsonify
+
+
+def get_client_ip():
+    # get IP from request
+    if request.environ.get('HTTP_X_FORWARDED_FOR') is None:
+        return request.remote_addr
+    return request.environ['HTTP_X_FORWARDED_FOR']
+
+
+def create_file_sharing(socketio, upload_folder, namespace='/'):
+    """Blueprint serving `upload_folder`; file events go to `namespace`"""
+    blueprint = Blueprint("files", __name__)
+    metadata_file = os.path.join(upload_folder, 'metadata.json')
+    os.makedirs(upload_folder, exist_ok=True)
+
+    # Load or initialize metadata
+    if os.path.exists(metadata_file):
+        with open(metadata_file, 'r') as f:
+            metadata = json.load(f)
+    else:
+        metadata = {}
+
+    def save_metadata():
+        with open(metadata_file, 'w') as f:
+            json.dump(metadata, f, indent=2)
+
+    @blueprint.route('/', methods=['GET', 'POST'])
+    def index():
+        if request.method == 'POST':
+            file = request.files.get('file')
+            device_name = request.form.get('device_name', 'Unknown')
+            client_ip = get_client_ip()
+            if file and file.filename:
+                save_path = os.path.join(upload_folder, file.filename)
+                file.save(save_path)
+
+                # Save metadata
+                metadata[file.filename] = {
+                    "device_name": device_name,
+                    "ip": client_ip,
+                    "upload_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    "size": os.path.getsize(save_path)
+                }
+                save_metadata()
+                socketio.emit('new_file', {"filename": file.filename, "meta": metadata[file.filename]}, namespace=namespace)
+            return redirect(url_for('.index'))
+
+        files = sorted(metadata.items(), key=lambda x: x[1]['upload_time'], reverse=True)
+        return render_template('index.html', files=files)
+
+    @blueprint.route('/download/<path:filename>')
+    def download(filename):
+        return send_from_directory(upload_folder, filename, as_attachment=True)
+
+    @blueprint.route('/preview/<path:filename>')
+    def preview(filename):
+        mime_type, _ = mimetypes.guess_type(filename)
+        return send_from_directory(upload_folder, filename, mimetype=mime_type)
+
+    @blueprint.route('/delete/<filename>', methods=['POST'])
+    def delete_file(filename):
+        client_ip = get_client_ip()
+        # Only sender can delete
+        if filename in metadata and metadata[filename]["ip"] == client_ip:
+            try:
+                os.remove(os.path.join(upload_folder, filename))
+                metadata.pop(filename)
+                save_metadata()
+                socketio.emit('delete_file', {"filename": filename}, namespace=namespace)
+                return jsonify({"success": True})
+            except Exception as e:
+                return jsonify({"success": False, "error": str(e)})
+        return jsonify({"success": False, "error": "Not allowed"})
+
+    return blueprint
@@ -0,0 +1,55 @@
+"""
+HostCast - Idle Screen Detection
+Cheap checksum of the captured buffer so unchanged frames skip resize/encode/emit
+"""
+import time
+import zlib
+
+
+class IdleDetector:
+    """
+    Checksums every Nth row of the BGRA buffer. The sampled rows rotate each
+    frame, so any change is seen within sample_step frames at a fraction of
+    the cost of hashing the whole buffer.
+    """
+
+    def __init__(self, sample_step=4, heartbeat=1.0):
+        self.sample_step = sample_step
+        self.heartbeat = heartbeat  # Seconds between resends while idle
+        self.reset()
+
+    def reset(self):
+        self.checksums = [None] * self.sample_step
+        self.phase = 0
+        self.last_sent = 0.0
+        self.frames = 0
+        self.suppressed = 0
+        self.heartbeats = 0
+
+    def changed(self, bgra):
+        """True if the rows sampled this frame differ from the last time they were sampled"""
+        phase = self.phase
+        self.phase = (phase + 1) % self.sample_step
+        self.frames += 1
+
+        checksum = 0
+        for row in bgra[phase::self.sample_step]:
+            checksum = zlib.crc32(row, checksum)
+
+        changed = checksum != self.checksums[phase]
+        self.checksums[phase] = checksum
+        return changed
+
+    def heartbeat_due(self):
+        return time.monotonic() - self.last_sent >= self.heartbeat
+
+    def mark_sent(self):
+        self.last_sent = time.monotonic()
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'suppressed': self.suppressed,
+            'heartbeats': self.heartbeats,
+            'suppressed_ratio': round(self.suppressed / self.frames, 3) if self.frames else 0.0
+        }
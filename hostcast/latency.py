@@ -0,0 +1,214 @@
+"""
+HostCast - Glass-to-Glass Latency
+Capture stamps on outgoing media, viewer acks and ping RTT combined into per-viewer capture-to-display latency
+"""
+import threading
+import time
+from collections import deque
+
+from .scheduler import percentile
+
+# Upper bounds in seconds - end-to-end latency spans tens of ms to seconds
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0)
+
+# Media a viewer may ack; anything else would become a new histogram series
+MEDIA = ("frame", "tiles", "video", "audio", "cursor")
+
+# Numbers a viewer's `audio_buffer` report may carry
+BUFFER_FIELDS = ("depth_ms", "target_ms", "jitter_ms", "underruns", "dropped_ms", "stretched_ms", "gaps", "av_offset_ms")
+
+
+def now_ms():
+    """Server capture clock: monotonic milliseconds (only ever compared on the server)"""
+    return time.monotonic() * 1000
+
+
+def _quantiles(values):
+    values = sorted(values)
+    return {
+        'p50': round(percentile(values, 0.50), 1),
+        'p95': round(percentile(values, 0.95), 1),
+        'p99': round(percentile(values, 0.99), 1)
+    }
+
+
+class AudioClock:
+    """
+    Stamps audio chunks on the capture clock the frames use. A blocking
+    read returns when the device has filled the chunk, so "now" is the
+    time of its *last* sample; and reads that return late (scheduling,
+    GIL) would jitter the stamps. Instead the first sample of each chunk
+    is placed by sample count from an anchor:
+
+        t = anchor + samples before this chunk / rate
+
+    A read can return late but never early, so an early chunk pulls the
+    anchor back to it. The anchor is reset when a chunk is later than
+    `max_drift_ms` - device clock drift or samples lost to an overflow.
+    """
+
+    def __init__(self, rate, max_drift_ms=50.0):
+        self.rate = rate
+        self.max_drift_ms = max_drift_ms
+        self.anchor = None
+        self.samples = 0
+        self.resyncs = 0
+
+    def stamp(self, seq, frames, end_ms=None):
+        """Capture stamp {seq, t, dur} for a chunk of `frames` samples that finished at `end_ms` (default now)"""
+        end_ms = now_ms() if end_ms is None else end_ms
+        duration = frames * 1000 / self.rate
+        start = end_ms - duration
+        if self.anchor is None:
+            self.anchor = start
+        else:
+            expected = self.anchor + self.samples * 1000 / self.rate
+            if start < expected:
+                self.anchor -= expected - start
+            elif start - expected > self.max_drift_ms:
+                self.anchor, self.samples = start, 0
+                self.resyncs += 1
+        t = self.anchor + self.samples * 1000 / self.rate
+        self.samples += frames
+        return {'seq': seq, 't': round(t, 1), 'dur': round(duration, 2)}
+
+    def skip(self, frames):
+        """Samples that were captured but never sent (overwritten in a ring) still take time"""
+        self.samples += frames
+
+
+class _ClientLatency:
+    def __init__(self, window):
+        self.rtt_ms = None
+        self.samples = {}  # media -> deque of (receive_ms, display_ms)
+        self.window = window
+        self.audio_buffer = None  # Last `audio_buffer` report from the viewer's jitter buffer
+
+    def add(self, media, receive_ms, display_ms):
+        self.samples.setdefault(media, deque(maxlen=self.window)).append((receive_ms, display_ms))
+
+
+class LatencyTracker:
+    """
+    Every `frame`, `tiles`, `video` and `audio` payload carries `seq` and
+    `t` (server capture time, see stamp()). Viewers echo them back in a
+    `latency_ack` with their own receive, display and send times
+    (performance.now() - only differences are used, so the clocks never
+    need to agree). The ack reaches the server half an RTT after it was
+    sent, which places the client's receive and display moments on the
+    server clock:
+
+        display = ack arrival - rtt / 2 - (sent - shown)
+
+    RTT comes from the client's `ping`/`pong` round trips. Controllers can
+    subscribe() to get every sample as it arrives. Viewers also report
+    their audio jitter buffer (depth, target, underruns, A/V offset) with
+    `audio_buffer`, kept as-is per viewer for /stats.
+    """
+
+    def __init__(self, observe_receive=None, observe_display=None, window=300, rtt_alpha=0.25):
+        # observe_*(media, seconds) - usually Metrics.histogram(...) families
+        self.observe_receive = observe_receive or (lambda media, seconds: None)
+        self.observe_display = observe_display or (lambda media, seconds: None)
+        self.window = window
+        self.rtt_alpha = rtt_alpha
+        self.clients = {}
+        self.listeners = []
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def stamp(seq):
+        """Capture stamp attached to an outgoing payload"""
+        return {'seq': seq, 't': round(now_ms(), 1)}
+
+    def subscribe(self, callback):
+        """Hook for controllers: callback(sid, sample) for every acked payload"""
+        self.listeners.append(callback)
+
+    def _client(self, sid):
+        client = self.clients.get(sid)
+        if client is None:
+            with self.lock:
+                client = self.clients.setdefault(sid, _ClientLatency(self.window))
+        return client
+
+    def rtt(self, sid, rtt_ms):
+        """Round trip the viewer measured with its last ping (smoothed)"""
+        client = self._client(sid)
+        rtt_ms = float(rtt_ms)
+        if client.rtt_ms is None:
+            client.rtt_ms = rtt_ms
+        else:
+            client.rtt_ms += self.rtt_alpha * (rtt_ms - client.rtt_ms)
+
+    def ack(self, sid, ack):
+        """
+        One viewer ack {media, seq, t, recv, shown, sent}; returns the sample
+        {media, seq, receive_ms, display_ms, rtt_ms}, or None until an RTT is
+        known (or for a media type outside MEDIA)
+        """
+        arrived = now_ms()
+        media = ack.get('media', 'frame')
+        if media not in MEDIA:
+            return None
+        client = self._client(sid)
+        if client.rtt_ms is None:
+            return None
+        sent_at = arrived - client.rtt_ms / 2  # Server time when the viewer sent the ack
+        receive_ms = max(0.0, sent_at - (ack['sent'] - ack['recv']) - ack['t'])
+        display_ms = max(receive_ms, sent_at - (ack['sent'] - ack['shown']) - ack['t'])
+        client.add(media, receive_ms, display_ms)
+        self.observe_receive(media, receive_ms / 1000)
+        self.observe_display(media, display_ms / 1000)
+
+        sample = {
+            'media': media,
+            'seq': ack.get('seq'),
+            'receive_ms': round(receive_ms, 1),
+            'display_ms': round(display_ms, 1),
+            'rtt_ms': round(client.rtt_ms, 1)
+        }
+        for callback in self.listeners:
+            callback(sid, sample)
+        return sample
+
+    def buffer(self, sid, report):
+        """Latest jitter buffer report from a viewer (numbers only, anything else is dropped)"""
+        self._client(sid).audio_buffer = {
+            key: round(float(value), 1) for key, value in report.items()
+            if key in BUFFER_FIELDS and isinstance(value, (int, float))
+        }
+
+    def buffer_depths(self):
+        """[(sid, depth_ms)] for viewers that have reported, for a scrape-time gauge"""
+        with self.lock:
+            clients = list(self.clients.items())
+        return [(sid, client.audio_buffer['depth_ms']) for sid, client in clients
+                if client.audio_buffer and 'depth_ms' in client.audio_buffer]
+
+    def remove(self, sid):
+        with self.lock:
+            self.clients.pop(sid, None)
+
+    def stats(self):
+        """Per viewer: smoothed RTT and p50/p95/p99 capture-to-receive/display per media"""
+        with self.lock:
+            clients = list(self.clients.items())
+        result = {}
+        for sid, client in clients:
+            media_stats = {}
+            for media, samples in list(client.samples.items()):
+                samples = list(samples)
+                if not samples:
+                    continue
+                media_stats[media] = {
+                    'samples': len(samples),
+                    'receive_ms': _quantiles(sample[0] for sample in samples),
+                    'display_ms': _quantiles(sample[1] for sample in samples)
+                }
+            result[sid] = {
+                'rtt_ms': round(client.rtt_ms, 1) if client.rtt_ms is not None else None,
+                'media': media_stats,
+                'audio_buffer': client.audio_buffer
+            }
+        return result
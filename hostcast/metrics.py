@@ -0,0 +1,216 @@
+"""
+HostCast - Metrics
+Hot-path stage timings, byte counters and scrape-time gauges in Prometheus text format
+"""
+import bisect
+import functools
+import threading
+import time
+
+# Upper bounds in seconds for stage timings
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def payload_size(payload):
+    """Bytes in an emitted payload (binary, base64 text, or dicts/lists of them)"""
+    if isinstance(payload, (bytes, bytearray, str)):
+        return len(payload)
+    if isinstance(payload, dict):
+        return sum(payload_size(value) for value in payload.values())
+    if isinstance(payload, (list, tuple)):
+        return sum(payload_size(value) for value in payload)
+    return 0
+
+
+def escape_label(value):
+    """A label value as the exposition format needs it: backslash, quote and newline escaped"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """Fixed-bucket histogram - one bisect and two additions per observation"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.counts), self.sum, self.count
+
+    def quantile(self, q, counts, count):
+        """Upper bound of the bucket holding the q-th quantile"""
+        rank = q * count
+        seen = 0
+        for bound, n in zip(self.buckets, counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class Metrics:
+    """
+    Collects everything in memory; nothing is formatted until /metrics or
+    /stats is requested. Gauges such as per-client queue depth are
+    callbacks evaluated only at scrape time, so they cost nothing between
+    scrapes. With enabled=False every hook is a no-op.
+    """
+
+    def __init__(self, enabled=True, prefix="hostcast"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.families = {}  # name -> (help, label, buckets, {label value: Histogram})
+        self.sent = {}  # event -> [messages, bytes]
+        self.gauges = []  # (name, help, callback -> [(labels, value)])
+        self.lock = threading.Lock()
+        self.histogram("stage_seconds", "Time spent per pipeline stage", "stage")
+
+    def histogram(self, name, help_text, label, buckets=BUCKETS):
+        """Register a histogram family with one label; returns observe(label value, seconds)"""
+        with self.lock:
+            self.families.setdefault(name, (help_text, label, buckets, {}))
+        return functools.partial(self._observe, name)
+
+    def _observe(self, name, value, seconds):
+        if not self.enabled:
+            return
+        _, _, buckets, series = self.families[name]
+        histogram = series.get(value)
+        if histogram is None:
+            with self.lock:
+                histogram = series.setdefault(value, Histogram(buckets))
+        histogram.observe(seconds)
+
+    def observe(self, stage, seconds):
+        """Record one timing for a pipeline stage"""
+        self._observe("stage_seconds", stage, seconds)
+
+    def stage(self, name):
+        """Context manager timing a block as stage `name`"""
+        return _StageTimer(self, name)
+
+    def timed(self, stage):
+        """Decorator timing every call of a function (e.g. input handlers)"""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(stage, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def count_sent(self, event, payload):
+        if not self.enabled:
+            return
+        size = payload_size(payload)
+        with self.lock:
+            counters = self.sent.setdefault(event, [0, 0])
+            counters[0] += 1
+            counters[1] += size
+
+    def gauge(self, name, help_text, callback):
+        """Register a gauge computed at scrape time: callback() -> [(labels dict, value)]"""
+        self.gauges.append((name, help_text, callback))
+
+    def _series(self):
+        with self.lock:
+            return sorted((name, help_text, label, sorted(series.items()))
+                          for name, (help_text, label, _, series) in self.families.items())
+
+    def snapshot(self):
+        """JSON-friendly view: count/avg/p50/p95/p99 (ms) per stage and histogram, bytes sent"""
+        histograms = {}
+        for name, _, _, series in self._series():
+            summaries = {}
+            for value, histogram in series:
+                counts, total, count = histogram.snapshot()
+                if not count:
+                    continue
+                summaries[value] = {
+                    'count': count,
+                    'avg_ms': round(total / count * 1000, 3),
+                    'p50_ms': histogram.quantile(0.50, counts, count) * 1000,
+                    'p95_ms': histogram.quantile(0.95, counts, count) * 1000,
+                    'p99_ms': histogram.quantile(0.99, counts, count) * 1000
+                }
+            histograms[name] = summaries
+        with self.lock:
+            sent = {event: {'messages': n, 'bytes': size} for event, (n, size) in self.sent.items()}
+        gauges = {}
+        for name, _, callback in self.gauges:
+            gauges[name] = [dict(labels, value=value) for labels, value in callback()]
+        return {
+            'enabled': self.enabled,
+            'stages': histograms.pop("stage_seconds"),
+            'histograms': histograms,
+            'sent': sent,
+            'gauges': gauges
+        }
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        p = self.prefix
+        lines = []
+        for name, help_text, label, series in self._series():
+            lines += [f"# HELP {p}_{name} {help_text}", f"# TYPE {p}_{name} histogram"]
+            for value, histogram in series:
+                counts, total, count = histogram.snapshot()
+                value = escape_label(value)
+                cumulative = 0
+                for bound, n in zip(histogram.buckets, counts):
+                    cumulative += n
+                    lines.append(f'{p}_{name}_bucket{{{label}="{value}",le="{bound}"}} {cumulative}')
+                lines.append(f'{p}_{name}_bucket{{{label}="{value}",le="+Inf"}} {count}')
+                lines.append(f'{p}_{name}_sum{{{label}="{value}"}} {total:.6f}')
+                lines.append(f'{p}_{name}_count{{{label}="{value}"}} {count}')
+
+        with self.lock:
+            sent = sorted(self.sent.items())
+
+        lines += [
+            f"# HELP {p}_sent_messages_total Socket.IO messages sent per event",
+            f"# TYPE {p}_sent_messages_total counter"
+        ]
+        lines += [f'{p}_sent_messages_total{{event="{escape_label(event)}"}} {n}' for event, (n, _) in sent]
+        lines += [
+            f"# HELP {p}_sent_bytes_total Payload bytes sent per event",
+            f"# TYPE {p}_sent_bytes_total counter"
+        ]
+        lines += [f'{p}_sent_bytes_total{{event="{escape_label(event)}"}} {size}' for event, (_, size) in sent]
+
+        for name, help_text, callback in self.gauges:
+            lines += [f"# HELP {p}_{name} {help_text}", f"# TYPE {p}_{name} gauge"]
+            for labels, value in callback():
+                label_text = ",".join(f'{key}="{escape_label(val)}"' for key, val in labels.items())
+                lines.append(f"{p}_{name}{{{label_text}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class _StageTimer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
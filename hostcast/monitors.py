@@ -0,0 +1,189 @@
+"""
+HostCast - Monitor Streams
+One capture/encode stream per monitor, running only while someone watches it
+"""
+import math
+import threading
+
+
+def describe_monitors(monitors):
+    """screen_info entries for mss monitors (index 0 is the combined desktop, skipped)"""
+    return [
+        {
+            'index': index,
+            'left': monitor['left'],
+            'top': monitor['top'],
+            'width': monitor['width'],
+            'height': monitor['height']
+        }
+        for index, monitor in enumerate(monitors) if index > 0
+    ]
+
+
+def snap_viewport(monitor, viewport, grid=16, minimum=160):
+    """
+    Turn a client's relative viewport {x, y, width, height} (0-1) into a
+    (left, top, width, height) pixel region of the monitor. Edges snap to
+    `grid` so viewers zoomed into nearly the same area share one stream.
+    None means the whole monitor - also the answer for a missing, partial
+    or non-numeric viewport, since it comes straight from the client.
+    """
+    if not isinstance(viewport, dict):
+        return None
+    try:
+        x, y, w, h = (float(viewport[key]) for key in ('x', 'y', 'width', 'height'))
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not all(math.isfinite(value) for value in (x, y, w, h)) or w <= 0 or h <= 0:
+        return None
+
+    def snap(value, limit):
+        return int(round(min(max(value, 0.0), 1.0) * limit / grid)) * grid
+
+    width = max(minimum, snap(w, monitor['width']))
+    height = max(minimum, snap(h, monitor['height']))
+    width = min(width, monitor['width'])
+    height = min(height, monitor['height'])
+    if width == monitor['width'] and height == monitor['height']:
+        return None
+
+    left = max(0, min(snap(x, monitor['width']), monitor['width'] - width))
+    top = max(0, min(snap(y, monitor['height']), monitor['height'] - height))
+    return left, top, width, height
+
+
+def relative_viewport(monitor, region):
+    """Inverse of snap_viewport - the region as fractions of the monitor"""
+    if region is None:
+        return None
+    left, top, width, height = region
+    return {
+        'x': left / monitor['width'],
+        'y': top / monitor['height'],
+        'width': width / monitor['width'],
+        'height': height / monitor['height']
+    }
+
+
+class MonitorStream:
+    """
+    Capture/encode state for one monitor, or one zoomed region of it -
+    built on the first subscriber, discarded after the last
+    """
+
+    def __init__(self, index, region, broadcaster, idle, pipeline, adaptive, ring=None, video=None, scheduler=None):
+        self.index = index
+        self.region = region  # (left, top, width, height) within the monitor, None = all of it
+        self.broadcaster = broadcaster
+        self.idle = idle
+        self.pipeline = pipeline
+        self.adaptive = adaptive
+        self.ring = ring
+        self.video = video  # VideoEncoder session in video mode, None = JPEG frames
+        self.scheduler = scheduler  # FrameScheduler pacing the capture loop
+        self.active = True  # Cleared when the last viewer leaves; the capture thread then exits
+
+    @property
+    def name(self):
+        if self.region is None:
+            return str(self.index)
+        left, top, width, height = self.region
+        return f"{self.index}@{width}x{height}+{left}+{top}"
+
+    def area(self, monitor):
+        """mss grab rectangle for this stream given the monitor's geometry"""
+        if self.region is None:
+            return monitor
+        left, top, width, height = self.region
+        return {
+            'left': monitor['left'] + left,
+            'top': monitor['top'] + top,
+            'width': width,
+            'height': height
+        }
+
+    def stats(self):
+        return {
+            'frames': self.broadcaster.stats(),
+            'idle': self.idle.stats() if self.idle else None,
+            'pipeline': self.pipeline.stats(),
+            'buffers': self.ring.stats() if self.ring else None,
+            'adaptive': self.adaptive.stats(),
+            'video': self.video.stats() if self.video else None,
+            'schedule': self.scheduler.stats() if self.scheduler else None
+        }
+
+
+class MonitorRegistry:
+    """
+    Tracks which monitor (and zoomed region) each viewer watches. A
+    stream's capture thread is started by its first subscriber and stopped
+    when the last one leaves, so unwatched monitors are never grabbed or
+    encoded. Viewers watching the same monitor and region share a stream.
+    """
+
+    def __init__(self, create_stream, run_stream):
+        self.create_stream = create_stream  # (index, region) -> MonitorStream
+        self.run_stream = run_stream  # Capture loop, run in its own thread per stream
+        self.streams = {}
+        self.selected = {}  # sid -> (monitor index, region)
+        self.lock = threading.Lock()
+
+    def subscribe(self, sid, index, region=None, namespace=None):
+        """
+        Switch a viewer to monitor `index` (optionally a region of it), starting its stream if needed.
+        `namespace` is where the viewer's frames go when one host serves several features.
+        """
+        key = (index, region)
+        with self.lock:
+            previous = self.selected.get(sid)
+            if previous == key:
+                return
+            if previous is not None:
+                self._leave(sid, previous)
+            self.selected[sid] = key
+
+            stream = self.streams.get(key)
+            if stream is None:
+                stream = self.streams[key] = self.create_stream(index, region)
+                threading.Thread(target=self.run_stream, args=(stream,), daemon=True).start()
+                print(f"🖥️ Monitor {stream.name} stream started")
+            stream.broadcaster.add_client(sid, namespace)
+
+    def unsubscribe(self, sid):
+        """Remove a viewer; returns its final send counters"""
+        with self.lock:
+            key = self.selected.pop(sid, None)
+            if key is None:
+                return None
+            return self._leave(sid, key)
+
+    def _leave(self, sid, key):
+        stream = self.streams[key]
+        counters = stream.broadcaster.remove_client(sid)
+        if stream.broadcaster.client_count() == 0:
+            stream.active = False
+            del self.streams[key]
+            print(f"🖥️ Monitor {stream.name} stream stopped (no viewers)")
+        return counters
+
+    def selection(self, sid):
+        """(monitor index, region) the viewer watches, or (None, None)"""
+        return self.selected.get(sid, (None, None))
+
+    def viewers(self):
+        """(stream, viewer sids) for every running stream"""
+        with self.lock:
+            groups = {}
+            for sid, key in self.selected.items():
+                groups.setdefault(key, []).append(sid)
+            return [(self.streams[key], sids) for key, sids in groups.items()]
+
+    def stream_of(self, sid):
+        with self.lock:
+            return self.streams.get(self.selected.get(sid))
+
+    def stats(self):
+        with self.lock:
+            streams = list(self.streams.values())
+        return {stream.name: stream.stats() for stream in streams}
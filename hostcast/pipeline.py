@@ -0,0 +1,103 @@
+"""
+HostCast - Encode Pipeline
+Capture thread -> pool of encoder workers -> sequencer that publishes in capture order
+"""
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class EncodePipeline:
+    """
+    Runs encode jobs on a worker pool while keeping their results in order.
+    Pillow releases the GIL while resizing and encoding, so several frames
+    can be in flight on a multi-core host. The capture thread blocks once
+    `depth` frames are pending, which bounds memory and latency.
+    """
+
+    def __init__(self, publish, workers=2, depth=4):
+        # publish(event, payload, delta) - usually FrameBroadcaster.publish
+        self.publish = publish
+        self.workers = workers
+        self.depth = depth
+        self.pending = None
+        self.executor = None
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+        self.encoded = 0
+        self.failed = 0
+        self.encode_time = 0.0
+        self.window_time = 0.0
+        self.window_count = 0
+
+    def start(self):
+        # Fresh queue/event per session so a lingering old sequencer can't steal results
+        self.pending = queue.Queue(maxsize=self.depth)
+        self.stopped = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="encoder")
+        threading.Thread(target=self._sequencer, args=(self.pending, self.stopped), daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, fn, *args):
+        """Queue an encode job; blocks while the pipeline is full"""
+        future = self.executor.submit(self._timed, fn, *args)
+        self.resubmit(future)
+        return future
+
+    def resubmit(self, future):
+        """Publish an earlier job's result again, in order (e.g. an idle heartbeat)"""
+        while not self.stopped.is_set():
+            try:
+                self.pending.put(future, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _timed(self, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.encode_time += elapsed
+            self.encoded += 1
+            self.window_time += elapsed
+            self.window_count += 1
+        return result
+
+    def take_window_ms(self):
+        """Average encode time since the last call, in milliseconds"""
+        with self.lock:
+            avg = self.window_time / self.window_count * 1000 if self.window_count else 0.0
+            self.window_time = 0.0
+            self.window_count = 0
+        return avg
+
+    def _sequencer(self, pending, stopped):
+        """Publish results strictly in submission order"""
+        while not stopped.is_set():
+            try:
+                future = pending.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                result = future.result()
+            except Exception as e:
+                self.failed += 1
+                print(f"⚠️ Encode error: {e}")
+                continue
+            if result is not None and not stopped.is_set():
+                self.publish(*result)
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'in_flight': self.pending.qsize() if self.pending else 0,
+            'encoded': self.encoded,
+            'failed': self.failed,
+            'avg_encode_ms': round(self.encode_time / self.encoded * 1000, 2) if self.encoded else 0.0
+        }
@@ -0,0 +1,127 @@
+"""
+HostCast - Remote Input
+Mouse and keyboard events from a viewer's canvas replayed on the host through pynput
+"""
+from pynput import mouse, keyboard
+
+# Browser KeyboardEvent.key -> pynput key (anything else is typed as the character itself)
+KEY_MAP = {
+    'Backspace': keyboard.Key.backspace,
+    'Tab': keyboard.Key.tab,
+    'Enter': keyboard.Key.enter,
+    'Shift': keyboard.Key.shift,
+    'Control': keyboard.Key.ctrl,
+    'Alt': keyboard.Key.alt,
+    'Pause': keyboard.Key.pause,
+    'CapsLock': keyboard.Key.caps_lock,
+    'Escape': keyboard.Key.esc,
+    ' ': keyboard.Key.space,
+    'PageUp': keyboard.Key.page_up,
+    'PageDown': keyboard.Key.page_down,
+    'End': keyboard.Key.end,
+    'Home': keyboard.Key.home,
+    'ArrowLeft': keyboard.Key.left,
+    'ArrowUp': keyboard.Key.up,
+    'ArrowRight': keyboard.Key.right,
+    'ArrowDown': keyboard.Key.down,
+    'Insert': keyboard.Key.insert,
+    'Delete': keyboard.Key.delete,
+    'Meta': keyboard.Key.cmd,
+    'ContextMenu': keyboard.Key.menu,
+    'F1': keyboard.Key.f1, 'F2': keyboard.Key.f2,
+    'F3': keyboard.Key.f3, 'F4': keyboard.Key.f4,
+    'F5': keyboard.Key.f5, 'F6': keyboard.Key.f6,
+    'F7': keyboard.Key.f7, 'F8': keyboard.Key.f8,
+    'F9': keyboard.Key.f9, 'F10': keyboard.Key.f10,
+    'F11': keyboard.Key.f11, 'F12': keyboard.Key.f12,
+    'NumLock': keyboard.Key.num_lock,
+    'ScrollLock': keyboard.Key.scroll_lock,
+}
+
+BUTTONS = {
+    'left': mouse.Button.left,
+    'right': mouse.Button.right,
+    'middle': mouse.Button.middle
+}
+
+
+class RemoteInput:
+    """Host mouse and keyboard driven by viewer events; a malformed event is logged and dropped"""
+
+    def __init__(self):
+        self.mouse = mouse.Controller()
+        self.keyboard = keyboard.Controller()
+
+    def position(self):
+        return self.mouse.position
+
+    def move(self, monitor, region, data):
+        """Pointer to the viewer's (x, y), relative (0-1) to the monitor - or the zoomed region of it - it shows"""
+        if not monitor:
+            return
+        try:
+            area = {'left': monitor['left'], 'top': monitor['top'], 'width': monitor['width'], 'height': monitor['height']}
+            if region:
+                area['left'] += region[0]
+                area['top'] += region[1]
+                area['width'], area['height'] = region[2], region[3]
+
+            # Relative canvas coordinates to absolute virtual-desktop ones, clamped to the visible area
+            x = area['left'] + int(data['x'] * area['width'])
+            y = area['top'] + int(data['y'] * area['height'])
+            x = max(area['left'], min(x, area['left'] + area['width'] - 1))
+            y = max(area['top'], min(y, area['top'] + area['height'] - 1))
+
+            self.mouse.position = (x, y)
+        except Exception as e:
+            print(f"❌ Mouse move error: {e}")
+
+    def click(self, data):
+        """Button down/up/click/double"""
+        try:
+            button = BUTTONS.get(data['button'], mouse.Button.left)
+            action = data['action']
+
+            if action == 'down':
+                self.mouse.press(button)
+            elif action == 'up':
+                self.mouse.release(button)
+            elif action == 'click':
+                self.mouse.click(button, 1)
+            elif action == 'double':
+                self.mouse.click(button, 2)
+
+            print(f"🖱️ Mouse {action}: {data['button']}")
+        except Exception as e:
+            print(f"❌ Mouse click error: {e}")
+
+    def scroll(self, data):
+        """Wheel deltas in browser pixels, about 50 per notch"""
+        try:
+            delta_x = data.get('deltaX', 0)
+            delta_y = data.get('deltaY', 0)
+
+            if abs(delta_y) > 0:
+                self.mouse.scroll(0, -int(delta_y / 50))
+            if abs(delta_x) > 0:
+                self.mouse.scroll(int(delta_x / 50), 0)
+
+            print(f"🖱️ Scroll: dx={delta_x}, dy={delta_y}")
+        except Exception as e:
+            print(f"❌ Mouse scroll error: {e}")
+
+    def key(self, data):
+        """Key down/up, special keys through KEY_MAP"""
+        try:
+            key = data['key']
+            action = data['action']
+            mapped_key = KEY_MAP.get(key, key)
+
+            if action == 'down':
+                self.keyboard.press(mapped_key)
+                print(f"⌨️ Key DOWN: {key}")
+            elif action == 'up':
+                self.keyboard.release(mapped_key)
+                print(f"⌨️ Key UP: {key}")
+        except Exception as e:
+            print(f"❌ Key event error: {e}")
@@ -0,0 +1,130 @@
+"""
+HostCast - Virtual Screen Render Cache
+The static extended-display layer is drawn, scaled and JPEG-encoded once per (resolution, display name)
+"""
+import io
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageDraw, ImageFont
+
+
+def draw_host_cursor(draw, x, y, scale=1.0):
+    """Host cursor marker (ring + crosshair) centred on (x, y)"""
+    size = 20 * scale
+    ring = max(1, round(4 * scale))
+    cross = max(1, round(3 * scale))
+    draw.ellipse([x - size, y - size, x + size, y + size], outline=(255, 0, 255), width=ring)
+    draw.line([(x - size - 10 * scale, y), (x + size + 10 * scale, y)], fill=(255, 0, 255), width=cross)
+    draw.line([(x, y - size - 10 * scale), (x, y + size + 10 * scale)], fill=(255, 0, 255), width=cross)
+
+
+class ScreenLayer:
+    """One cached background: the scaled image plus its encoded JPEG"""
+
+    def __init__(self, image, jpeg, scale):
+        self.image = image  # At output size, ready to draw a cursor on
+        self.jpeg = jpeg  # Sent as is whenever the host cursor is elsewhere
+        self.scale = scale  # Output pixels per display pixel
+
+
+class VirtualScreenCache:
+    """
+    Rendering the grid, border and text costs far more than the cursor on
+    top of it, and it only changes with the display's resolution or name.
+    Layers are kept per (width, height, display name) - clients with the
+    same settings share one. The least recently used layer is evicted first.
+    """
+
+    def __init__(self, target_width=1280, quality=75, max_layers=32):
+        self.target_width = target_width
+        self.quality = quality
+        self.max_layers = max_layers
+        self.layers = OrderedDict()
+        self.lock = threading.Lock()
+        self.fonts = None
+        self.hits = 0
+        self.misses = 0
+
+    def _load_fonts(self):
+        if self.fonts is None:
+            try:
+                self.fonts = (ImageFont.truetype("arial.ttf", 60), ImageFont.truetype("arial.ttf", 30))
+            except OSError:
+                self.fonts = (ImageFont.load_default(), ImageFont.load_default())
+        return self.fonts
+
+    def _render(self, width, height, display_name):
+        """Full-resolution static layer: background, border, grid, crosshair and labels"""
+        img = Image.new('RGB', (width, height), color=(15, 15, 25))
+        draw = ImageDraw.Draw(img)
+
+        draw.rectangle([0, 0, width - 1, height - 1], outline=(0, 255, 0), width=5)
+
+        grid_spacing = 80
+        for x in range(0, width, grid_spacing):
+            draw.line([(x, 0), (x, height)], fill=(35, 35, 45), width=1)
+        for y in range(0, height, grid_spacing):
+            draw.line([(0, y), (width, y)], fill=(35, 35, 45), width=1)
+
+        center_x, center_y = width // 2, height // 2
+        draw.line([(center_x - 50, center_y), (center_x + 50, center_y)], fill=(0, 255, 0), width=2)
+        draw.line([(center_x, center_y - 50), (center_x, center_y + 50)], fill=(0, 255, 0), width=2)
+
+        font_large, font_small = self._load_fonts()
+        for text, font, fill, y in (
+            ("Extended Display", font_large, (0, 255, 0), height // 2 - 100),
+            (display_name, font_small, (100, 255, 100), height // 2),
+            (f"{width}x{height}", font_small, (100, 255, 100), height // 2 + 50)
+        ):
+            bbox = draw.textbbox((0, 0), text, font=font)
+            draw.text(((width - (bbox[2] - bbox[0])) // 2, y), text, fill=fill, font=font)
+        return img
+
+    def _encode(self, img, optimize=True):
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=self.quality, optimize=optimize)
+        return buffer.getvalue()
+
+    def layer(self, width, height, display_name):
+        """Cached ScreenLayer, rendered on first use"""
+        key = (width, height, display_name)
+        with self.lock:
+            layer = self.layers.get(key)
+            if layer is not None:
+                self.layers.move_to_end(key)
+                self.hits += 1
+                return layer
+            self.misses += 1
+
+        # Rendered outside the lock, so other clients' hits don't wait on it
+        img = self._render(width, height, display_name)
+        scale = 1.0
+        if self.target_width and width > self.target_width:
+            scale = self.target_width / width
+            img = img.resize((self.target_width, int(height * scale)), Image.LANCZOS)
+        layer = ScreenLayer(img, self._encode(img), scale)
+
+        with self.lock:
+            cached = self.layers.get(key)
+            if cached is not None:
+                self.layers.move_to_end(key)
+                return cached  # Another client rendered the same layer meanwhile
+            self.layers[key] = layer
+            if len(self.layers) > self.max_layers:
+                self.layers.popitem(last=False)  # Least recently used
+            return layer
+
+    def frame(self, width, height, display_name, mouse_x=None, mouse_y=None):
+        """JPEG of the display with the host cursor at (mouse_x, mouse_y) in 0-1, if given"""
+        layer = self.layer(width, height, display_name)
+        if mouse_x is None or mouse_y is None:
+            return layer.jpeg
+
+        # Composite on a copy of the already scaled layer - no re-render, no resize
+        img = layer.image.copy()
+        draw_host_cursor(ImageDraw.Draw(img), int(mouse_x * img.width), int(mouse_y * img.height), layer.scale)
+        return self._encode(img, optimize=False)  # The optimize pass costs ~45% more CPU per frame
+
+    def stats(self):
+        with self.lock:
+            return {'layers': len(self.layers), 'hits': self.hits, 'misses': self.misses}
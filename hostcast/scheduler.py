@@ -0,0 +1,114 @@
+"""
+HostCast - Frame Scheduler
+Paces capture loops against absolute deadlines on the monotonic clock
+"""
+import threading
+import time
+from collections import deque
+
+POLICIES = ("skip", "catchup")
+
+
+def percentile(values, q):
+    """q-th quantile (0-1) of an already sorted list"""
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class FrameScheduler:
+    """
+    Sleeping "frame time minus elapsed" drifts by every sleep's overshoot
+    and by wall-clock jumps. Here each frame has a fixed deadline one
+    period after the previous one, so errors don't accumulate.
+
+    After an overrun:
+      skip    - the missed slots are dropped and the schedule restarts from
+                now (no burst of back-to-back frames)
+      catchup - late frames run back to back until the schedule is met
+                again, for at most `max_catchup` periods of backlog
+    """
+
+    def __init__(self, fps, policy="skip", window=300, report_interval=5.0, max_catchup=3):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown frame policy '{policy}' (expected one of {POLICIES})")
+        self.fps = fps
+        self.policy = policy
+        self.max_catchup = max_catchup
+        self.report_interval = report_interval
+        self.intervals = deque(maxlen=window)  # Seconds between consecutive frames
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.deadline = None
+        self.last_tick = None
+        self.last_report = time.monotonic()
+        self.frames = 0
+        self.late = 0
+        self.skipped = 0
+        with self.lock:
+            self.intervals.clear()
+
+    def wait(self):
+        """End of a frame: block until the next one is due"""
+        period = 1.0 / self.fps
+        now = time.monotonic()
+        if self.deadline is None:
+            self.deadline = now
+        self.deadline += period
+
+        late = now - self.deadline
+        if late > 0:
+            self.late += 1
+            missed = int(late / period)
+            if self.policy == "skip" or missed > self.max_catchup:
+                self.skipped += missed
+                self.deadline = now
+        else:
+            time.sleep(-late)
+
+        tick = time.monotonic()
+        if self.last_tick is not None:
+            with self.lock:
+                self.intervals.append(tick - self.last_tick)
+        self.last_tick = tick
+        self.frames += 1
+
+    def report_due(self):
+        """True every `report_interval` seconds - for periodic FPS logging"""
+        now = time.monotonic()
+        if now - self.last_report < self.report_interval:
+            return False
+        self.last_report = now
+        return True
+
+    def stats(self):
+        with self.lock:
+            intervals = list(self.intervals)
+        stats = {
+            'policy': self.policy,
+            'target_fps': self.fps,
+            'fps': None,
+            'jitter_ms': None,
+            'frames': self.frames,
+            'late': self.late,
+            'skipped': self.skipped
+        }
+        if intervals:
+            period = 1.0 / self.fps
+            jitter = sorted(abs(interval - period) * 1000 for interval in intervals)
+            stats['fps'] = round(len(intervals) / sum(intervals), 1)
+            stats['jitter_ms'] = {
+                'p50': round(percentile(jitter, 0.50), 2),
+                'p95': round(percentile(jitter, 0.95), 2),
+                'p99': round(percentile(jitter, 0.99), 2)
+            }
+        return stats
+
+    def summary(self):
+        """One-line FPS/jitter report"""
+        stats = self.stats()
+        if not stats['fps']:
+            return "no frames yet"
+        jitter = stats['jitter_ms']
+        return (f"{stats['fps']:.1f} FPS (target {stats['target_fps']}), jitter p50/p95/p99 "
+                f"{jitter['p50']:.1f}/{jitter['p95']:.1f}/{jitter['p99']:.1f} ms, skipped {stats['skipped']}")
@@ -0,0 +1,321 @@
+"""
+HostCast - Screen Streaming
+The capture -> encode -> send loop for every watched monitor, shared by the
+screen-sharing, remote-control and unified-host servers
+"""
+import time
+from dataclasses import dataclass
+
+import mss
+import numpy as np
+
+from .adaptive import AdaptiveController
+from .broadcaster import FrameBroadcaster
+from .buffers import FrameRing, enable_image_arena
+from .capture_process import CaptureProcess
+from .encoders import create_encoder
+from .fanout import pack_bytes
+from .idle import IdleDetector
+from .monitors import MonitorStream, MonitorRegistry, describe_monitors
+from .pipeline import EncodePipeline
+from .scheduler import FrameScheduler
+from .tiles import TileDiffer
+from .video import create_video_encoder
+
+
+def output_size(width, height, target):
+    """Stream size after scaling down to the current target width"""
+    if target and width > target:
+        return target, int(height * target / width)
+    return width, height
+
+
+@dataclass
+class StreamConfig:
+    """Capture, encode and send settings; each server builds one from its configuration constants"""
+    target_width: int = 1280
+    target_fps: int = 30  # Starting frame rate
+    jpeg_quality: int = 70  # Starting JPEG quality
+    quality_range: tuple = (35, 85)
+    width_range: tuple = (640, 1920)
+    fps_range: tuple = (10, 30)
+    adaptive: bool = True  # Adjust quality/width/FPS to encoder load and viewer backpressure
+    frame_queue_size: int = 4  # Frames buffered per viewer before the oldest is dropped
+    binary_transport: bool = True  # False = base64 for old clients
+    tile_mode: bool = False
+    tile_size: int = 64
+    keyframe_interval: int = 90
+    idle_detection: bool = True
+    idle_sample_step: int = 4
+    idle_heartbeat: float = 1.0
+    encoder_workers: int = 2
+    pipeline_depth: int = 4
+    jpeg_encoder: str = "auto"
+    buffer_ring: bool = False
+    frame_policy: str = "skip"
+    video_codec: str = None  # None = JPEG frames; "h264" or "vp8"
+    video_gop: int = 120
+    video_low_latency: bool = True
+    capture_process: bool = False
+    capture_ring_slots: int = 8
+    capture_slot_mb: int = 4
+
+
+class ScreenStreamer:
+    """
+    Monitor streams of one server: builds a stream for each watched monitor
+    (or zoomed region) and runs its capture loop while it has viewers
+    """
+
+    def __init__(self, config, socketio, fanout, metrics, latency, namespace='/'):
+        self.config = config
+        self.socketio = socketio
+        self.fanout = fanout
+        self.metrics = metrics
+        self.latency = latency
+        self.namespace = namespace  # Where frames go for viewers that didn't join another namespace
+        self.encoder = create_encoder(config.jpeg_encoder, reuse_buffers=config.buffer_ring, observe=metrics.observe)
+        if config.buffer_ring:
+            enable_image_arena(config.encoder_workers * 8)  # A few Pillow images per worker; 4K frames span several blocks
+        if config.capture_process and (config.tile_mode or config.video_codec):
+            raise ValueError("CAPTURE_PROCESS sends full JPEG frames - turn off TILE_MODE and VIDEO_CODEC")
+        self.layout = {}  # mss index -> {'left', 'top', 'width', 'height'}, refreshed by screen_info
+        self.registry = MonitorRegistry(self.create_stream, self.run)
+
+    def pack(self, data):
+        return pack_bytes(data, self.config.binary_transport, self.metrics)
+
+    def capture_settings(self):
+        """What the capture process needs from the config"""
+        c = self.config
+        return {
+            'encoder': c.jpeg_encoder,
+            'buffer_ring': c.buffer_ring,
+            'workers': c.encoder_workers,
+            'depth': c.pipeline_depth,
+            'idle_detection': c.idle_detection,
+            'idle_sample_step': c.idle_sample_step,
+            'idle_heartbeat': c.idle_heartbeat,
+            'frame_policy': c.frame_policy
+        }
+
+    def create_stream(self, index, region=None):
+        """Own viewers, idle detector, encoder pool and controller for one monitor"""
+        c = self.config
+        broadcaster = FrameBroadcaster(self.socketio, namespace=self.namespace, queue_size=c.frame_queue_size,
+                                       metrics=self.metrics, fanout=self.fanout)
+        adaptive = AdaptiveController(
+            c.jpeg_quality, c.target_width, c.target_fps,
+            c.quality_range, c.width_range, c.fps_range,
+            enabled=c.adaptive
+        )
+        if c.capture_process:
+            # Idle detection and pacing run in the capture process too; their counters show in the pipeline stats
+            capture = CaptureProcess(index, region, self.capture_settings(), c.capture_ring_slots,
+                                     c.capture_slot_mb * 1024 * 1024)
+            return MonitorStream(index, region, broadcaster, None, capture, adaptive)
+        video = create_video_encoder(c.video_codec, c.video_gop, c.video_low_latency, observe=self.metrics.observe)
+        return MonitorStream(
+            index,
+            region,
+            broadcaster,
+            IdleDetector(c.idle_sample_step, c.idle_heartbeat),
+            # Inter-frame coding depends on the previous frame, so video frames are encoded one at a time
+            EncodePipeline(broadcaster.publish, 1 if video else c.encoder_workers, c.pipeline_depth),
+            adaptive,
+            FrameRing(c.pipeline_depth + 2) if c.buffer_ring else None,  # In-flight frames + the one being captured
+            video,
+            FrameScheduler(c.target_fps, c.frame_policy)
+        )
+
+    def screen_info(self, index):
+        """Geometry of the watched monitor plus the whole layout (virtual-desktop offsets); viewport = zoom"""
+        with mss.mss() as sct:
+            monitors = describe_monitors(sct.monitors)
+        self.layout.update((m['index'], m) for m in monitors)
+        selected = next((m for m in monitors if m['index'] == index), monitors[0])
+        return dict(selected, monitors=monitors, viewport=None)
+
+    def encode_frame(self, bgra, size, quality):
+        """Full-frame JPEG from a BGRA capture"""
+        return self.encoder.encode(self.encoder.source(bgra), size, quality)
+
+    def frame_job(self, bgra, size, quality, stamp):
+        """Encoder worker: one full frame (JPEG, then its capture stamp as a second argument)"""
+        return "frame", (self.pack(self.encode_frame(bgra, size, quality)), stamp), False
+
+    def tiles_job(self, bgra, regions, size, quality, stamp):
+        """Encoder worker: changed regions as one delta update"""
+        source = self.encoder.source(bgra)
+        tiles = []
+        for src_box, out_box in regions:
+            x0, y0, x1, y1 = out_box
+            tiles.append({
+                "x": x0,
+                "y": y0,
+                "w": x1 - x0,
+                "h": y1 - y0,
+                "data": self.pack(self.encoder.encode(source, (x1 - x0, y1 - y0), quality, src_box))
+            })
+        update = {
+            "width": size[0],
+            "height": size[1],
+            "tiles": tiles,
+            **stamp
+        }
+        return "tiles", update, True
+
+    def video_job(self, video, bgra, size, quality, keyframe, stamp):
+        """Encoder worker: the next H.264/VP8 fragment (None while the muxer holds the first frame)"""
+        fragment = video.encode(bgra, size, quality, keyframe, stamp)
+        if fragment is None:
+            return None
+        fragment['data'] = self.pack(fragment['data'])
+        if fragment['init']:
+            fragment['init'] = self.pack(fragment['init'])
+        return "video", fragment, True
+
+    def adapt(self, stream):
+        """Feed the last window's encode time and viewer backpressure to the controller"""
+        controller = stream.adaptive
+        queue, in_flight = stream.broadcaster.backpressure()
+        changed = controller.update(
+            stream.pipeline.take_window_ms(), stream.pipeline.workers,
+            queue, self.config.frame_queue_size, in_flight
+        )
+        if changed:
+            print(f"🎚️ Monitor {stream.name}: quality={controller.quality}, width={controller.width}, "
+                  f"fps={controller.fps} ({controller.reason})")
+
+    def forward_captured_frames(self, stream):
+        """CAPTURE_PROCESS: the child grabs and encodes; this thread only hands its frames to the viewers"""
+        capture = stream.pipeline
+        adaptive_controller = stream.adaptive
+
+        try:
+            capture.start(adaptive_controller.quality, adaptive_controller.width, adaptive_controller.fps)
+            print(f"📺 Screen {stream.name}: capture process {capture.process.pid}")
+
+            while stream.active:
+                for data, frame_seq, t in capture.frames():
+                    stream.broadcaster.publish("frame", (self.pack(data), {'seq': frame_seq, 't': t}))
+
+                if adaptive_controller.due():
+                    self.adapt(stream)
+                    capture.configure(adaptive_controller.quality, adaptive_controller.width, adaptive_controller.fps)
+
+                capture.ensure_running()
+
+        except Exception as e:
+            print(f"❌ Screen error: {e}")
+        finally:
+            capture.stop()
+            print(f"✅ Screen {stream.name} stopped")
+
+    def run(self, stream):
+        """Capture and stream one monitor while it has viewers"""
+        if isinstance(stream.pipeline, CaptureProcess):
+            return self.forward_captured_frames(stream)
+
+        config = self.config
+        metrics = self.metrics
+        frame_broadcaster = stream.broadcaster
+        idle_detector = stream.idle
+        encode_pipeline = stream.pipeline
+        adaptive_controller = stream.adaptive
+        frame_ring = stream.ring
+
+        try:
+            with mss.mss() as sct:
+                monitor = stream.area(sct.monitors[stream.index])
+                print(f"📺 Screen {stream.name}: {monitor['width']}x{monitor['height']} at ({monitor['left']}, {monitor['top']})")
+
+                frame_scheduler = stream.scheduler
+                frame_scheduler.reset()
+                tile_differ = TileDiffer(config.tile_size, config.keyframe_interval) if config.tile_mode else None
+                encode_pipeline.start()
+                last_frame_job = None
+                video_flush = False  # Push the last changed frame or forced keyframe out of the muxer
+                frame_seq = 0
+
+                while stream.active:
+                    try:
+                        with metrics.stage("grab"):
+                            frame = sct.grab(monitor)
+                            if frame_ring:
+                                # Copy into a reusable slot so the grab buffer is freed right away
+                                img_np = frame_ring.acquire(frame.height, frame.width)
+                                np.copyto(img_np, np.frombuffer(frame.raw, dtype=np.uint8).reshape(img_np.shape))
+                            else:
+                                # Zero-copy view of the capture buffer (np.array would copy it)
+                                img_np = np.frombuffer(frame.raw, dtype=np.uint8).reshape(frame.height, frame.width, 4)
+                        stamp = self.latency.stamp(frame_seq)
+                        frame_seq += 1
+                        job = None
+                        size = output_size(frame.width, frame.height, adaptive_controller.width)
+                        keyframe = frame_broadcaster.consume_keyframe_request()
+                        changed = idle_detector.changed(img_np) if config.idle_detection else True
+
+                        if not changed and not keyframe and not video_flush and not idle_detector.heartbeat_due():
+                            # Idle screen: skip resize, encode and emit entirely
+                            idle_detector.suppressed += 1
+                        else:
+                            if not changed and not keyframe and not video_flush:
+                                idle_detector.heartbeats += 1
+
+                            if stream.video:
+                                # Inter-frame codec: an unchanged frame costs a few bytes, and the
+                                # muxer only releases a frame once the next one arrives
+                                job = encode_pipeline.submit(self.video_job, stream.video, img_np, size, adaptive_controller.quality, keyframe, stamp)
+                                video_flush = changed or keyframe
+                            elif not changed and last_frame_job and not tile_differ:
+                                # Nothing new on screen - resend the last encoded frame as is
+                                encode_pipeline.resubmit(last_frame_job)
+                            else:
+                                # Tile mode: only re-encode regions changed since the last frame
+                                regions = None
+                                if tile_differ:
+                                    if keyframe or not changed:
+                                        tile_differ.request_keyframe()
+                                    regions = tile_differ.diff(img_np, *size)
+
+                                # Encoding runs on the worker pool; results reach the
+                                # per-viewer queues in capture order
+                                if regions is not None:
+                                    if regions:
+                                        job = encode_pipeline.submit(self.tiles_job, img_np, regions, size, adaptive_controller.quality, stamp)
+                                else:
+                                    job = last_frame_job = encode_pipeline.submit(self.frame_job, img_np, size, adaptive_controller.quality, stamp)
+
+                            idle_detector.mark_sent()
+
+                        if frame_ring:
+                            frame_ring.release_after(job, img_np)
+
+                        if frame_scheduler.report_due():
+                            print(f"📊 Monitor {stream.name}: {frame_scheduler.summary()}")
+
+                        if adaptive_controller.due():
+                            self.adapt(stream)
+
+                        # Frame timing: fixed deadlines, so sleep overshoot doesn't accumulate
+                        frame_scheduler.fps = adaptive_controller.fps
+                        frame_scheduler.wait()
+
+                    except Exception as e:
+                        print(f"⚠️ Screen error: {e}")
+                        time.sleep(0.1)
+
+        except Exception as e:
+            print(f"❌ Screen error: {e}")
+        finally:
+            encode_pipeline.stop()
+            print(f"✅ Screen {stream.name} stopped")
+
+    def queue_depths(self):
+        """Scrape-time gauge: frames waiting in each viewer's send queue"""
+        return [
+            ({'stream': stream.name, 'sid': sid}, counters['queued'])
+            for stream, _ in self.registry.viewers()
+            for sid, counters in stream.broadcaster.stats().items()
+        ]
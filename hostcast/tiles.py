@@ -0,0 +1,99 @@
+"""
+HostCast - Tile Diff Encoder
+Compares captured frames tile by tile so only dirty regions are re-encoded
+"""
+import numpy as np
+
+
+class TileDiffer:
+    """Tracks the previous BGRA frame and reports which output tiles changed"""
+
+    def __init__(self, tile_size=64, keyframe_interval=90, full_frame_ratio=0.5):
+        self.tile_size = tile_size
+        self.keyframe_interval = keyframe_interval
+        self.full_frame_ratio = full_frame_ratio  # Above this dirty share a keyframe is cheaper
+        self.previous = None
+        self.shape = None
+        self.frames_since_key = 0
+        self.force_key = True
+
+    def request_keyframe(self):
+        self.force_key = True
+
+    def _configure(self, src_w, src_h, out_w, out_h):
+        """Map output tile edges back to source pixels so every tile scales exactly"""
+        tile = self.tile_size
+        self.out_cols = list(range(0, out_w, tile)) + [out_w]
+        self.out_rows = list(range(0, out_h, tile)) + [out_h]
+        self.src_cols = [min(src_w, round(x * src_w / out_w)) for x in self.out_cols]
+        self.src_rows = [min(src_h, round(y * src_h / out_h)) for y in self.out_rows]
+        self.shape = (src_w, src_h, out_w, out_h)
+        self.previous = None
+
+    def diff(self, bgra, out_w, out_h):
+        """
+        Compare a (height, width, 4) BGRA frame to the previous one.
+        Returns None when a full keyframe should be sent, otherwise a list of
+        (src_box, out_box) rectangles - empty when nothing changed.
+        """
+        src_h, src_w = bgra.shape[:2]
+        if self.shape != (src_w, src_h, out_w, out_h):
+            self._configure(src_w, src_h, out_w, out_h)
+
+        previous = self.previous
+        self.frames_since_key += 1
+        key = previous is None or self.force_key or self.frames_since_key >= self.keyframe_interval
+
+        if not key:
+            # One uint32 per pixel, then OR-reduce into the tile grid
+            changed = bgra.view(np.uint32)[:, :, 0] != previous.view(np.uint32)[:, :, 0]
+            changed = np.logical_or.reduceat(changed, self.src_rows[:-1], axis=0)
+            dirty = np.logical_or.reduceat(changed, self.src_cols[:-1], axis=1)
+            key = dirty.mean() > self.full_frame_ratio
+
+        if previous is None:
+            self.previous = np.empty_like(bgra)
+        np.copyto(self.previous, bgra)
+
+        if key:
+            self.force_key = False
+            self.frames_since_key = 0
+            return None
+        return [self._boxes(rect) for rect in merge_tiles(dirty)]
+
+    def _boxes(self, rect):
+        col0, row0, col1, row1 = rect
+        src_box = (self.src_cols[col0], self.src_rows[row0], self.src_cols[col1], self.src_rows[row1])
+        out_box = (self.out_cols[col0], self.out_rows[row0], self.out_cols[col1], self.out_rows[row1])
+        return src_box, out_box
+
+
+def merge_tiles(dirty):
+    """Merge a boolean tile grid into (col0, row0, col1, row1) rectangles"""
+    rects = []
+    open_runs = {}
+    for row, flags in enumerate(dirty.tolist()):
+        runs = []
+        col = 0
+        while col < len(flags):
+            if flags[col]:
+                start = col
+                while col < len(flags) and flags[col]:
+                    col += 1
+                runs.append((start, col))
+            else:
+                col += 1
+
+        next_runs = {}
+        for run in runs:
+            # Extend a rectangle downwards when the previous row had the same span
+            top = open_runs.pop(run, row)
+            next_runs[run] = top
+        for (start, end), top in open_runs.items():
+            rects.append((start, top, end, row))
+        open_runs = next_runs
+
+    for (start, end), top in open_runs.items():
+        rects.append((start, top, end, dirty.shape[0]))
+    return rects
+
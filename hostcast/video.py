@@ -0,0 +1,180 @@
+"""
+HostCast - Inter-frame Video Encoder
+H.264 (fragmented MP4) or VP8 (WebM) through PyAV, played by the client via Media Source Extensions
+"""
+import io
+import time
+from fractions import Fraction
+
+CODECS = {
+    # name: (encoder, container, container options)
+    "h264": ("libx264", "mp4", {"movflags": "empty_moov+default_base_moof+frag_every_frame"}),
+    "vp8": ("libvpx", "webm", {"live": "1", "cluster_time_limit": "0"})
+}
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file that collects whatever the muxer writes"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class VideoEncoder:
+    """
+    One live encode session per stream. Frames go in as BGRA; fragments
+    come out ready for SourceBuffer.appendBuffer.
+
+    Both muxers write a frame only once the next one arrives (they need its
+    timestamp to close the fragment), so output lags input by one frame.
+
+    A change of output size starts a new session with a new `gen`. Clients
+    reset their MediaSource when `gen` changes and wait for a keyframe
+    fragment; keyframe fragments carry the init segment for that reason.
+    """
+
+    def __init__(self, codec="h264", gop=120, low_latency=True, observe=None):
+        import av
+        self.av = av
+        self.observe = observe or (lambda stage, seconds: None)  # Stage timings for /metrics
+        self.codec = codec
+        self.encoder_name, self.format, self.format_options = CODECS[codec]
+        self.gop = gop
+        self.low_latency = low_latency
+        self.container = None
+        self.size = None
+        self.gen = 0
+        self.keyframes = 0
+        self.fragments = 0
+
+    def _open(self, size, quality):
+        self.close()
+        self.sink = _Sink()
+        self.container = self.av.open(self.sink, "w", format=self.format, options=self.format_options)
+        stream = self.container.add_stream(self.encoder_name, rate=30)
+        stream.width, stream.height = size
+        stream.pix_fmt = "yuv420p"
+        context = stream.codec_context
+        context.time_base = Fraction(1, 1000)  # Wall-clock ms timestamps - the frame rate varies
+        context.gop_size = self.gop
+        context.options = self._codec_options(quality)
+        self.stream = stream
+        self.container.start_encoding()
+        self.size = size
+        self.gen += 1
+        self.init = None
+        self.start = time.monotonic()
+        self.last_pts = -1
+        self.held_key = False  # Whether the frame the muxer still holds is a keyframe
+        self.held_stamp = None  # ...and its capture stamp
+        self.mime = self._mime()
+
+    def _codec_options(self, quality):
+        # JPEG-style quality 35-85 -> constant-quality level; applied when a session starts
+        if self.encoder_name == "libx264":
+            options = {"preset": "ultrafast", "crf": str(round(51 - quality * 0.4))}
+            if self.low_latency:
+                options["tune"] = "zerolatency"  # No B-frames or lookahead, sliced threads
+            return options
+        options = {"crf": str(round(63 - quality * 0.6)), "b": "8M", "cpu-used": "8"}
+        if self.low_latency:
+            options.update({"deadline": "realtime", "lag-in-frames": "0"})
+        return options
+
+    def _mime(self):
+        if self.codec == "vp8":
+            return 'video/webm; codecs="vp8"'
+        # avc1.PPCCLL from the SPS (extradata is Annex B: start code, NAL header, profile, flags, level)
+        extradata = self.stream.codec_context.extradata or b""
+        sps = extradata.find(b"\x00\x00\x01\x67")
+        if sps < 0 or len(extradata) < sps + 7:
+            return 'video/mp4; codecs="avc1.42E01F"'
+        return f'video/mp4; codecs="avc1.{extradata[sps + 4:sps + 7].hex().upper()}"'
+
+    def encode(self, bgra, size, quality, keyframe=False, stamp=None):
+        """
+        Feed one frame; returns {gen, mime, key, init, data} plus the released
+        frame's `stamp` entries, or None while the muxer holds the first one
+        """
+        size = (size[0] & ~1, size[1] & ~1)  # 4:2:0 chroma needs even dimensions
+        if size != self.size:
+            self._open(size, quality)
+            keyframe = True
+
+        start = time.perf_counter()
+        frame = self.av.VideoFrame.from_ndarray(bgra, format="bgra")
+        frame = frame.reformat(size[0], size[1], format="yuv420p")  # Scale + convert in one swscale pass
+        converted = time.perf_counter()
+        self.observe("convert", converted - start)
+        pts = max(int((time.monotonic() - self.start) * 1000), self.last_pts + 1)
+        frame.pts = self.last_pts = pts
+        frame.time_base = self.stream.codec_context.time_base
+        if keyframe:
+            frame.pict_type = self.av.video.frame.PictureType.I
+
+        released_key, released_stamp = self.held_key, self.held_stamp
+        self.held_stamp = stamp
+        for packet in self.stream.encode(frame):
+            self.held_key = packet.is_keyframe
+            self.container.mux(packet)
+        self.observe("encode", time.perf_counter() - converted)
+
+        data = self.sink.take()
+        if self.init is None:
+            # Nothing but the header is out yet - keep it for viewers that join later
+            self.init = data
+            return None
+        if not data:
+            return None
+        self.fragments += 1
+        if released_key:
+            self.keyframes += 1
+        return {
+            'gen': self.gen,
+            'mime': self.mime,
+            'key': released_key,
+            'init': self.init if released_key else None,
+            'data': data,
+            **(released_stamp or {})
+        }
+
+    def close(self):
+        if self.container is not None:
+            try:
+                self.container.close()
+            except Exception:
+                pass  # Flushing a half-fed encoder can fail; the session is discarded anyway
+            self.container = None
+
+    def stats(self):
+        return {
+            'codec': self.codec,
+            'size': self.size,
+            'fragments': self.fragments,
+            'keyframes': self.keyframes
+        }
+
+
+def create_video_encoder(codec, gop=120, low_latency=True, observe=None):
+    """A VideoEncoder, or None (JPEG frames) when the codec or PyAV is unavailable"""
+    if not codec:
+        return None
+    try:
+        return VideoEncoder(codec, gop, low_latency, observe)
+    except KeyError:
+        print(f"⚠️ Unknown video codec '{codec}' - sending JPEG frames")
+    except ImportError as e:
+        print(f"⚠️ Video codec '{codec}' unavailable ({e}) - sending JPEG frames")
+    return None
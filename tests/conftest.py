@@ -0,0 +1,9 @@
+"""
+HostCast - Unit Tests
+The engine helpers live in the shared hostcast package at the repository root,
+so put that directory on the path the same way the servers do.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
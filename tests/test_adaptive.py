@@ -0,0 +1,57 @@
+from hostcast.adaptive import AdaptiveController
+
+
+def controller(**kwargs):
+    return AdaptiveController(70, 1280, 30, (30, 85), (640, 1920), (10, 30), **kwargs)
+
+
+def test_congestion_lowers_quality_first_then_width_then_fps():
+    adaptive = controller()
+    steps = []
+    for _ in range(6):
+        adaptive.update(encode_ms=5, workers=2, queue=2, queue_size=3, in_flight=0)
+        steps.append((adaptive.quality, adaptive.width, adaptive.fps))
+    assert steps[:5] == [(60, 1280, 30), (50, 1280, 30), (40, 1280, 30), (30, 1280, 30), (30, 1024, 30)]
+    assert adaptive.reason == "network backpressure: lowered width"
+
+
+def test_unacked_frames_count_as_congestion():
+    adaptive = controller(in_flight_limit=4)
+    assert adaptive.update(encode_ms=5, workers=2, queue=0, queue_size=3, in_flight=5)
+    assert adaptive.quality == 60
+
+
+def test_slow_encoder_lowers_width_not_quality():
+    adaptive = controller()
+    assert adaptive.update(encode_ms=100, workers=1, queue=0, queue_size=3, in_flight=0)  # 10 FPS of CPU
+    assert (adaptive.quality, adaptive.width, adaptive.fps) == (70, 1024, 30)
+    assert adaptive.reason == "encoder overloaded: lowered width"
+
+
+def test_clean_windows_restore_quality_when_the_encoder_has_no_headroom():
+    adaptive = controller(recover_windows=2)
+    adaptive.update(encode_ms=50, workers=2, queue=2, queue_size=3, in_flight=0)
+    assert adaptive.quality == 60
+    assert not adaptive.update(encode_ms=50, workers=2, queue=0, queue_size=3, in_flight=0)
+    assert adaptive.update(encode_ms=50, workers=2, queue=0, queue_size=3, in_flight=0)  # 40 FPS of CPU
+    assert (adaptive.quality, adaptive.width, adaptive.fps) == (65, 1280, 30)
+    assert adaptive.reason == "recovered: raised quality"
+
+
+def test_spare_encoder_capacity_raises_width_before_quality():
+    adaptive = controller(recover_windows=1)
+    assert adaptive.update(encode_ms=5, workers=2, queue=0, queue_size=3, in_flight=0)
+    assert (adaptive.quality, adaptive.width, adaptive.fps) == (70, 1600, 30)
+
+
+def test_settings_stay_inside_their_ranges():
+    adaptive = controller()
+    for _ in range(50):
+        adaptive.update(encode_ms=5, workers=2, queue=2, queue_size=3, in_flight=0)
+    assert (adaptive.quality, adaptive.width, adaptive.fps) == (30, 640, 10)
+    assert not adaptive.update(encode_ms=5, workers=2, queue=2, queue_size=3, in_flight=0)
+
+
+def test_disabled_controller_is_never_due():
+    assert not controller(enabled=False, interval=0).due()
+    assert controller(interval=0).due()
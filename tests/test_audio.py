@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from hostcast.audio import AudioConverter, AudioRing, Resampler, downmix_matrix
+
+
+def frames(start, count):
+    """Mono PCM16 whose samples are their own frame numbers, so any misplaced byte shows"""
+    return (np.arange(start, start + count) % 32768).astype(np.int16).tobytes()
+
+
+def samples(data):
+    return np.frombuffer(data, dtype=np.int16).tolist()
+
+
+@pytest.fixture
+def ring():
+    return AudioRing(1000, 1, capacity_ms=100, period_frames=16)  # 100 frames
+
+
+def test_ring_reads_back_across_the_wraparound(ring):
+    ring.write(frames(0, 70), 70.0)
+    data, skipped, _ = ring.read(70)
+    assert samples(data) == list(range(70)) and skipped == 0
+
+    ring.write(frames(70, 60), 130.0)  # Crosses the end of the buffer
+    data, skipped, t = ring.read(1000)
+    assert samples(data) == list(range(70, 130))
+    assert skipped == 0 and t == 130.0
+    assert ring.overruns == 0
+
+
+def test_partial_read_stamps_the_time_after_its_last_frame(ring):
+    ring.write(frames(0, 50), 50.0)  # 1 frame per ms
+    data, _, t = ring.read(20)
+    assert samples(data) == list(range(20))
+    assert t == 20.0
+
+
+def test_reader_lapped_by_the_writer_skips_the_overwritten_audio(ring):
+    ring.write(frames(0, 80), 80.0)
+    ring.write(frames(80, 80), 160.0)  # 60 frames more than the ring holds since the last read
+    data, skipped, _ = ring.read(1000)
+    assert samples(data) == list(range(60, 160))
+    assert skipped == 60
+    assert ring.overruns == 1 and ring.overrun_frames == 60
+
+
+def test_frames_being_overwritten_during_the_copy_are_dropped(ring):
+    ring.write(frames(0, 100), 100.0)
+    ring.reserved = 130  # Writer has announced 30 frames, landing on the oldest ones
+    data, skipped, _ = ring.read(1000)
+    assert samples(data) == list(range(30, 100))
+    assert skipped == 30
+
+
+def test_wait_counts_an_underrun_when_nothing_arrives(ring):
+    assert not ring.wait(16, timeout=0.01)
+    assert ring.underruns == 1
+    ring.write(frames(0, 16), 16.0)
+    assert ring.wait(16, timeout=0.01)
+
+
+def sine(rate, seconds, frequency=997.0, channels=1):
+    t = np.arange(int(rate * seconds)) / rate
+    return np.repeat(np.sin(2 * np.pi * frequency * t)[:, None], channels, axis=1).astype(np.float32)
+
+
+@pytest.mark.parametrize("in_rate, out_rate", [(48000, 16000), (44100, 48000), (48000, 24000), (16000, 48000)])
+def test_resampler_matches_the_ideal_signal(in_rate, out_rate):
+    resampler = Resampler(in_rate, out_rate, 1)
+    out = resampler.process(sine(in_rate, 0.5))
+    # Output sample n is the input at n / out_rate - the filter only holds the newest `half` inputs back
+    expected = np.sin(2 * np.pi * 997.0 * np.arange(len(out)) / out_rate)
+    settled = slice(len(out) // 4, len(out) - len(out) // 4)
+    error = out[settled, 0] - expected[settled]
+    assert 20 * np.log10(np.sqrt(np.mean(error ** 2)) / np.sqrt(0.5)) < -80
+    assert abs(len(out) - 0.5 * out_rate) <= resampler.half * out_rate / in_rate + 1
+
+
+def test_resampler_output_does_not_depend_on_chunk_boundaries():
+    signal = sine(48000, 0.3, channels=2)
+    whole = Resampler(48000, 16000, 2).process(signal)
+
+    chunked = Resampler(48000, 16000, 2)
+    sizes = np.random.default_rng(7).integers(1, 2000, size=40)
+    bounds = np.concatenate(([0], np.cumsum(sizes)))
+    bounds = bounds[bounds < len(signal)].tolist() + [len(signal)]
+    parts = [chunked.process(signal[a:b]) for a, b in zip(bounds, bounds[1:])]
+    assert np.allclose(np.concatenate(parts), whole, atol=1e-4)
+
+
+def test_downmix_never_clips_a_full_scale_input():
+    for channels in (2, 6, 8):
+        for out_channels in (1, 2):
+            matrix = downmix_matrix(channels, out_channels)
+            assert matrix.shape == (channels, out_channels)
+            assert np.all(matrix.sum(axis=0) <= 1.0 + 1e-6)
+
+
+def test_converter_reports_its_delay_and_output_length():
+    converter = AudioConverter(48000, 2, 16000, 1)
+    pcm = (sine(48000, 0.1, channels=2) * 10000).astype(np.int16).tobytes()
+    first, delay = converter.convert(pcm)
+    assert delay == 0.0
+    _, delay = converter.convert(pcm)
+    assert delay > 0  # The resampler still holds back part of the first chunk
+    assert len(first) // 2 <= 1600
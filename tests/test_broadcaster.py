@@ -0,0 +1,62 @@
+import threading
+
+from hostcast.broadcaster import ClientQueue, FrameBroadcaster
+
+
+class ManualFanOut:
+    """Fan-out with no sender tasks, so queued items stay put for inspection"""
+
+    def spawn(self, target, *args):
+        pass
+
+    def event(self):
+        return threading.Event()
+
+    def call(self, fn, *args, **kwargs):
+        fn(*args, **kwargs)
+
+
+def test_full_queue_drops_the_oldest_item():
+    queue = ClientQueue("sid", maxlen=2)
+    assert queue.put(1) is None
+    assert queue.put(2) is None
+    assert queue.put(3) == 1
+    assert queue.dropped == 1
+    assert [queue.get(timeout=0), queue.get(timeout=0)] == [2, 3]
+
+
+def test_get_times_out_empty_and_returns_none_after_close():
+    queue = ClientQueue("sid", maxlen=2)
+    assert queue.get(timeout=0.01) is None
+    queue.put(1)
+    queue.close()
+    assert queue.get(timeout=0.01) is None
+    assert queue.depth() == 0
+
+
+def test_slow_viewer_only_loses_its_own_oldest_frames():
+    broadcaster = FrameBroadcaster(None, queue_size=2, fanout=ManualFanOut())
+    broadcaster.add_client("slow")
+    for i in range(5):
+        broadcaster.publish("frame", i)
+    broadcaster.add_client("late")
+    broadcaster.publish("frame", 5)
+
+    stats = broadcaster.stats()
+    assert stats["slow"] == {'queued': 2, 'sent': 0, 'dropped': 4, 'in_flight': None}
+    assert stats["late"]['queued'] == 1 and stats["late"]['dropped'] == 0
+    slow = broadcaster.clients["slow"]
+    assert [slow.get(timeout=0)[1], slow.get(timeout=0)[1]] == [4, 5]
+
+
+def test_dropping_a_delta_payload_requests_a_keyframe():
+    broadcaster = FrameBroadcaster(None, queue_size=1, fanout=ManualFanOut())
+    broadcaster.add_client("sid")
+    assert broadcaster.consume_keyframe_request()  # New viewer
+    assert not broadcaster.consume_keyframe_request()
+
+    broadcaster.publish("frame", "key")
+    broadcaster.publish("tiles", "delta", delta=True)  # Drops the full frame: no keyframe needed
+    assert not broadcaster.consume_keyframe_request()
+    broadcaster.publish("tiles", "delta", delta=True)  # Drops a delta: the picture is now incomplete
+    assert broadcaster.consume_keyframe_request()
@@ -0,0 +1,58 @@
+import builtins
+
+import pytest
+
+from hostcast import capture_process
+from hostcast.capture_process import SharedFrameRing
+
+
+@pytest.fixture
+def rings():
+    """A writer ring and a reader attached to the same shared memory, like the two processes"""
+    writer = SharedFrameRing(None, slots=2, slot_size=64)
+    reader = SharedFrameRing(writer.name, slots=2, slot_size=64)
+    yield writer, reader
+    reader.close()
+    writer.close(unlink=True)
+
+
+def test_frames_are_read_in_order_with_their_stamps(rings):
+    writer, reader = rings
+    assert reader.read_new() == []
+    writer.write(b"one", 10, 1.5)
+    writer.write(b"two", 11, 2.5)
+    assert reader.read_new() == [(b"one", 10, 1.5), (b"two", 11, 2.5)]
+    assert reader.read_new() == []
+    assert reader.stats()['read'] == 2
+
+
+def test_oversize_frame_is_refused(rings):
+    writer, reader = rings
+    assert not writer.write(b"x" * 65, 0, 0.0)
+    assert reader.read_new() == []
+
+
+def test_reader_that_falls_behind_skips_to_the_newest(rings):
+    writer, reader = rings
+    for i in range(5):
+        writer.write(bytes([i]), i, float(i))
+    assert [frame_seq for _, frame_seq, _ in reader.read_new()] == [3, 4]
+    assert reader.skipped == 3
+
+
+def test_slot_rewritten_during_the_copy_is_dropped_as_torn(rings, monkeypatch):
+    writer, reader = rings
+    writer.write(b"old", 1, 1.0)
+
+    def copy_while_writer_laps(view):
+        data = builtins.bytes(view)
+        # The writer wraps around into this slot while the reader is copying it
+        writer.write(b"new", 2, 2.0)
+        writer.write(b"newer", 3, 3.0)
+        return data
+
+    monkeypatch.setattr(capture_process, "bytes", copy_while_writer_laps, raising=False)
+    assert reader.read_new() == []
+    assert reader.torn == 1
+    monkeypatch.undo()
+    assert reader.read_new() == [(b"new", 2, 2.0), (b"newer", 3, 3.0)]
@@ -0,0 +1,87 @@
+from hostcast.cursor import CursorOverlay, CursorSampler, cursor_event
+
+MONITOR = {'left': 1920, 'top': 0, 'width': 1280, 'height': 1024}
+
+
+class Stream:
+    def __init__(self, index, region=None):
+        self.index = index
+        self.region = region
+
+    def area(self, monitor):
+        if self.region is None:
+            return monitor
+        left, top, width, height = self.region
+        return {'left': monitor['left'] + left, 'top': monitor['top'] + top, 'width': width, 'height': height}
+
+
+class Registry:
+    def __init__(self, groups):
+        self.groups = groups
+
+    def viewers(self):
+        return self.groups
+
+
+class Sampler:
+    def __init__(self, *positions):
+        self.positions = iter(positions)
+
+    def sample(self):
+        return (*next(self.positions), "default", True)
+
+
+class RecordingFanOut:
+    def __init__(self):
+        self.sent = []
+
+    def emit(self, event, data, **kwargs):
+        self.sent.append((kwargs['room'], data))
+
+
+def frames(count):
+    """active() that is true for `count` loop iterations"""
+    remaining = [count]
+
+    def active():
+        remaining[0] -= 1
+        return remaining[0] >= 0
+    return active
+
+
+def test_pointer_is_relative_to_the_capture_area():
+    assert cursor_event(MONITOR, 1920 + 640, 256, "text", True) == {
+        'x': 0.5, 'y': 0.25, 'shape': "text", 'visible': True
+    }
+
+
+def test_pointer_outside_the_area_or_hidden_is_invisible():
+    assert cursor_event(MONITOR, 100, 100, "default", True) == {'visible': False}
+    assert cursor_event(MONITOR, 1920 + 1280, 0, "default", True) == {'visible': False}  # Right edge is outside
+    assert cursor_event(MONITOR, 2000, 100, "default", False) == {'visible': False}
+
+
+def test_sampler_falls_back_to_the_position_callback(monkeypatch):
+    monkeypatch.setattr("hostcast.cursor.win32gui", None)
+    assert CursorSampler(lambda: (10.6, 20.2)).sample() == (10, 20, "default", True)
+
+
+def test_overlay_sends_each_viewer_only_changes_for_its_own_stream():
+    sampler = Sampler((2000, 100), (2000, 100), (2100, 100))
+    registry = Registry([(Stream(2), ["full"]), (Stream(2, (0, 0, 160, 160)), ["zoomed"])])
+    fanout = RecordingFanOut()
+    CursorOverlay(sampler, registry, {2: MONITOR}, fanout, rate=1000).run(frames(3))
+
+    full = [event for sid, event in fanout.sent if sid == "full"]
+    zoomed = [event for sid, event in fanout.sent if sid == "zoomed"]
+    assert [event['x'] for event in full] == [0.0625, 0.1406]  # The repeated position is not resent
+    assert zoomed == [{'x': 0.5, 'y': 0.625, 'shape': "default", 'visible': True}, {'visible': False}]
+
+
+def test_overlay_skips_viewers_outside_the_filter():
+    sampler = Sampler((2000, 100), (2000, 100))
+    fanout = RecordingFanOut()
+    overlay = CursorOverlay(sampler, Registry([(Stream(2), ["a", "b"])]), {2: MONITOR}, fanout,
+                            rate=1000, viewers=lambda: {"b"})
+    overlay.run(frames(2))
+    assert [sid for sid, _ in fanout.sent] == ["b"]
@@ -0,0 +1,71 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from hostcast.encoders import ENCODERS, PillowEncoder, create_encoder
+
+
+def backend(name, **kwargs):
+    try:
+        return ENCODERS[name](**kwargs)
+    except (ImportError, OSError, RuntimeError) as e:
+        pytest.skip(f"{name} unavailable: {e}")
+
+
+def screen():
+    """BGRA frame: left half pure blue, right half pure red"""
+    bgra = np.zeros((64, 128, 4), dtype=np.uint8)
+    bgra[:, :64, 0] = 255
+    bgra[:, 64:, 2] = 255
+    bgra[:, :, 3] = 255
+    return bgra
+
+
+def decode(jpeg):
+    return Image.open(io.BytesIO(jpeg)).convert("RGB")
+
+
+@pytest.fixture(params=list(ENCODERS))
+def encoder(request):
+    return backend(request.param)
+
+
+def test_bgra_input_decodes_with_the_right_colours(encoder):
+    img = decode(encoder.encode(encoder.source(screen()), (128, 64), 90))
+    assert img.size == (128, 64)
+    left, right = img.getpixel((16, 32)), img.getpixel((112, 32))
+    assert left[2] > 200 and left[0] < 60  # Blue
+    assert right[0] > 200 and right[2] < 60  # Red
+
+
+def test_frame_is_scaled_to_the_requested_size(encoder):
+    assert decode(encoder.encode(encoder.source(screen()), (64, 32), 80)).size == (64, 32)
+
+
+def test_box_encodes_only_that_region(encoder):
+    img = decode(encoder.encode(encoder.source(screen()), (32, 32), 90, box=(64, 0, 96, 32)))
+    assert img.size == (32, 32)
+    assert img.getpixel((16, 16))[0] > 200  # Inside the red half
+
+
+@pytest.mark.parametrize("name", list(ENCODERS))
+def test_reused_buffers_give_the_same_jpeg(name):
+    fresh, reused = backend(name), backend(name, reuse_buffers=True)
+    if isinstance(fresh, PillowEncoder):
+        fresh.optimize = False  # reuse_buffers turns optimize off
+    bgra = screen()
+    for size, box in (((64, 32), None), ((16, 16), (0, 0, 32, 32))):
+        assert reused.encode(reused.source(bgra), size, 80, box) == fresh.encode(fresh.source(bgra), size, 80, box)
+
+
+def test_stage_timings_are_reported():
+    stages = []
+    encoder = PillowEncoder(observe=lambda stage, seconds: stages.append(stage))
+    encoder.encode(encoder.source(screen()), (64, 32), 80)
+    assert stages == ["convert", "resize", "encode"]
+
+
+def test_unknown_backend_falls_back_to_pillow():
+    assert isinstance(create_encoder("nope"), PillowEncoder)
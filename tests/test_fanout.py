@@ -0,0 +1,23 @@
+import base64
+
+from hostcast.fanout import pack_bytes
+from hostcast.metrics import Metrics
+
+
+def test_binary_transport_passes_the_bytes_through_untouched():
+    data = b"\xff\xd8jpeg\x00"
+    assert pack_bytes(data) is data
+
+
+def test_legacy_transport_round_trips_through_base64():
+    data = bytes(range(256))
+    packed = pack_bytes(data, binary=False)
+    assert isinstance(packed, str)
+    assert base64.b64decode(packed) == data
+
+
+def test_base64_time_is_recorded_as_its_own_stage():
+    metrics = Metrics()
+    pack_bytes(b"frame", binary=False, metrics=metrics)
+    pack_bytes(b"frame", binary=True, metrics=metrics)
+    assert metrics.snapshot()['stages']['base64']['count'] == 1
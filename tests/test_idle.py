@@ -0,0 +1,40 @@
+import numpy as np
+
+from hostcast.idle import IdleDetector
+
+
+def test_static_screen_is_unchanged_once_every_phase_is_seen():
+    detector = IdleDetector(sample_step=4)
+    screen = np.zeros((64, 32, 4), dtype=np.uint8)
+    assert all(detector.changed(screen) for _ in range(4))  # First sight of each row set
+    assert not any(detector.changed(screen) for _ in range(8))
+
+
+def test_change_is_seen_within_sample_step_frames():
+    detector = IdleDetector(sample_step=4)
+    screen = np.zeros((64, 32, 4), dtype=np.uint8)
+    for _ in range(4):
+        detector.changed(screen)
+    screen[13, 5] = 1  # Only sampled in phase 1
+    seen = [detector.changed(screen) for _ in range(4)]
+    assert seen == [False, True, False, False]
+
+
+def test_heartbeat_is_due_after_the_interval(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("hostcast.idle.time.monotonic", lambda: now[0])
+    detector = IdleDetector(heartbeat=1.0)
+    detector.mark_sent()
+    now[0] += 0.5
+    assert not detector.heartbeat_due()
+    now[0] += 0.5
+    assert detector.heartbeat_due()
+
+
+def test_stats_report_the_suppressed_share():
+    detector = IdleDetector(sample_step=1)
+    screen = np.zeros((8, 8, 4), dtype=np.uint8)
+    for _ in range(4):
+        if not detector.changed(screen):
+            detector.suppressed += 1
+    assert detector.stats() == {'frames': 4, 'suppressed': 3, 'heartbeats': 0, 'suppressed_ratio': 0.75}
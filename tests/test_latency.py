@@ -0,0 +1,68 @@
+import pytest
+
+from hostcast.latency import LatencyTracker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [10000.0]
+    monkeypatch.setattr("hostcast.latency.now_ms", lambda: now[0])
+    return now
+
+
+def ack(seq, t, media="frame"):
+    # Viewer clock: received at 500, shown at 520, ack sent at 530
+    return {'media': media, 'seq': seq, 't': t, 'recv': 500.0, 'shown': 520.0, 'sent': 530.0}
+
+
+def test_ack_places_receive_and_display_on_the_server_clock(clock):
+    tracker = LatencyTracker()
+    tracker.rtt("sid", 40)
+    # Stamped at 9900; the ack arrives at 10000, so it was sent at 9980 server time
+    sample = tracker.ack("sid", ack(7, 9900.0))
+    assert sample == {'media': "frame", 'seq': 7, 'receive_ms': 50.0, 'display_ms': 70.0, 'rtt_ms': 40.0}
+
+
+def test_acks_wait_for_an_rtt_and_ignore_unknown_media(clock):
+    tracker = LatencyTracker()
+    assert tracker.ack("sid", ack(1, 9900.0)) is None
+    tracker.rtt("sid", 40)
+    assert tracker.ack("sid", ack(1, 9900.0, media="bogus")) is None
+    assert tracker.stats()["sid"]['media'] == {}
+
+
+def test_histograms_and_listeners_get_every_sample(clock):
+    received, displayed, heard = [], [], []
+    tracker = LatencyTracker(lambda media, seconds: received.append((media, seconds)),
+                             lambda media, seconds: displayed.append((media, seconds)))
+    tracker.subscribe(lambda sid, sample: heard.append((sid, sample['seq'])))
+    tracker.rtt("sid", 40)
+    tracker.ack("sid", ack(3, 9900.0, media="audio"))
+    assert received == [("audio", 0.05)] and displayed == [("audio", 0.07)]
+    assert heard == [("sid", 3)]
+
+
+def test_rtt_is_smoothed():
+    tracker = LatencyTracker(rtt_alpha=0.25)
+    tracker.rtt("sid", 40)
+    tracker.rtt("sid", "80")
+    assert tracker.stats()["sid"]['rtt_ms'] == 50.0
+
+
+def test_stats_report_percentiles_per_media(clock):
+    tracker = LatencyTracker()
+    tracker.rtt("sid", 0)
+    for i in range(100):
+        tracker.ack("sid", ack(i, 9970.0 - i))  # Receive latencies 0..99 ms
+    stats = tracker.stats()["sid"]['media']['frame']
+    assert stats['samples'] == 100
+    assert stats['receive_ms'] == {'p50': 50.0, 'p95': 95.0, 'p99': 99.0}
+
+
+def test_buffer_report_keeps_known_numeric_fields_only():
+    tracker = LatencyTracker()
+    tracker.buffer("sid", {'depth_ms': 61.26, 'underruns': 2, 'target_ms': "80", 'secret': 1})
+    assert tracker.stats()["sid"]['audio_buffer'] == {'depth_ms': 61.3, 'underruns': 2.0}
+    assert tracker.buffer_depths() == [("sid", 61.3)]
+    tracker.remove("sid")
+    assert tracker.stats() == {}
@@ -0,0 +1,83 @@
+from hostcast.metrics import Histogram, Metrics, payload_size
+
+
+def lines(metrics, start):
+    return [line for line in metrics.render().splitlines() if line.startswith(start)]
+
+
+def test_histogram_buckets_are_cumulative_in_the_exposition():
+    metrics = Metrics()
+    for seconds in (0.0004, 0.003, 0.003, 2.0):
+        metrics.observe("encode", seconds)
+    buckets = lines(metrics, 'hostcast_stage_seconds_bucket{stage="encode"')
+    assert buckets[0] == 'hostcast_stage_seconds_bucket{stage="encode",le="0.0005"} 1'
+    assert 'hostcast_stage_seconds_bucket{stage="encode",le="0.005"} 3' in buckets
+    assert buckets[-2:] == [
+        'hostcast_stage_seconds_bucket{stage="encode",le="1.0"} 3',
+        'hostcast_stage_seconds_bucket{stage="encode",le="+Inf"} 4'
+    ]
+    assert lines(metrics, "hostcast_stage_seconds_count") == ['hostcast_stage_seconds_count{stage="encode"} 4']
+    assert lines(metrics, "hostcast_stage_seconds_sum") == ['hostcast_stage_seconds_sum{stage="encode"} 2.006400']
+
+
+def test_label_values_are_escaped_only_in_the_exposition():
+    metrics = Metrics()
+    observe = metrics.histogram("ack_seconds", "Acks", "media")
+    observe('say "hi"\\\n', 0.01)
+    metrics.gauge("depth", "Depth", lambda: [({'sid': 'a"b'}, 3)])
+    assert lines(metrics, "hostcast_ack_seconds_count") == ['hostcast_ack_seconds_count{media="say \\"hi\\"\\\\\\n"} 1']
+    assert lines(metrics, "hostcast_depth{") == ['hostcast_depth{sid="a\\"b"} 3']
+    snapshot = metrics.snapshot()
+    assert list(snapshot['histograms']['ack_seconds']) == ['say "hi"\\\n']
+    assert snapshot['gauges']['depth'] == [{'sid': 'a"b', 'value': 3}]
+
+
+def test_sent_counters_add_up_messages_and_payload_bytes():
+    metrics = Metrics()
+    metrics.count_sent("frame", {'data': b"x" * 100, 'seq': 1})
+    metrics.count_sent("frame", {'data': "y" * 50})
+    assert metrics.snapshot()['sent'] == {'frame': {'messages': 2, 'bytes': 150}}
+    assert lines(metrics, "hostcast_sent_bytes_total{") == ['hostcast_sent_bytes_total{event="frame"} 150']
+
+
+def test_payload_size_walks_nested_payloads():
+    assert payload_size({'tiles': [{'data': b"abc"}, {'data': b"de"}], 'width': 640}) == 5
+
+
+def test_snapshot_summarises_stage_percentiles_in_ms():
+    metrics = Metrics()
+    for _ in range(99):
+        metrics.observe("encode", 0.004)
+    metrics.observe("encode", 0.2)
+    stage = metrics.snapshot()['stages']['encode']
+    assert (stage['count'], stage['p50_ms'], stage['p99_ms']) == (100, 5.0, 5.0)
+    assert stage['avg_ms'] == 5.96
+
+
+def test_timed_and_stage_record_their_blocks():
+    metrics = Metrics()
+
+    @metrics.timed("input")
+    def handler():
+        return "ok"
+
+    assert handler() == "ok"
+    with metrics.stage("capture"):
+        pass
+    assert set(metrics.snapshot()['stages']) == {"input", "capture"}
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics(enabled=False)
+    metrics.observe("encode", 0.01)
+    metrics.count_sent("frame", b"x")
+    snapshot = metrics.snapshot()
+    assert snapshot['stages'] == {} and snapshot['sent'] == {}
+
+
+def test_quantile_is_the_upper_bound_of_its_bucket():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+    counts, _, count = histogram.snapshot()
+    assert [histogram.quantile(q, counts, count) for q in (0.3, 0.6, 0.9)] == [0.1, 1.0, float('inf')]
@@ -0,0 +1,50 @@
+import pytest
+
+from hostcast.monitors import relative_viewport, snap_viewport
+
+MONITOR = {'left': 0, 'top': 0, 'width': 1920, 'height': 1080}
+
+
+@pytest.mark.parametrize("viewport", [
+    None,
+    "0,0,1,1",
+    {},
+    {'x': 0, 'y': 0, 'width': 0.5},
+    {'x': "left", 'y': 0, 'width': 0.5, 'height': 0.5},
+    {'x': 0, 'y': 0, 'width': float("nan"), 'height': 0.5},
+    {'x': 0, 'y': 0, 'width': float("inf"), 'height': 0.5},
+    {'x': 0, 'y': 0, 'width': 0, 'height': 0.5},
+    {'x': 0, 'y': 0, 'width': -0.5, 'height': 0.5},
+    {'x': 0, 'y': 0, 'width': 1, 'height': 1},
+    {'x': 0.2, 'y': 0.2, 'width': 1.5, 'height': 2},
+])
+def test_missing_malformed_or_full_viewports_mean_the_whole_monitor(viewport):
+    assert snap_viewport(MONITOR, viewport) is None
+
+
+def test_edges_snap_to_the_grid():
+    region = snap_viewport(MONITOR, {'x': 0.251, 'y': 0.249, 'width': 0.5, 'height': 0.5})
+    assert region == (480, 272, 960, 544)
+    assert all(value % 16 == 0 for value in region)
+
+
+def test_nearly_identical_viewports_share_one_region():
+    a = snap_viewport(MONITOR, {'x': 0.250, 'y': 0.25, 'width': 0.5, 'height': 0.5})
+    b = snap_viewport(MONITOR, {'x': 0.252, 'y': 0.25, 'width': 0.501, 'height': 0.5})
+    assert a == b
+
+
+def test_tiny_viewport_is_raised_to_the_minimum_size():
+    assert snap_viewport(MONITOR, {'x': 0.5, 'y': 0.5, 'width': 0.01, 'height': 0.01}) == (960, 544, 160, 160)
+
+
+def test_region_is_kept_inside_the_monitor():
+    left, top, width, height = snap_viewport(MONITOR, {'x': 0.9, 'y': -0.2, 'width': 0.5, 'height': 0.5})
+    assert left + width <= MONITOR['width'] and top == 0
+    assert (width, height) == (960, 544)
+
+
+def test_relative_viewport_round_trips():
+    region = snap_viewport(MONITOR, {'x': 0.25, 'y': 0.25, 'width': 0.5, 'height': 0.5})
+    assert snap_viewport(MONITOR, relative_viewport(MONITOR, region)) == region
+    assert relative_viewport(MONITOR, None) is None
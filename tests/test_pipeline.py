@@ -0,0 +1,66 @@
+import threading
+import time
+
+from hostcast.pipeline import EncodePipeline
+
+
+def collect(count, timeout=5.0):
+    """publish() that gathers `count` results, and an event set once they are in"""
+    published = []
+    done = threading.Event()
+
+    def publish(*result):
+        published.append(result)
+        if len(published) >= count:
+            done.set()
+
+    return publish, published, done
+
+
+def test_results_are_published_in_submission_order():
+    publish, published, done = collect(8)
+    pipeline = EncodePipeline(publish, workers=4, depth=8)
+    pipeline.start()
+    try:
+        # Earlier jobs take longer, so they finish after later ones
+        for i in range(8):
+            pipeline.submit(lambda i=i: (time.sleep((8 - i) * 0.01), ("frame", i, False))[1])
+        assert done.wait(5)
+    finally:
+        pipeline.stop()
+    assert [payload for _, payload, _ in published] == list(range(8))
+    assert pipeline.encoded == 8
+
+
+def test_failed_and_empty_jobs_are_skipped_without_blocking_later_ones():
+    publish, published, done = collect(2)
+    pipeline = EncodePipeline(publish, workers=2, depth=4)
+    pipeline.start()
+
+    def fail():
+        raise RuntimeError("encoder broke")
+
+    try:
+        pipeline.submit(lambda: ("frame", "a", False))
+        pipeline.submit(fail)
+        pipeline.submit(lambda: None)  # Nothing to send (e.g. no tile changed)
+        pipeline.submit(lambda: ("frame", "b", False))
+        assert done.wait(5)
+    finally:
+        pipeline.stop()
+    assert [payload for _, payload, _ in published] == ["a", "b"]
+    assert pipeline.failed == 1
+
+
+def test_resubmit_publishes_an_earlier_result_again_in_order():
+    publish, published, done = collect(3)
+    pipeline = EncodePipeline(publish, workers=2, depth=4)
+    pipeline.start()
+    try:
+        first = pipeline.submit(lambda: ("frame", "a", False))
+        pipeline.submit(lambda: (time.sleep(0.05), ("frame", "b", False))[1])
+        pipeline.resubmit(first)  # Idle heartbeat
+        assert done.wait(5)
+    finally:
+        pipeline.stop()
+    assert [payload for _, payload, _ in published] == ["a", "b", "a"]
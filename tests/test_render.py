@@ -0,0 +1,45 @@
+import io
+
+from PIL import Image
+
+from hostcast.render import VirtualScreenCache
+
+
+def test_same_settings_share_one_cached_layer():
+    cache = VirtualScreenCache(target_width=320)
+    first = cache.layer(640, 360, "Display-a")
+    assert cache.layer(640, 360, "Display-a") is first
+    assert cache.layer(640, 360, "Display-b") is not first
+    assert cache.stats() == {'layers': 2, 'hits': 1, 'misses': 2}
+
+
+def test_least_recently_used_layer_is_evicted():
+    cache = VirtualScreenCache(target_width=320, max_layers=2)
+    a = cache.layer(320, 180, "a")
+    cache.layer(320, 180, "b")
+    cache.layer(320, 180, "a")  # "b" is now the least recently used
+    cache.layer(320, 180, "c")
+    assert set(name for _, _, name in cache.layers) == {"a", "c"}
+    assert cache.layer(320, 180, "a") is a
+
+
+def test_wide_displays_are_scaled_to_the_target_width_once():
+    cache = VirtualScreenCache(target_width=320)
+    layer = cache.layer(1280, 720, "wide")
+    assert layer.image.size == (320, 180) and layer.scale == 0.25
+    assert Image.open(io.BytesIO(layer.jpeg)).size == (320, 180)
+
+
+def test_frame_without_a_cursor_is_the_cached_jpeg():
+    cache = VirtualScreenCache(target_width=320)
+    assert cache.frame(320, 180, "idle") is cache.layer(320, 180, "idle").jpeg
+
+
+def test_cursor_is_composited_without_touching_the_cached_layer():
+    cache = VirtualScreenCache(target_width=320)
+    layer = cache.layer(320, 180, "busy")
+    background = layer.image.tobytes()
+    frame = cache.frame(320, 180, "busy", 0.5, 0.5)
+    assert frame != layer.jpeg
+    assert Image.open(io.BytesIO(frame)).size == (320, 180)
+    assert layer.image.tobytes() == background
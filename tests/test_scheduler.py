@@ -0,0 +1,86 @@
+import pytest
+
+from hostcast.scheduler import FrameScheduler, percentile
+
+
+class Clock:
+    """Stand-in for the time module: sleep() advances monotonic() exactly"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(round(seconds, 6))
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("hostcast.scheduler.time", clock)
+    return clock
+
+
+def test_deadlines_absorb_the_work_time_without_drift(clock):
+    scheduler = FrameScheduler(100)
+    for _ in range(5):
+        clock.now += 0.003  # Capture + encode
+        scheduler.wait()
+    assert clock.slept == [0.01] + [0.007] * 4  # The first frame only sets the schedule
+    assert scheduler.stats()['fps'] == 100.0
+    assert scheduler.stats()['jitter_ms']['p99'] == 0.0
+
+
+def test_skip_drops_missed_slots_and_restarts_from_now(clock):
+    scheduler = FrameScheduler(100, "skip")
+    scheduler.wait()
+    clock.now += 0.045  # Overran the next deadline by 35 ms
+    scheduler.wait()
+    assert (scheduler.late, scheduler.skipped) == (1, 3)
+    clock.slept.clear()
+    scheduler.wait()
+    assert clock.slept == [0.01]  # A full period after the late frame, not a burst
+
+
+def test_catchup_runs_late_frames_back_to_back(clock):
+    scheduler = FrameScheduler(100, "catchup")
+    scheduler.wait()
+    clock.now += 0.035
+    scheduler.wait()
+    clock.slept.clear()
+    scheduler.wait()
+    scheduler.wait()
+    assert clock.slept == []  # Still behind: no sleeping
+    scheduler.wait()
+    assert len(clock.slept) == 1
+    assert scheduler.skipped == 0
+
+
+def test_catchup_gives_up_beyond_max_backlog(clock):
+    scheduler = FrameScheduler(100, "catchup", max_catchup=3)
+    scheduler.wait()
+    clock.now += 0.105  # 9.5 periods behind
+    scheduler.wait()
+    assert scheduler.skipped == 9
+
+
+def test_report_is_due_once_per_interval(clock):
+    scheduler = FrameScheduler(30, report_interval=5.0)
+    assert not scheduler.report_due()
+    clock.now += 5.0
+    assert scheduler.report_due()
+    assert not scheduler.report_due()
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        FrameScheduler(30, "burst")
+
+
+def test_percentile_of_a_sorted_list():
+    values = list(range(1, 101))
+    assert (percentile(values, 0.5), percentile(values, 0.99), percentile(values, 1.0)) == (51, 100, 100)
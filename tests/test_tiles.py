@@ -0,0 +1,58 @@
+import numpy as np
+
+from hostcast.tiles import TileDiffer, merge_tiles
+
+
+def frame(width=256, height=128):
+    return np.zeros((height, width, 4), dtype=np.uint8)
+
+
+def test_first_frame_and_requested_keyframes_are_full_frames():
+    differ = TileDiffer(tile_size=64)
+    screen = frame()
+    assert differ.diff(screen, 256, 128) is None
+    assert differ.diff(screen, 256, 128) == []
+    differ.request_keyframe()
+    assert differ.diff(screen, 256, 128) is None
+
+
+def test_one_changed_pixel_dirties_only_its_tile():
+    differ = TileDiffer(tile_size=64)
+    screen = frame()
+    differ.diff(screen, 256, 128)
+    screen[70, 130] = 255
+    assert differ.diff(screen, 256, 128) == [((128, 64, 192, 128), (128, 64, 192, 128))]
+
+
+def test_tiles_map_back_to_source_pixels_when_scaling_down():
+    differ = TileDiffer(tile_size=64)
+    screen = frame(512, 256)
+    differ.diff(screen, 256, 128)
+    screen[10, 300] = 255  # Source column 300 is output column 150
+    assert differ.diff(screen, 256, 128) == [((256, 0, 384, 128), (128, 0, 192, 64))]
+
+
+def test_mostly_dirty_frame_falls_back_to_a_keyframe():
+    differ = TileDiffer(tile_size=64, full_frame_ratio=0.5)
+    screen = frame()
+    differ.diff(screen, 256, 128)
+    screen[:, :192] = 255  # 6 of 8 tiles
+    assert differ.diff(screen, 256, 128) is None
+
+
+def test_keyframe_interval_forces_a_periodic_full_frame():
+    differ = TileDiffer(tile_size=64, keyframe_interval=3)
+    screen = frame()
+    assert differ.diff(screen, 256, 128) is None
+    assert differ.diff(screen, 256, 128) == []
+    assert differ.diff(screen, 256, 128) == []
+    assert differ.diff(screen, 256, 128) is None
+
+
+def test_merge_joins_runs_across_rows_into_rectangles():
+    dirty = np.array([
+        [1, 1, 0, 0],
+        [1, 1, 0, 1],
+        [0, 0, 0, 1],
+    ], dtype=bool)
+    assert sorted(merge_tiles(dirty)) == [(0, 0, 2, 2), (3, 1, 4, 3)]
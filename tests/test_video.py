@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from hostcast.video import create_video_encoder
+
+pytest.importorskip("av")
+
+
+def frames(count, width=160, height=96):
+    """BGRA frames with a moving bar, so every one differs"""
+    for i in range(count):
+        bgra = np.zeros((height, width, 4), dtype=np.uint8)
+        bgra[:, (i * 8) % width:(i * 8) % width + 8] = 255
+        yield bgra
+
+
+@pytest.fixture(params=["h264", "vp8"])
+def video(request):
+    encoder = create_video_encoder(request.param)
+    if encoder is None:
+        pytest.skip(f"{request.param} unavailable")
+    yield encoder
+    encoder.close()
+
+
+def test_output_lags_one_frame_and_starts_with_a_keyframe(video):
+    fragments = [video.encode(bgra, (160, 96), 70, stamp={'seq': i}) for i, bgra in enumerate(frames(4))]
+    assert fragments[0] is None
+    first = fragments[1]
+    assert first['key'] and first['init'] and first['seq'] == 0
+    assert first['mime'].startswith(("video/mp4", "video/webm"))
+    assert [f['seq'] for f in fragments[2:]] == [1, 2]
+    assert all(not f['key'] and f['init'] is None for f in fragments[2:])
+
+
+def test_forced_keyframe_carries_the_init_segment(video):
+    screens = list(frames(5))
+    for bgra in screens[:3]:
+        video.encode(bgra, (160, 96), 70)
+    video.encode(screens[3], (160, 96), 70, keyframe=True)
+    released = video.encode(screens[4], (160, 96), 70)
+    assert released['key'] and released['init'] == video.init
+
+
+def test_new_size_starts_a_new_generation_with_even_dimensions(video):
+    for bgra in frames(2):
+        video.encode(bgra, (160, 96), 70)
+    gen = video.gen
+    assert video.encode(next(frames(1)), (81, 47), 70) is None  # New session holds its first frame
+    assert video.gen == gen + 1
+    assert video.size == (80, 46)
+
+
+def test_missing_or_unknown_codec_means_jpeg_frames():
+    assert create_video_encoder(None) is None
+    assert create_video_encoder("mpeg2") is None